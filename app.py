@@ -1,16 +1,32 @@
-from shiny import App, ui, render, reactive
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.figure import Figure
-import os
-import random
 import time
 
-# Import the demonstration modules
-from modules.risk_pooling import demonstrate_risk_pooling
-from modules.driver_comparison import demonstrate_driver_comparison
-from modules.premium_calculation import demonstrate_premium_calculation
+# Cold start is timed from the first line of this file; report_startup() prints it at boot
+_startup_started = time.perf_counter()
+
+import base64
+import random
+import sys
+from shiny import App, ui, render, reactive
+
+# Import the demonstration modules of the first (default) tab; the other tabs import theirs in their calcs
+from modules.risk_pooling import simulate_risk_pooling
+from modules.pool_projection import simulate_pool_projection
+from modules.pool_convergence import simulate_pool_convergence
+from modules.correlated_risk import simulate_correlated_pool
+from modules.aggregate_loss import pool_loss_distribution
+from modules.premium_calculation import EXPENSE_RATIO, RISK_MARGIN_RATIO
+from modules.cache import cached_call, simulation_cache
+from modules.assets import preload_portraits
+
+# Cold start budget for importing this file (the hosting platform starts a fresh process per worker)
+STARTUP_BUDGET_SECONDS = 1.5
+
+# Libraries too slow to import at boot; the app should only load them on first use
+HEAVY_MODULES = ("matplotlib", "scipy", "pandas", "PIL")
+
+# Base seed of the driver simulations; it does not depend on the sliders, so moving a slider
+# transforms the same cached random draws (the drivers move) and only Re-simulate draws new ones
+DRIVER_BASE_SEED = 8000
 
 # Define CSS for better styling
 custom_css = """
@@ -331,6 +347,21 @@ input:checked + .slider:before {
 """
 
 
+# Cached PNG bytes rendered as an inline image, sized like the former output_plot containers
+def png_image(png, height):
+    src = "data:image/png;base64," + base64.b64encode(png).decode("ascii")
+    return ui.img(src=src, style=f"width: 100%; height: {height}; object-fit: contain;")
+
+
+# Prints the measured cold start against STARTUP_BUDGET_SECONDS and any heavy libraries already loaded
+def report_startup():
+    elapsed = time.perf_counter() - _startup_started
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    status = "within" if elapsed <= STARTUP_BUDGET_SECONDS else "OVER"
+    print(f"Startup took {elapsed:.2f}s ({status} the {STARTUP_BUDGET_SECONDS:.2f}s budget); "
+          f"heavy modules loaded at boot: {', '.join(loaded) if loaded else 'none'}")
+
+
 # Custom toggle switch HTML
 def driver_toggle_switch():
     # Create a custom toggle switch HTML
@@ -412,11 +443,18 @@ app_ui = ui.page_fluid(
                                    ui.input_slider("num_policyholders", "Number of Policyholders:",
                                                    min=10, max=1000, value=100, step=10)
                                    ),
+                         ui.column(2,
+                                   # Scales the slider up to realistic book sizes (up to 1 billion policyholders)
+                                   ui.input_select("pool_scale", "Pool Size Multiplier:",
+                                                   {"1": "×1", "1000": "×1,000", "10000": "×10,000",
+                                                    "1000000": "×1,000,000"},
+                                                   selected="1")
+                                   ),
                          ui.column(2,
                                    ui.br(),
                                    ui.input_action_button("resim_risk", "Re-simulate", class_="btn-resim")
                                    ),
-                         ui.column(4,
+                         ui.column(2,
                                    ui.br(),
                                    ui.div({"class": "seed-info"}, ui.output_text("risk_seed_info"))
                                    )
@@ -425,10 +463,62 @@ app_ui = ui.page_fluid(
                      # Main content below with clear separation
                      ui.div({"class": "plot-container"},
                             ui.div({"class": "plot-title"}, "Individual vs Pooled Risk"),
-                            ui.output_plot("risk_pooling_plot", width="100%", height="500px")
+                            ui.output_ui("risk_pooling_plot")
                             ),
                      ui.div({"class": "interpretation-box"},
                             ui.tags.pre(ui.output_text("risk_pooling_interpretation"))
+                            ),
+                     ui.hr(),
+                     # Law of large numbers: one growing pool from 10 to 1,000,000 policyholders
+                     ui.div({"class": "plot-container"},
+                            ui.div({"class": "plot-title"}, "Convergence as the Pool Grows"),
+                            ui.output_ui("pool_convergence_plot")
+                            ),
+                     ui.div({"class": "interpretation-box"},
+                            ui.tags.pre(ui.output_text("pool_convergence_interpretation"))
+                            ),
+                     ui.hr(),
+                     # Correlated risk: a common shock (hail, flood) hits every policyholder in the same year
+                     ui.row(
+                         ui.column(6,
+                                   ui.input_slider("risk_correlation", "Correlation between Policyholders:",
+                                                   min=0.0, max=0.30, value=0.05, step=0.01)
+                                   ),
+                         ui.column(6,
+                                   ui.input_select("dependence_model", "Common Shock Model:",
+                                                   {"gaussian": "Gaussian copula", "t": "t copula (heavier joint tail)"},
+                                                   selected="gaussian")
+                                   )
+                     ),
+                     ui.div({"class": "plot-container"},
+                            ui.div({"class": "plot-title"}, "Correlated Risk: When Pooling Stops Working"),
+                            ui.output_ui("correlated_pool_plot")
+                            ),
+                     ui.div({"class": "interpretation-box"},
+                            ui.tags.pre(ui.output_text("correlated_pool_interpretation"))
+                            ),
+                     ui.hr(),
+                     # Multi-year capital projection for the same pool
+                     ui.row(
+                         ui.column(4,
+                                   ui.input_slider("projection_years", "Years to Project:",
+                                                   min=5, max=50, value=20, step=5)
+                                   ),
+                         ui.column(4,
+                                   ui.input_slider("initial_capital_pct", "Starting Capital (% of annual premium):",
+                                                   min=0, max=100, value=10, step=5)
+                                   ),
+                         ui.column(4,
+                                   ui.input_slider("premium_loading", "Premium Loading above Expected Losses:",
+                                                   min=0.0, max=0.20, value=0.05, step=0.01)
+                                   )
+                     ),
+                     ui.div({"class": "plot-container"},
+                            ui.div({"class": "plot-title"}, "Multi-Year Capital Reserve and Probability of Ruin"),
+                            ui.output_ui("pool_projection_plot")
+                            ),
+                     ui.div({"class": "interpretation-box"},
+                            ui.tags.pre(ui.output_text("pool_projection_interpretation"))
                             )
                      ),
 
@@ -471,9 +561,16 @@ app_ui = ui.page_fluid(
                                                    min=1.2, max=3.0, value=2.0, step=0.2)
                                    )
                      ),
-                     # CENTERED Re-simulate button
+                     # CENTERED Re-simulate button, with the cohort size on its left
                      ui.row(
-                         ui.column(5),  # Spacing
+                         ui.column(3),  # Spacing
+                         ui.column(2,
+                                   # Above 5,000 drivers per cohort the chart becomes a density raster
+                                   ui.input_select("cohort_size", "Drivers per Cohort:",
+                                                   {"200": "200", "10000": "10,000", "100000": "100,000",
+                                                    "1000000": "1,000,000"},
+                                                   selected="200")
+                                   ),
                          ui.column(2,
                                    ui.br(),
                                    ui.div({"class": "center-button"},
@@ -493,10 +590,34 @@ app_ui = ui.page_fluid(
                      # Main content below with clear separation - ADDED EXTRA BOTTOM PADDING
                      ui.div({"class": "plot-container plot-container-extra-bottom"},
                             ui.div({"class": "plot-title"}, "Driver Risk Profiles: Frequency vs Claim Amount"),
-                            ui.output_plot("driver_comparison_plot", width="100%", height="700px")
+                            ui.output_ui("driver_comparison_plot")
                             ),
                      ui.div({"class": "interpretation-box"},
                             ui.tags.pre(ui.output_text("driver_comparison_interpretation"))
+                            ),
+                     ui.hr(),
+                     # Sampling distribution of the multipliers over many replications of the simulation above
+                     ui.row(
+                         ui.column(4,
+                                   ui.input_checkbox("show_ensemble", "Show sampling distribution across seeds",
+                                                     value=False)
+                                   )
+                     ),
+                     ui.output_ui("ensemble_section"),
+                     ui.hr(),
+                     # Many rating segments between the low-risk and high-risk cohorts above
+                     ui.row(
+                         ui.column(4,
+                                   ui.input_slider("num_segments", "Number of Rating Segments:",
+                                                   min=2, max=100, value=10, step=1)
+                                   )
+                     ),
+                     ui.div({"class": "plot-container"},
+                            ui.div({"class": "plot-title"}, "Rating Segments: From Lowest to Highest Risk"),
+                            ui.output_ui("rating_segments_plot")
+                            ),
+                     ui.div({"class": "interpretation-box"},
+                            ui.tags.pre(ui.output_text("rating_segments_interpretation"))
                             )
                      ),
 
@@ -560,11 +681,45 @@ app_ui = ui.page_fluid(
                      # Main content below with clear separation - INCREASED HEIGHT BY 100%
                      ui.div({"class": "plot-container"},
                             ui.div({"class": "plot-title"}, "Premium Components and Breakdown"),
-                            ui.output_plot("premium_calc_plot", width="100%", height="1200px")
+                            ui.output_ui("premium_calc_plot")
                             # Doubled from 600px to 1200px
                             ),
                      ui.div({"class": "interpretation-box"},
                             ui.tags.pre(ui.output_text("premium_calc_interpretation"))
+                            ),
+                     ui.hr(),
+                     # Sensitivity of the premium to the loadings and to the expected loss
+                     ui.row(
+                         ui.column(4,
+                                   ui.input_slider("sensitivity_expense_ratio", "Expense Ratio:",
+                                                   min=0.0, max=0.50, value=EXPENSE_RATIO, step=0.01)
+                                   ),
+                         ui.column(4,
+                                   ui.input_slider("sensitivity_risk_margin", "Risk Margin:",
+                                                   min=0.0, max=0.20, value=RISK_MARGIN_RATIO, step=0.01)
+                                   )
+                     ),
+                     ui.div({"class": "plot-container"},
+                            ui.div({"class": "plot-title"}, "Premium Sensitivity: Loadings and Expected Loss"),
+                            ui.output_ui("premium_sensitivity_plot")
+                            ),
+                     ui.div({"class": "interpretation-box"},
+                            ui.tags.pre(ui.output_text("premium_sensitivity_interpretation"))
+                            ),
+                     ui.hr(),
+                     # Experience rating: each driver's own claim history moves their price
+                     ui.row(
+                         ui.column(4,
+                                   ui.input_slider("history_years", "Years of Claim History:",
+                                                   min=1, max=10, value=5, step=1)
+                                   )
+                     ),
+                     ui.div({"class": "plot-container"},
+                            ui.div({"class": "plot-title"}, "Experience Rating: How Claim History Moves the Price"),
+                            ui.output_ui("claim_history_plot")
+                            ),
+                     ui.div({"class": "interpretation-box"},
+                            ui.tags.pre(ui.output_text("claim_history_interpretation"))
                             )
                      ),
 
@@ -722,6 +877,15 @@ app_ui = ui.page_fluid(
                      ui.row(
                          ui.column(12, ui.output_ui("ethics_grade_output"))
                      ),
+                     ui.hr(),
+                     # A multiplicative tariff built from the rating variables ticked above
+                     ui.div({"class": "plot-container"},
+                            ui.div({"class": "plot-title"}, "Pricing with the Rating Variables You Selected"),
+                            ui.output_ui("tariff_plot")
+                            ),
+                     ui.div({"class": "interpretation-box"},
+                            ui.tags.pre(ui.output_text("tariff_interpretation"))
+                            ),
                      # Add JavaScript for color coding - updated to replace gender with religion
                      ui.tags.script("""
                     $(document).ready(function() {
@@ -809,17 +973,22 @@ def server(input, output, session):
         good_driver = get_good_driver().capitalize()
         return ui.strong(f"{good_driver} Cohort:")
 
+    # Number of policyholders after applying the pool size multiplier
+    @reactive.Calc
+    def pool_size():
+        return input.num_policyholders() * int(input.pool_scale())
+
     # Reactive calculations for seed values
     @reactive.Calc
     def risk_seed():
-        base_seed = int(input.accident_probability() * 10000 + input.num_policyholders())
+        # The pool size is not part of the seed: resizing keeps the same policyholders and adds or drops the newest
+        base_seed = int(input.accident_probability() * 10000)
         offset = risk_sim_offset.get()
         return base_seed + offset, base_seed, offset
 
     @reactive.Calc
     def driver_seed():
-        base_seed = int(input.base_frequency() * 10000 + input.base_severity() +
-                        input.freq_multiplier() * 100 + input.severity_multiplier() * 100)
+        base_seed = DRIVER_BASE_SEED
         offset = driver_sim_offset.get()
         return base_seed + offset, base_seed, offset
 
@@ -836,33 +1005,45 @@ def server(input, output, session):
         seed, base, offset = driver_seed()
         return f"Seed: {seed} (Base: {base}, Offset: {offset})"
 
-    # Risk Pooling Module
+    # Risk Pooling Module - reactive calcs hold result objects; figures are only built when a plot asks for them
+    # Results (stats and PNG bytes) come from the process-wide cache shared by all sessions
     @reactive.Calc
     def risk_data():
         seed, base, offset = risk_seed()
-        print(f"Risk Pooling using seed: {seed} (base: {base}, offset: {offset})")
-        return demonstrate_risk_pooling(
+        # Each call draws from its own Generator derived from the seed - no shared global NumPy state
+        result = cached_call(
+            simulate_risk_pooling,
             input.accident_probability(),
-            input.num_policyholders(),
-            seed=seed,
-            return_fig=True
+            pool_size(),
+            seed=seed
         )
+        print(f"Risk Pooling using seed: {seed} (base: {base}, offset: {offset}, cache: {simulation_cache.info()})")
+        return result
 
     @output
-    @render.plot
+    @render.ui
     def risk_pooling_plot():
-        fig, _ = risk_data()
-        return fig
+        return png_image(risk_data().png, "500px")
+
+    # Exact total claims distribution of the pool (no sampling noise); None when the pool is too large
+    @reactive.Calc
+    def pool_distribution():
+        try:
+            return cached_call(pool_loss_distribution, input.accident_probability(), pool_size())
+        except ValueError:
+            return None
 
     @output
     @render.text
     def risk_pooling_interpretation():
-        _, stats = risk_data()
-        claim_amount = 20000  # Fixed claim amount
+        result = risk_data()
+        stats = result.stats
+        claim_amount = result.claim_amount  # Fixed claim amount
+        distribution = pool_distribution()
 
         text = "Insurance Interpretation:\n"
         text += f"• Individual Risk: Each person has a {input.accident_probability():.1%} chance of a ${claim_amount:,.0f} loss.\n"
-        text += f"• Without Insurance: {stats['displayed_num_with_loss']} out of {stats['display_n']} people ({stats['displayed_percent_with_loss']:.1f}%) faced a ${claim_amount:,.0f} loss.\n"
+        text += f"• Without Insurance: {stats['displayed_num_with_loss']:,} out of {stats['display_n']:,} people ({stats['displayed_percent_with_loss']:.1f}%) faced a ${claim_amount:,.0f} loss.\n"
         text += f"• With Insurance: Everyone pays a premium of ${stats['fair_premium']:,.0f}.\n"
         text += f"• Risk Pooling Result: The insurer collected ${stats['pool_premium_total']:,.0f} and paid ${stats['total_losses']:,.0f} in claims.\n"
 
@@ -873,38 +1054,172 @@ def server(input, output, session):
             text += f"• This year the insurance pool had a ${abs(stats['pool_premium_total'] - stats['total_losses']):,.0f} deficit.\n"
             text += "• The deficit must be covered by the insurer's capital reserves.\n"
 
+        if distribution is not None:
+            text += f"• Exact odds (no simulation noise): the pool runs a deficit in {distribution.prob_exceeds(stats['pool_premium_total']):.1%} of years; "
+            text += f"in 1 year out of 200 claims exceed ${distribution.stats['quantile_995']:,.0f}.\n"
+
         text += f"• Key Insight: As the number of policyholders increases, the 'Actual/Expected' ratio approaches 1.0, "
         text += f"making the insurance pool's results more predictable and stable."
 
         return text
 
+    # Convergence curve - every pool size from one stream of draws via cumulative sums
+    @reactive.Calc
+    def convergence_data():
+        seed, _, _ = risk_seed()
+        return cached_call(simulate_pool_convergence, input.accident_probability(), seed=seed)
+
+    @output
+    @render.ui
+    def pool_convergence_plot():
+        return png_image(convergence_data().png, "450px")
+
+    @output
+    @render.text
+    def pool_convergence_interpretation():
+        result = convergence_data()
+        stats = result.stats
+
+        text = "Law of Large Numbers:\n"
+        text += f"• The curve follows one pool as it grows from {stats['min_n']:,} to {stats['max_n']:,} policyholders.\n"
+        if stats['min_n'] <= pool_size() <= stats['max_n']:
+            text += f"• At {pool_size():,} policyholders this pool's Actual/Expected ratio is {result.ratio_at(pool_size()):.2f}.\n"
+        text += f"• At {stats['max_n']:,} policyholders the ratio is {stats['final_ratio']:.3f}, and 99% of pools land within "
+        text += f"±{stats['final_band_half_width']:.1%} of expected losses.\n"
+        text += "• Key Insight: The shaded 99% band narrows in proportion to 1/√n - quadrupling the pool halves the uncertainty."
+
+        return text
+
+    # Correlated pool - every scenario draws one common shock, then a binomial claim count (no n x n matrix)
+    @reactive.Calc
+    def correlated_data():
+        seed, _, _ = risk_seed()
+        return cached_call(
+            simulate_correlated_pool,
+            input.accident_probability(),
+            pool_size(),
+            correlation=input.risk_correlation(),
+            dependence=input.dependence_model(),
+            seed=seed
+        )
+
+    @output
+    @render.ui
+    def correlated_pool_plot():
+        return png_image(correlated_data().png, "450px")
+
+    @output
+    @render.text
+    def correlated_pool_interpretation():
+        result = correlated_data()
+        stats = result.stats
+
+        text = "Correlated Risk Interpretation:\n"
+        text += f"• With independent policyholders, a pool of {result.num_policyholders:,} has an Actual/Expected standard deviation of {stats['std_independent']:.3f}.\n"
+        text += f"• With a correlation of {stats['correlation']:.2f}, the same pool's standard deviation is {stats['std_correlated']:.3f}.\n"
+        text += f"• Losses exceed expected by more than 20% in {stats['prob_deficit_over_20pct_correlated']:.1%} of correlated years "
+        text += f"(vs {stats['prob_deficit_over_20pct_independent']:.1%} when independent); the 1-in-200 year is "
+        text += f"{stats['quantile_995_correlated']:.2f}x expected (vs {stats['quantile_995_independent']:.2f}x).\n"
+        text += f"• Even at 10,000,000 policyholders the correlated standard deviation stays near {stats['std_floor_correlated']:.3f}.\n"
+        text += "• Key Insight: Pooling only diversifies away independent risk. A hail storm or flood that hits "
+        text += "many policyholders at once cannot be diversified by adding more of them - it needs capital or reinsurance."
+
+        return text
+
+    # Multi-year projection of the same pool - 10,000 scenarios simulated in one vectorized pass
+    @reactive.Calc
+    def projection_data():
+        seed, _, _ = risk_seed()
+        return cached_call(
+            simulate_pool_projection,
+            input.accident_probability(),
+            pool_size(),
+            num_years=input.projection_years(),
+            num_scenarios=10000,
+            initial_capital_ratio=input.initial_capital_pct() / 100,
+            premium_loading=input.premium_loading(),
+            seed=seed
+        )
+
+    @output
+    @render.ui
+    def pool_projection_plot():
+        return png_image(projection_data().png, "500px")
+
+    @output
+    @render.text
+    def pool_projection_interpretation():
+        stats = projection_data().stats
+
+        text = "Multi-Year Interpretation:\n"
+        text += f"• Each year the pool collects ${stats['annual_premium']:,.0f} in premiums and starts with ${stats['initial_capital']:,.0f} of capital.\n"
+        text += f"• Across {stats['num_scenarios']:,} simulated futures, the capital reserve fell below zero within {stats['num_years']} years in {stats['ruin_probability']:.1%} of scenarios.\n"
+        if stats['mean_time_to_ruin'] is not None:
+            text += f"• When ruin happened, it took {stats['mean_time_to_ruin']:.1f} years on average (median {stats['median_time_to_ruin']:.0f}).\n"
+        text += f"• After {stats['num_years']} years the median capital reserve is ${stats['median_final_capital']:,.0f} "
+        text += f"(90% of scenarios between ${stats['final_capital_p5']:,.0f} and ${stats['final_capital_p95']:,.0f}).\n"
+        text += "• Key Insight: Surpluses in good years build the capital that absorbs deficit years. "
+        text += "Most ruin happens early, before the loading has had time to accumulate a cushion."
+
+        return text
+
     # Driver Comparison Module
     @reactive.Calc
     def driver_data():
+        from modules.driver_comparison import simulate_driver_comparison
+
         seed, base, offset = driver_seed()
         good_driver = get_good_driver()
         good_driver_image = f"{good_driver}.jpeg"
-        print(f"Driver Comparison using seed: {seed} (base: {base}, offset: {offset}, good driver: {good_driver})")
-        return demonstrate_driver_comparison(
+        result = cached_call(
+            simulate_driver_comparison,
             input.base_frequency(),
             input.base_severity(),
             input.freq_multiplier(),
             input.severity_multiplier(),
             seed=seed,
-            return_fig=True,
-            good_driver_image=good_driver_image
+            good_driver_image=good_driver_image,
+            cohort_size=cohort_size()
         )
+        print(f"Driver Comparison using seed: {seed} (base: {base}, offset: {offset}, good driver: {good_driver}, "
+              f"cache: {simulation_cache.info()})")
+        return result
 
     @output
-    @render.plot
+    @render.ui
     def driver_comparison_plot():
-        fig, _ = driver_data()
-        return fig
+        return png_image(driver_data().png, "700px")
+
+    @reactive.Calc
+    def cohort_size():
+        return int(input.cohort_size())
+
+    # Exact annual loss distributions of each cohort at the slider parameters (Poisson counts, lognormal claims)
+    # None when the largest cohorts would need a bigger grid than the exact engine allows
+    @reactive.Calc
+    def cohort_distributions():
+        from modules.aggregate_loss import cohort_loss_distribution
+        from modules.driver_comparison import FIRST_COHORT_SIGMA, SECOND_COHORT_SIGMA
+
+        base_frequency = input.base_frequency()
+        base_severity = input.base_severity()
+        try:
+            return (
+                cached_call(cohort_loss_distribution, cohort_size(), base_frequency, base_severity,
+                            FIRST_COHORT_SIGMA),
+                cached_call(cohort_loss_distribution, cohort_size(), base_frequency * input.freq_multiplier(),
+                            base_severity * input.severity_multiplier(), SECOND_COHORT_SIGMA)
+            )
+        except ValueError:
+            return None
 
     @output
     @render.text
     def driver_comparison_interpretation():
-        _, stats = driver_data()
+        from modules.driver_comparison import SCATTER_MAX_DRIVERS
+
+        stats = driver_data().stats
+        distributions = cohort_distributions()
         good_driver = get_good_driver().capitalize()
         bad_driver = get_bad_driver_name()
 
@@ -923,9 +1238,128 @@ def server(input, output, session):
         text += f"• Expected Annual Cost - {second_cohort}: ${stats['bad_avg_frequency'] * stats['bad_avg_severity']:,.0f} per driver\n"
         text += f"• Overall Risk Difference: {second_cohort} generates {stats['loss_multiplier']:.1f}x more in expected losses\n\n"
 
+        # One simulated year of actual claims (Poisson counts x lognormal amounts) for the same drivers
+        claims = driver_data().claims.stats
+        text += "• Simulated Claims This Year (actual experience, not just profiles):\n"
+        for index, cohort in enumerate((first_cohort, second_cohort)):
+            text += f"  - {cohort}: {claims['num_claims'][index]:,} claims from {claims['percent_with_claim'][index]:.1f}% of drivers, "
+            text += f"${claims['total_losses'][index]:,.0f} in total (${claims['loss_per_driver'][index]:,.0f} per driver)\n"
+        text += "\n"
+
+        if distributions is not None:
+            first_distribution, second_distribution = distributions
+            text += f"• Exact Annual Cohort Losses ({cohort_size():,} drivers, no simulation noise):\n"
+            text += f"  - {first_cohort}: median ${first_distribution.stats['median']:,.0f}, 99th percentile ${first_distribution.stats['quantile_99']:,.0f}\n"
+            text += f"  - {second_cohort}: median ${second_distribution.stats['median']:,.0f}, 99th percentile ${second_distribution.stats['quantile_99']:,.0f}\n\n"
+
         text += "• Key Insight: The scatterplot illustrates why insurance companies segment drivers into risk cohorts.\n"
         text += "  Both frequency and claim amounts contribute to the overall cost differences between driver cohorts.\n"
-        text += "  Each dot represents an individual driver's risk profile, showing natural variation within cohorts."
+        if cohort_size() > SCATTER_MAX_DRIVERS:
+            text += "  Color intensity shows how many drivers share each risk profile, revealing the shape of each cohort."
+        else:
+            text += "  Each dot represents an individual driver's risk profile, showing natural variation within cohorts."
+
+        return text
+
+    # Sampling distribution - thousands of replications in batched (replications x drivers) draws
+    @reactive.Calc
+    def ensemble_data():
+        from modules.ensemble import simulate_ensemble, replications_for
+
+        seed, _, _ = driver_seed()
+        return cached_call(
+            simulate_ensemble,
+            input.base_frequency(),
+            input.base_severity(),
+            input.freq_multiplier(),
+            input.severity_multiplier(),
+            num_replications=replications_for(cohort_size()),
+            cohort_size=cohort_size(),
+            seed=seed
+        )
+
+    @output
+    @render.ui
+    def ensemble_section():
+        if not input.show_ensemble():
+            return None
+        return ui.TagList(
+            ui.div({"class": "plot-container"},
+                   ui.div({"class": "plot-title"}, "Sampling Distribution of the Cohort Multipliers"),
+                   png_image(ensemble_data().png, "500px")
+                   ),
+            ui.div({"class": "interpretation-box"},
+                   ui.tags.pre(ensemble_interpretation())
+                   )
+        )
+
+    def ensemble_interpretation():
+        stats = ensemble_data().stats
+        observed = driver_data().stats
+        second_cohort = f"{get_bad_driver_name()} Cohort"
+        level = f"{stats['confidence_level']:.0%}"
+        loss_lower, loss_upper = stats['loss_multiplier_ci']
+        freq_lower, freq_upper = stats['freq_multiplier_ci']
+
+        text = "Sampling Distribution Interpretation:\n"
+        text += f"• The driver comparison was repeated {stats['num_replications']:,} times with {stats['cohort_size']:,} drivers per cohort.\n"
+        text += f"• Loss Multiplier: mean {stats['loss_multiplier_mean']:.2f}x, {level} of replications between "
+        text += f"{loss_lower:.2f}x and {loss_upper:.2f}x (true value {stats['true_loss_multiplier']:.2f}x)\n"
+        text += f"• Frequency Multiplier: mean {stats['freq_multiplier_mean']:.2f}x, {level} of replications between "
+        text += f"{freq_lower:.2f}x and {freq_upper:.2f}x (true value {stats['true_freq_multiplier']:.2f}x)\n"
+        text += f"• The simulation above found {second_cohort} costs {observed['loss_multiplier']:.2f}x as much; "
+        if loss_lower <= observed['loss_multiplier'] <= loss_upper:
+            text += f"that is inside the {level} interval.\n\n"
+        else:
+            text += f"that is outside the {level} interval - an unusual draw.\n\n"
+        text += "• Key Insight: A single re-simulation shows one draw from these distributions. "
+        text += "Larger cohorts narrow the intervals, which is why insurers rate on large books of business."
+        return text
+
+    # Rating segments - every segment simulated in one vectorized call, stats by group reductions
+    @reactive.Calc
+    def segments_data():
+        from modules.cohorts import simulate_cohorts, rating_segments
+        from modules.driver_comparison import FIRST_COHORT_SIGMA, SECOND_COHORT_SIGMA
+
+        seed, _, _ = driver_seed()
+        base_frequency = input.base_frequency()
+        base_severity = input.base_severity()
+        segments = tuple(rating_segments(
+            input.num_segments(),
+            low_frequency=base_frequency,
+            high_frequency=base_frequency * input.freq_multiplier(),
+            low_severity=base_severity,
+            high_severity=base_severity * input.severity_multiplier(),
+            low_sigma=FIRST_COHORT_SIGMA,
+            high_sigma=SECOND_COHORT_SIGMA,
+            size=cohort_size()
+        ))
+        return cached_call(simulate_cohorts, segments, seed=seed)
+
+    @output
+    @render.ui
+    def rating_segments_plot():
+        return png_image(segments_data().png, "500px")
+
+    @output
+    @render.text
+    def rating_segments_interpretation():
+        from modules.cohorts import SEGMENT_DRIVER_BUDGET, segment_size
+
+        result = segments_data()
+        stats = result.stats
+
+        text = "Rating Segments Interpretation:\n"
+        size = segment_size(result.num_cohorts, cohort_size())
+        text += f"• {result.num_cohorts} segments of {size:,} drivers each span the range from the low-risk to the high-risk cohort.\n"
+        if size < cohort_size():
+            text += f"  (Segments are capped at {SEGMENT_DRIVER_BUDGET:,} drivers in total, so each has fewer than "
+            text += f"the {cohort_size():,} drivers per cohort above.)\n"
+        text += f"• Expected loss per driver ranges from ${stats['loss_per_driver'].min():,.0f} to ${stats['loss_per_driver'].max():,.0f} "
+        text += f"({stats['loss_relativity'].max():.1f}x the first segment).\n"
+        text += "• Key Insight: Finer segmentation lets each premium track its own segment's risk more closely, "
+        text += "instead of averaging very different drivers into one price."
 
         return text
 
@@ -938,26 +1372,28 @@ def server(input, output, session):
     @output
     @render.text
     def premium_good_freq_info():
-        _, stats = driver_data()
+        stats = driver_data().stats
         return f"{stats['good_avg_frequency']:.1%}"
 
     @output
     @render.text
     def premium_good_severity_info():
-        _, stats = driver_data()
+        stats = driver_data().stats
         return f"${stats['good_avg_severity']:,.0f}"
 
     @output
     @render.text
     def premium_bad_info():
-        _, stats = driver_data()
+        stats = driver_data().stats
         return f"Freq: {stats['bad_avg_frequency']:.1%}, Severity: ${stats['bad_avg_severity']:,.0f}"
 
     # Premium Calculation Module - Now uses values from driver comparison
     @reactive.Calc
     def premium_calc_data():
+        from modules.premium_calculation import calculate_premium
+
         # Get driver data from previous tab
-        _, driver_stats = driver_data()
+        driver_stats = driver_data().stats
 
         # Use the good and bad driver data from driver comparison
         good_freq = driver_stats['good_avg_frequency']
@@ -968,26 +1404,26 @@ def server(input, output, session):
         good_driver_image = f"{good_driver}.jpeg"
 
         # Pass values to premium calculation
-        return demonstrate_premium_calculation(
+        return cached_call(
+            calculate_premium,
             accident_frequency=good_freq,
             claim_severity=good_severity,
             bad_driver_freq=bad_freq,
             bad_driver_severity=bad_severity,
-            good_driver_image=good_driver_image,
-            return_fig=True
+            good_driver_image=good_driver_image
         )
 
     @output
-    @render.plot
+    @render.ui
     def premium_calc_plot():
-        fig, _ = premium_calc_data()
-        return fig
+        return png_image(premium_calc_data().png, "1200px")
 
     @output
     @render.text
     def premium_calc_interpretation():
-        _, stats = premium_calc_data()
-        _, driver_stats = driver_data()
+        result = premium_calc_data()
+        stats = result.stats
+        driver_stats = driver_data().stats
 
         good_freq = driver_stats['good_avg_frequency']
         good_severity = driver_stats['good_avg_severity']
@@ -1000,8 +1436,8 @@ def server(input, output, session):
         first_cohort = f"{good_driver} Cohort"
         second_cohort = f"{bad_driver} Cohort"
 
-        expense_ratio = 0.25
-        risk_margin_ratio = 0.05
+        expense_ratio = result.expense_ratio
+        risk_margin_ratio = result.risk_margin_ratio
 
         text = "Insurance Premium Comparison:\n"
         text += f"• {first_cohort}:\n"
@@ -1033,6 +1469,85 @@ def server(input, output, session):
 
         return text
 
+    # Premium surfaces around the first cohort's pricing point (two 1000 x 1000 broadcasted grids)
+    @reactive.Calc
+    def sensitivity_data():
+        from modules.premium_sensitivity import premium_sensitivity
+
+        driver_stats = driver_data().stats
+        return cached_call(
+            premium_sensitivity,
+            float(driver_stats['good_avg_frequency']),
+            float(driver_stats['good_avg_severity']),
+            input.sensitivity_expense_ratio(),
+            input.sensitivity_risk_margin()
+        )
+
+    @output
+    @render.ui
+    def premium_sensitivity_plot():
+        return png_image(sensitivity_data().png, "500px")
+
+    @output
+    @render.text
+    def premium_sensitivity_interpretation():
+        result = sensitivity_data()
+        stats = result.stats
+        first_cohort = f"{get_good_driver().capitalize()} Cohort"
+        low, high = stats['loading_surface_range']
+
+        text = f"Premium Sensitivity ({first_cohort}, {stats['num_points']:,} premiums evaluated):\n"
+        text += f"• With {result.expense_ratio:.0%} expenses and a {result.risk_margin_ratio:.0%} risk margin the premium is "
+        text += f"${stats['premium']:,.2f} ({stats['loading_factor']:.2f}x the ${stats['expected_loss']:,.2f} expected loss)\n"
+        text += f"• Each extra point of expense ratio or risk margin adds ${stats['premium_per_loading_point']:,.2f}\n"
+        text += f"• Each extra point of accident frequency adds ${stats['premium_per_frequency_point']:,.2f}; "
+        text += f"each extra $1,000 of claim severity adds ${stats['premium_per_1000_severity']:,.2f}\n"
+        text += f"• Across the loadings shown the same driver's premium ranges from ${low:,.2f} to ${high:,.2f}\n\n"
+        text += "• Key Insight: Loadings divide the expected loss, so each extra point costs more than the last. "
+        text += "Frequency and severity multiply, so the contours of equal premium are hyperbolas."
+
+        return text
+
+    # Multi-year claim histories of the driver comparison drivers (a sample of them above the history memory budget)
+    @reactive.Calc
+    def history_data():
+        from modules.claim_history import cohort_claim_history
+
+        seed, _, _ = driver_seed()
+        return cached_call(cohort_claim_history, driver_data().drivers.cohorts, num_years=input.history_years(),
+                           seed=seed)
+
+    @output
+    @render.ui
+    def claim_history_plot():
+        return png_image(history_data().png, "500px")
+
+    @output
+    @render.text
+    def claim_history_interpretation():
+        result = history_data()
+        stats = result.stats
+        premium_stats = premium_calc_data().stats
+        premiums = (premium_stats['premium'], premium_stats['premium_bad'])
+
+        text = f"Experience Rating Interpretation ({stats['num_years']} years, {stats['num_drivers']:,} drivers, "
+        text += f"{stats['num_claims']:,} claims in {stats['memory_mb']:.1f} MB):\n"
+        if result.sampled:
+            text += f"• {stats['population_drivers']:,} drivers' histories would exceed the memory budget, so an "
+            text += "equal random sample of each cohort is simulated.\n"
+        for cohort, name in enumerate(stats['names']):
+            text += f"• {name}: {stats['percent_claim_free'][cohort]:.0f}% of drivers were claim-free; "
+            text += f"their own experience gets {stats['credibility'][cohort]:.0%} credibility.\n"
+            text += f"  - A claim-free driver pays ${premiums[cohort] * stats['claim_free_factor'][cohort]:,.2f} "
+            text += f"instead of ${premiums[cohort]:,.2f}; with one claim the average is "
+            text += f"${premiums[cohort] * stats['one_claim_factor'][cohort]:,.2f}.\n"
+            text += f"  - 90% of experience-rated premiums fall between ${premiums[cohort] * stats['factor_p5'][cohort]:,.2f} "
+            text += f"and ${premiums[cohort] * stats['factor_p95'][cohort]:,.2f}.\n"
+        text += "• Key Insight: Credibility = years / (years + k) blends a driver's own record with the cohort rate. "
+        text += "A longer history earns more credibility, so individual experience moves the price further."
+
+        return text
+
     # Ethics Rating Module - Updated to replace gender with religion
     @reactive.Calc
     def calculate_ethics_grade():
@@ -1085,6 +1600,49 @@ def server(input, output, session):
 
         return score, feedback, correct, total
 
+    # Tariff over the accepted rating variables the user ticked, quoted on a synthetic book of policies
+    @reactive.Calc
+    def tariff_data():
+        from modules.tariff import RATING_FACTORS, build_tariff, quote_book
+
+        seed, _, _ = driver_seed()
+        driver_stats = driver_data().stats
+        selected = tuple(factor.name for factor in RATING_FACTORS if getattr(input, f"{factor.name}_rating")())
+        tariff = build_tariff(selected, float(driver_stats['good_avg_frequency']),
+                              float(driver_stats['good_avg_severity']))
+        return cached_call(quote_book, tariff, seed=seed)
+
+    @output
+    @render.ui
+    def tariff_plot():
+        return png_image(tariff_data().png, "500px")
+
+    @output
+    @render.text
+    def tariff_interpretation():
+        result = tariff_data()
+        stats = result.stats
+        first_cohort = f"{get_good_driver().capitalize()} Cohort"
+
+        text = "Tariff Interpretation:\n"
+        text += f"• Base premium ${stats['base_premium']:,.2f}: the {first_cohort}'s expected loss / "
+        text += f"(1 - {result.tariff.expense_ratio:.0%} - {result.tariff.risk_margin_ratio:.0%})\n"
+        if stats['factors']:
+            text += f"• Rating variables: {', '.join(stats['factors'])} ({stats['num_cells']:,} price cells, "
+            text += "each precomputed in a lookup table)\n"
+            text += f"• Across {stats['num_policies']:,} policies the premium ranges from ${stats['min_premium']:,.2f} "
+            text += f"to ${stats['max_premium']:,.2f}; 90% pay between ${stats['premium_p5']:,.2f} and ${stats['premium_p95']:,.2f}\n"
+            # Timed on every render, so a cached book still shows the current throughput
+            text += f"• Re-quoting the book just now ran at {result.quotes_per_second() / 1e6:,.0f} million "
+            text += "quotes per second\n\n"
+        else:
+            text += "• No accepted rating variables are ticked, so every policy pays the base premium\n\n"
+        text += "• Key Insight: Each rating variable multiplies the base rate by a relativity. "
+        text += "Only variables that predict risk and are fair to use (ticked above, excluding music taste, "
+        text += "religion and race) are priced."
+
+        return text
+
     # Display ethics grade output
     @output
     @render.ui
@@ -1121,4 +1679,8 @@ def server(input, output, session):
 
 
 # Create and run the app
-app = App(app_ui, server)
\ No newline at end of file
+app = App(app_ui, server)
+report_startup()
+# Decode the driver portraits once per worker so premium renders never touch the disk
+# (after the report, so the Pillow import and JPEG decoding are not counted as startup)
+preload_portraits()
@@ -0,0 +1,244 @@
+import numpy as np
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Callable
+
+from modules.risk_pooling import CLAIM_AMOUNT
+
+# Largest grid the exact engine will build (4M points, 32 MB of float64)
+MAX_GRID_POINTS = 2 ** 22
+
+# Default grid size when discretizing a continuous severity
+DEFAULT_GRID_POINTS = 2 ** 16
+
+# Finest resolution of a single claim: an average claim spans at least this many grid steps
+SEVERITY_BUCKETS = 16
+
+# The grid covers the mean aggregate loss plus this many standard deviations
+TAIL_STANDARD_DEVIATIONS = 12
+
+
+@dataclass(frozen=True)
+class CountModel:
+    """
+    Claim count distribution in the (a, b, 0) class
+
+    pgf evaluates the probability generating function (works on complex
+    arrays for the FFT method); a and b are the Panjer recursion constants.
+    """
+    name: str
+    mean: float
+    variance: float
+    a: float
+    b: float
+    pgf: Callable
+
+
+def poisson_count(mean_count):
+    """Poisson claim count with the given expected number of claims"""
+    return CountModel(
+        name='Poisson',
+        mean=mean_count,
+        variance=mean_count,
+        a=0.0,
+        b=mean_count,
+        pgf=lambda z: np.exp(mean_count * (z - 1))
+    )
+
+
+def binomial_count(num_exposures, probability):
+    """Binomial claim count: num_exposures independent risks with one claim each at most"""
+    return CountModel(
+        name='Binomial',
+        mean=num_exposures * probability,
+        variance=num_exposures * probability * (1 - probability),
+        a=-probability / (1 - probability),
+        b=(num_exposures + 1) * probability / (1 - probability),
+        pgf=lambda z: (1 - probability + probability * z) ** num_exposures
+    )
+
+
+@dataclass(frozen=True)
+class AggregateLossDistribution:
+    """
+    Exact distribution of total losses on a grid of step-dollar buckets
+
+    pmf[k] is the probability that total losses equal k * step (after
+    discretizing the severity), so probabilities and quantiles carry no
+    sampling noise.
+    """
+    step: float
+    pmf: np.ndarray
+    count_model: str
+    method: str
+
+    @property
+    def losses(self):
+        return np.arange(len(self.pmf)) * self.step
+
+    @cached_property
+    def cdf(self):
+        return np.minimum(np.cumsum(self.pmf), 1.0)
+
+    @property
+    def mean(self):
+        return float(np.dot(self.losses, self.pmf))
+
+    @property
+    def std(self):
+        return float(np.sqrt(np.dot((self.losses - self.mean) ** 2, self.pmf)))
+
+    def quantile(self, q):
+        """Smallest loss whose cumulative probability reaches q (q may be an array)"""
+        index = np.searchsorted(self.cdf, q)
+        return np.minimum(index, len(self.pmf) - 1) * self.step
+
+    def prob_exceeds(self, amount):
+        """Probability that total losses are strictly greater than amount"""
+        index = int(np.floor(amount / self.step + 1e-9))
+        if index >= len(self.pmf) - 1:
+            return 0.0
+        return float(max(1.0 - self.cdf[index], 0.0))
+
+    @cached_property
+    def stats(self):
+        """Key statistics of the aggregate loss distribution"""
+        p50, p95, p99, p995 = self.quantile([0.5, 0.95, 0.99, 0.995])
+        return {
+            'mean': self.mean,
+            'std': self.std,
+            'median': float(p50),
+            'quantile_95': float(p95),
+            'quantile_99': float(p99),
+            'quantile_995': float(p995),
+            'count_model': self.count_model,
+            'method': self.method
+        }
+
+
+def discretize_lognormal(mu, sigma, step, num_points):
+    """
+    Discretizes a lognormal severity onto multiples of step (rounding method)
+
+    Bucket k receives the probability of a claim in [(k - 0.5) * step, (k + 0.5) * step);
+    the tail beyond the grid is added to the last bucket so the pmf sums to 1.
+    """
+    # Imported on first use: the fixed-claim pool distribution never needs scipy
+    from scipy.special import ndtr
+
+    edges = (np.arange(num_points) + 0.5) * step
+    cdf = ndtr((np.log(edges) - mu) / sigma)
+    pmf = np.diff(cdf, prepend=0.0)
+    pmf[-1] += 1.0 - cdf[-1]
+    return pmf
+
+
+def _loss_span(count_model, severity_mean, severity_second_moment):
+    """Dollar range the aggregate loss grid has to cover (mean plus TAIL_STANDARD_DEVIATIONS)"""
+    aggregate_mean = count_model.mean * severity_mean
+    aggregate_variance = (count_model.mean * (severity_second_moment - severity_mean ** 2)
+                          + count_model.variance * severity_mean ** 2)
+    return aggregate_mean + TAIL_STANDARD_DEVIATIONS * np.sqrt(aggregate_variance)
+
+
+def _grid_size(count_model, severity_mean, severity_second_moment, step, min_points=0):
+    """Number of grid points needed to cover the aggregate loss tail"""
+    needed = _loss_span(count_model, severity_mean, severity_second_moment) / step
+    num_points = max(int(np.ceil(needed)) + 1, min_points, 16)
+    if num_points > MAX_GRID_POINTS:
+        raise ValueError(f"Aggregate loss grid would need {num_points:,} points (limit {MAX_GRID_POINTS:,}); "
+                         f"use a larger step or Monte Carlo for this portfolio size")
+    return num_points
+
+
+def _fft_method(count_model, severity_pmf, num_points):
+    # Pad to a power of two at least twice the support so the circular convolution does not wrap
+    fft_size = 1 << int(np.ceil(np.log2(2 * num_points)))
+    severity_transform = np.fft.rfft(severity_pmf, fft_size)
+    pmf = np.fft.irfft(count_model.pgf(severity_transform), fft_size)[:num_points]
+    # Remove tiny negative values from floating point round-off
+    return np.maximum(pmf, 0.0)
+
+
+def _panjer_method(count_model, severity_pmf, num_points):
+    # Panjer recursion for (a, b, 0) counts: g_k = sum_j (a + b j / k) f_j g_{k-j} / (1 - a f_0)
+    f = np.zeros(num_points)
+    f[:min(len(severity_pmf), num_points)] = severity_pmf[:num_points]
+    g = np.zeros(num_points)
+    g[0] = np.real(count_model.pgf(f[0]))
+    if g[0] == 0.0:
+        raise ValueError("Panjer recursion underflows for this portfolio size; use method='fft'")
+    j = np.arange(1, num_points)
+    denominator = 1 - count_model.a * f[0]
+    for k in range(1, num_points):
+        jk = j[:k]
+        g[k] = np.dot((count_model.a + count_model.b * jk / k) * f[1:k + 1], g[k - 1::-1][:k]) / denominator
+    return g
+
+
+def compound_loss_distribution(count_model, severity_pmf, step, num_points, method='fft'):
+    """
+    Aggregate loss distribution of a frequency x severity model
+
+    Parameters:
+    -----------
+    count_model : CountModel
+        Claim count distribution (poisson_count or binomial_count)
+    severity_pmf : numpy.ndarray
+        Probability of a single claim costing k * step
+    step : float
+        Dollar width of one grid bucket
+    num_points : int
+        Number of grid points of the aggregate distribution
+    method : str
+        'fft' (fast for any grid size) or 'panjer' (exact recursion, O(num_points^2))
+
+    Returns:
+    --------
+    distribution : AggregateLossDistribution
+        The aggregate loss pmf on the grid
+    """
+    if method == 'fft':
+        pmf = _fft_method(count_model, severity_pmf, num_points)
+    elif method == 'panjer':
+        pmf = _panjer_method(count_model, severity_pmf, num_points)
+    else:
+        raise ValueError(f"Unknown method: {method} (expected 'fft' or 'panjer')")
+
+    return AggregateLossDistribution(step=step, pmf=pmf, count_model=count_model.name, method=method)
+
+
+def pool_loss_distribution(accident_probability=0.05, num_policyholders=100, claim_amount=CLAIM_AMOUNT,
+                           method='fft'):
+    """
+    Exact total claims distribution of the risk pooling model
+
+    Each policyholder has at most one claim of a fixed amount, so the count is
+    Binomial(num_policyholders, accident_probability) and one grid step is one claim.
+    """
+    count_model = binomial_count(num_policyholders, accident_probability)
+    num_points = _grid_size(count_model, 1.0, 1.0, 1.0)
+    severity_pmf = np.array([0.0, 1.0])
+    return compound_loss_distribution(count_model, severity_pmf, claim_amount, num_points, method=method)
+
+
+def cohort_loss_distribution(num_drivers, frequency, severity, sigma, num_points=DEFAULT_GRID_POINTS,
+                             method='fft'):
+    """
+    Exact annual loss distribution of a driver cohort with lognormal claim amounts
+
+    Claims follow a Poisson count with mean num_drivers * frequency; each claim is
+    lognormal with mean severity and log-scale sigma (the driver comparison
+    parameterisation, mu = log(severity) - sigma^2 / 2).
+    """
+    count_model = poisson_count(num_drivers * frequency)
+    mu = np.log(severity) - 0.5 * sigma ** 2
+    second_moment = np.exp(2 * mu + 2 * sigma ** 2)
+
+    # Choose the step so the tail of the aggregate distribution fits in num_points buckets, but never
+    # coarser than SEVERITY_BUCKETS per average claim (large cohorts then need more points, up to MAX_GRID_POINTS)
+    step = max(min(_loss_span(count_model, severity, second_moment) / (num_points - 1), severity / SEVERITY_BUCKETS),
+               1.0)
+    grid_points = _grid_size(count_model, severity, second_moment, step, min_points=num_points)
+    severity_pmf = discretize_lognormal(mu, sigma, step, grid_points)
+    return compound_loss_distribution(count_model, severity_pmf, step, grid_points, method=method)
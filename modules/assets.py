@@ -0,0 +1,59 @@
+import os
+import threading
+import numpy as np
+
+# Bundled images live next to this file, so lookups do not depend on the working directory
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Driver portraits shown on the premium charts
+PORTRAITS = ("drake.jpeg", "kendrick.jpeg")
+
+# Displayed size of a portrait relative to the original (the former OffsetImage zoom)
+PORTRAIT_ZOOM = 0.40
+
+# Resolution the charts are encoded at (figure_to_png default); one point is 1/72 inch
+PORTRAIT_DPI = 100
+
+_portraits = {}
+_portraits_lock = threading.Lock()
+
+
+def _load_portrait(filename):
+    """Decodes a portrait and resamples it to its on-chart pixel size"""
+    # Pillow ships with matplotlib; imported here so it is only loaded with the first portrait
+    from PIL import Image
+
+    with Image.open(os.path.join(ASSET_DIR, filename)) as image:
+        image = image.convert("RGB")
+        # OffsetImage scales by zoom x dpi / 72, so the thumbnail is made at that size once
+        scale = PORTRAIT_ZOOM * PORTRAIT_DPI / 72
+        size = (max(round(image.width * scale), 1), max(round(image.height * scale), 1))
+        thumbnail = np.asarray(image.resize(size, Image.Resampling.LANCZOS))
+
+    thumbnail.flags.writeable = False
+    return thumbnail
+
+
+def portrait(filename):
+    """
+    Decoded, pre-scaled portrait as a read-only (height, width, 3) uint8 array
+
+    Each file is read and resampled once per process; later calls return the
+    same array. Draw it with OffsetImage(..., zoom=1, dpi_cor=False) so it is
+    placed pixel for pixel without further resampling.
+
+    Raises:
+    -------
+    FileNotFoundError
+        If the image is not in ASSET_DIR
+    """
+    with _portraits_lock:
+        if filename not in _portraits:
+            _portraits[filename] = _load_portrait(filename)
+        return _portraits[filename]
+
+
+def preload_portraits():
+    """Decodes every portrait up front (called once when the app starts)"""
+    for filename in PORTRAITS:
+        portrait(filename)
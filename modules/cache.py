@@ -0,0 +1,144 @@
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import is_dataclass
+
+import numpy as np
+
+# Memory budgets of the process-wide caches
+SIMULATION_CACHE_BYTES = 512 * 1024 ** 2
+DRAWS_CACHE_BYTES = 256 * 1024 ** 2
+
+
+def estimate_nbytes(value, _seen=None):
+    """
+    Approximate memory held by a cached value
+
+    Counts NumPy buffers and bytes found through dataclass fields, values of
+    their cached properties and containers. A view is charged for its whole
+    base array, once however many views share it; other objects count as 0.
+    """
+    seen = set() if _seen is None else _seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    if isinstance(value, np.ndarray):
+        base = value
+        while isinstance(base.base, np.ndarray):
+            base = base.base
+        if base is not value:
+            if id(base) in seen:
+                return 0
+            seen.add(id(base))
+        return base.nbytes
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(item, seen) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_nbytes(item, seen) for item in value)
+    if is_dataclass(value) and not isinstance(value, type):
+        # vars() also holds cached_property values computed since the last measurement
+        return sum(estimate_nbytes(item, seen) for item in vars(value).values())
+    return 0
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU cache with hit/miss counters
+
+    One instance is shared by every session in a worker process, so sessions
+    that land on the same slider positions reuse each other's results.
+    Besides the entry count, the cache can be bounded by memory: with
+    maxbytes set, entries are measured with estimate_nbytes and the least
+    recently used ones are evicted until the total fits. Sizes are re-measured
+    on every insert, so arrays a result computes lazily after being cached
+    (claims, PNG bytes) are counted too. The newest entry is always kept, even
+    when it alone is over budget, until the next insert.
+    """
+
+    def __init__(self, maxsize=256, maxbytes=None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        """
+        Returns the cached value for key, calling factory() to create it on a miss
+
+        factory runs outside the lock so a slow simulation never blocks other
+        sessions; if two sessions miss on the same key at once the first
+        stored value wins.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = factory()
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            if self.maxbytes is not None:
+                sizes = OrderedDict((k, estimate_nbytes(v)) for k, v in self._entries.items())
+                total = sum(sizes.values())
+                while total > self.maxbytes and len(self._entries) > 1:
+                    oldest, _ = self._entries.popitem(last=False)
+                    total -= sizes.pop(oldest)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Counters as a dict: hits, misses, size, maxsize, nbytes and maxbytes"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'nbytes': sum(estimate_nbytes(value) for value in self._entries.values()),
+                'maxbytes': self.maxbytes
+            }
+
+
+# Process-wide cache of simulation results. Results keep their raw arrays (drivers, claims, tariff codes),
+# which can reach hundreds of MB at the largest cohort sizes, so the cache is bounded by bytes as well
+simulation_cache = LRUCache(maxsize=256, maxbytes=SIMULATION_CACHE_BYTES)
+
+# Process-wide cache of standard normal draws per (seed, drivers), reused when only parameters change.
+# Each entry is 16 bytes per driver (32 MB for two cohorts of 1,000,000), bounded by bytes
+draws_cache = LRUCache(maxsize=8, maxbytes=DRAWS_CACHE_BYTES)
+
+
+def cached_call(func, *args, **kwargs):
+    """
+    Calls func(*args, **kwargs) through the process-wide simulation cache
+
+    The key is the (function, parameters, seed) tuple, so every argument must
+    be hashable and fully determine the result - pass seed, not a Generator.
+    """
+    key = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+    return simulation_cache.get_or_create(key, lambda: func(*args, **kwargs))
+
+
+def figure_to_png(fig, dpi=100):
+    """Encodes a matplotlib Figure as PNG bytes"""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi)
+    return buffer.getvalue()
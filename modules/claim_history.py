@@ -0,0 +1,342 @@
+import numpy as np
+from dataclasses import dataclass
+from functools import cached_property
+
+from modules.cache import figure_to_png
+from modules.cohorts import simulate_cohorts
+from modules.rng import claims_rng
+
+# Default length of a driver's claim history
+HISTORY_YEARS = 10
+
+# Drivers simulated per vectorized pass (bounds the temporary arrays of each pass)
+HISTORY_CHUNK_DRIVERS = 100_000
+
+# Largest history the engine will hold (1M drivers x 10 years needs about 30 MB); larger portfolios are sampled
+HISTORY_MEMORY_BUDGET = 64 * 2 ** 20
+
+# Claim counts shown separately on the experience chart; more claims are grouped in the last bar
+MAX_CLAIM_GROUP = 3
+
+
+@dataclass(frozen=True)
+class ClaimHistory:
+    """
+    Multi-year claim histories of every driver, stored as compact ragged arrays
+
+    claim_counts[i, t] is the number of claims of driver i in year t (uint8).
+    claim_amounts holds every claim as float32, ordered by driver and then by
+    year, so driver i's claims are claim_amounts[driver_offsets[i]:driver_offsets[i + 1]].
+    Per-driver annual loss sums and squared deviations from the driver's
+    mean (M2) are kept for experience rating; nothing is stored per
+    driver-year beyond the counts. When the portfolio is too large for
+    HISTORY_MEMORY_BUDGET only a sample of its population_drivers drivers
+    is held.
+    """
+    num_years: int
+    seed: int
+    cohort_names: tuple
+    population_drivers: int
+    cohort_ids: np.ndarray
+    claim_counts: np.ndarray
+    claim_amounts: np.ndarray
+    driver_losses: np.ndarray
+    driver_loss_m2: np.ndarray
+
+    @property
+    def num_drivers(self):
+        return len(self.cohort_ids)
+
+    @property
+    def num_cohorts(self):
+        return len(self.cohort_names)
+
+    @property
+    def sampled(self):
+        return self.num_drivers < self.population_drivers
+
+    @property
+    def nbytes(self):
+        """Memory held by the history arrays"""
+        return sum(array.nbytes for array in (self.cohort_ids, self.claim_counts, self.claim_amounts,
+                                              self.driver_losses, self.driver_loss_m2))
+
+    @cached_property
+    def driver_claim_counts(self):
+        """Total number of claims of each driver over the whole history"""
+        return self.claim_counts.sum(axis=1, dtype=np.int32)
+
+    @cached_property
+    def driver_offsets(self):
+        """Start of each driver's claims in claim_amounts (length num_drivers + 1)"""
+        offsets = np.zeros(self.num_drivers + 1, dtype=np.int64)
+        np.cumsum(self.driver_claim_counts, out=offsets[1:])
+        return offsets
+
+    def driver_history(self, index):
+        """Claims per year and the claim amounts of one driver"""
+        return self.claim_counts[index], self.claim_amounts[self.driver_offsets[index]:self.driver_offsets[index + 1]]
+
+    @cached_property
+    def credibility(self):
+        """
+        Empirical Buhlmann credibility of each cohort, as arrays indexed by cohort id
+
+        mean: the cohort's average annual loss per driver; process_variance: the
+        average year-to-year variance of a driver (EPV); hypothetical_variance:
+        the variance between drivers' true means (VHM); weight: the credibility
+        Z = T / (T + EPV / VHM) given to T years of a driver's own experience.
+        """
+        years = self.num_years
+        drivers = np.maximum(np.bincount(self.cohort_ids, minlength=self.num_cohorts), 1)
+        driver_means = self.driver_losses / years
+
+        mean = np.bincount(self.cohort_ids, weights=driver_means, minlength=self.num_cohorts) / drivers
+        if years > 1:
+            # Within-driver sample variance from the centred M2 (no cancellation against the mean)
+            driver_variances = self.driver_loss_m2 / (years - 1)
+            process_variance = np.bincount(self.cohort_ids, weights=driver_variances,
+                                           minlength=self.num_cohorts) / drivers
+        else:
+            process_variance = np.zeros(self.num_cohorts)
+        spread = np.bincount(self.cohort_ids, weights=(driver_means - mean[self.cohort_ids]) ** 2,
+                             minlength=self.num_cohorts) / np.maximum(drivers - 1, 1)
+        hypothetical_variance = np.maximum(spread - process_variance / years, 0.0)
+
+        # No measurable difference between drivers (or a single year of one driver) gives no credibility
+        weight = np.divide(years * hypothetical_variance, years * hypothetical_variance + process_variance,
+                           out=np.zeros(self.num_cohorts), where=hypothetical_variance > 0)
+        return {
+            'mean': mean,
+            'process_variance': process_variance,
+            'hypothetical_variance': hypothetical_variance,
+            'weight': weight
+        }
+
+    @cached_property
+    def experience_factors(self):
+        """Each driver's experience-rated premium relative to the cohort rate (1.0 = no change)"""
+        credibility = self.credibility
+        mean = credibility['mean'][self.cohort_ids]
+        weight = credibility['weight'][self.cohort_ids]
+        driver_means = self.driver_losses / self.num_years
+        factors = np.divide(weight * driver_means + (1 - weight) * mean, mean, out=np.ones(self.num_drivers),
+                            where=mean > 0)
+        return factors.astype(np.float32)
+
+    def factor_by_claim_count(self):
+        """Average experience factor by claims in the history (0 .. MAX_CLAIM_GROUP+), shape (cohorts, groups)"""
+        groups = np.minimum(self.driver_claim_counts, MAX_CLAIM_GROUP)
+        keys = self.cohort_ids.astype(np.int64) * (MAX_CLAIM_GROUP + 1) + groups
+        size = self.num_cohorts * (MAX_CLAIM_GROUP + 1)
+        totals = np.bincount(keys, weights=self.experience_factors, minlength=size)
+        counts = np.bincount(keys, minlength=size)
+        averages = np.divide(totals, counts, out=np.full(size, np.nan), where=counts > 0)
+        return averages.reshape(self.num_cohorts, MAX_CLAIM_GROUP + 1)
+
+    @cached_property
+    def stats(self):
+        """Per-cohort experience rating statistics as arrays indexed by cohort id"""
+        drivers = np.maximum(np.bincount(self.cohort_ids, minlength=self.num_cohorts), 1)
+        claim_free = np.bincount(self.cohort_ids, weights=self.driver_claim_counts == 0,
+                                 minlength=self.num_cohorts)
+        by_claims = self.factor_by_claim_count()
+        factors = self.experience_factors
+        order = np.argsort(self.cohort_ids, kind='stable')
+        bounds = np.searchsorted(self.cohort_ids[order], np.arange(self.num_cohorts + 1))
+        quantiles = np.array([
+            np.quantile(factors[order[start:stop]], [0.05, 0.95]) if stop > start else [np.nan, np.nan]
+            for start, stop in zip(bounds[:-1], bounds[1:])
+        ])
+        return {
+            'names': list(self.cohort_names),
+            'num_years': self.num_years,
+            'num_drivers': self.num_drivers,
+            'population_drivers': self.population_drivers,
+            'num_claims': len(self.claim_amounts),
+            'percent_claim_free': claim_free / drivers * 100,
+            'credibility': self.credibility['weight'],
+            'claim_free_factor': by_claims[:, 0],
+            'one_claim_factor': by_claims[:, 1],
+            'factor_p5': quantiles[:, 0],
+            'factor_p95': quantiles[:, 1],
+            'memory_mb': self.nbytes / 2 ** 20
+        }
+
+    @cached_property
+    def figure(self):
+        """The experience rating chart, built on first access"""
+        return render_claim_history(self)
+
+    @cached_property
+    def png(self):
+        """The experience rating chart encoded as PNG bytes (the Figure itself is not kept)"""
+        return figure_to_png(render_claim_history(self))
+
+
+def estimate_history_bytes(num_drivers, num_years, expected_claims):
+    """Memory a ClaimHistory of this size will hold (counts, claims, per-driver sums and cohort ids)"""
+    return num_drivers * num_years + 4 * expected_claims + num_drivers * (8 + 8 + 4)
+
+
+def simulate_claim_history(drivers, num_years=HISTORY_YEARS, seed=42, rng=None):
+    """
+    Simulates num_years of claims for every driver of a cohort simulation
+
+    Drivers are processed in blocks of HISTORY_CHUNK_DRIVERS: each block draws
+    its (drivers x years) Poisson counts and all of its claim amounts in single
+    vectorized calls, then reduces them to per-driver sums with np.add.reduceat,
+    so temporaries stay bounded whatever the portfolio size. If the history
+    would exceed HISTORY_MEMORY_BUDGET, the same number of drivers is taken
+    from the start of every cohort (see CohortSimulation.head) so it fits.
+
+    Parameters:
+    -----------
+    drivers : CohortSimulation
+        Driver profiles (frequencies, severities, cohorts) from simulate_cohorts
+    num_years : int
+        Number of years of history
+    seed : int
+        Random seed for reproducibility
+    rng : numpy.random.Generator
+        Generator for the claims; defaults to the claims stream of seed
+
+    Returns:
+    --------
+    result : ClaimHistory
+        Ragged claim histories and per-driver loss sums
+    """
+    # Use a private Generator instead of the global NumPy state
+    if rng is None:
+        rng = claims_rng(seed)
+
+    population_drivers = len(drivers.frequencies)
+    estimated = estimate_history_bytes(population_drivers, num_years,
+                                       float(np.sum(drivers.frequencies)) * num_years)
+    if estimated > HISTORY_MEMORY_BUDGET:
+        # The estimate is linear in drivers, so the budget buys this many at the portfolio's average size
+        affordable = HISTORY_MEMORY_BUDGET * population_drivers / estimated
+        drivers = drivers.head(max(int(affordable // drivers.num_cohorts), 1))
+
+    num_drivers = len(drivers.frequencies)
+
+    sigmas = np.array([cohort.severity_sigma for cohort in drivers.cohorts])
+    claim_counts = np.empty((num_drivers, num_years), dtype=np.uint8)
+    driver_losses = np.zeros(num_drivers)
+    driver_loss_m2 = np.zeros(num_drivers)
+    amount_blocks = []
+
+    for start in range(0, num_drivers, HISTORY_CHUNK_DRIVERS):
+        stop = min(start + HISTORY_CHUNK_DRIVERS, num_drivers)
+        frequencies = drivers.frequencies[start:stop]
+        counts = rng.poisson(frequencies[:, None], (stop - start, num_years))
+        # A driver-year never has more than a handful of claims at these frequencies; uint8 keeps it compact
+        claim_counts[start:stop] = np.minimum(counts, np.iinfo(np.uint8).max)
+        counts = claim_counts[start:stop].ravel()
+
+        # One row per claim: the driver-year (row-major, so driver then year) that made it
+        claim_cells = np.repeat(np.arange(len(counts)), counts)
+        claim_drivers = start + claim_cells // num_years
+        sigma = sigmas[drivers.cohort_ids[claim_drivers]]
+        mu = np.log(drivers.severities[claim_drivers]) - 0.5 * sigma ** 2
+        amounts = rng.lognormal(mu, sigma)
+        amount_blocks.append(amounts.astype(np.float32))
+
+        # Annual losses of each driver-year, then per-driver sums and squared deviations from the driver mean
+        annual = np.zeros(len(counts))
+        has_claims = counts > 0
+        if len(amounts):
+            cell_offsets = np.cumsum(counts, dtype=np.int64) - counts
+            annual[has_claims] = np.add.reduceat(amounts, cell_offsets[has_claims])
+        annual = annual.reshape(stop - start, num_years)
+        driver_losses[start:stop] = annual.sum(axis=1)
+        driver_loss_m2[start:stop] = ((annual - annual.mean(axis=1, keepdims=True)) ** 2).sum(axis=1)
+
+    return ClaimHistory(
+        num_years=num_years,
+        seed=seed,
+        cohort_names=tuple(drivers.names),
+        population_drivers=population_drivers,
+        cohort_ids=drivers.cohort_ids,
+        claim_counts=claim_counts,
+        claim_amounts=np.concatenate(amount_blocks) if amount_blocks else np.empty(0, dtype=np.float32),
+        driver_losses=driver_losses,
+        driver_loss_m2=driver_loss_m2
+    )
+
+
+def cohort_claim_history(cohorts, num_years=HISTORY_YEARS, seed=42):
+    """
+    Claim histories of the drivers simulate_cohorts(cohorts, seed) gives
+
+    Takes only hashable arguments (a tuple of CohortDefinition), so the
+    history can go through cached_call; the drivers come from the shared
+    draws cache and match the driver comparison of the same seed.
+    """
+    return simulate_claim_history(simulate_cohorts(cohorts, seed=seed), num_years=num_years, seed=seed)
+
+
+def render_claim_history(result, colors=('green', 'red')):
+    """
+    Draws how a driver's own claim history moves their price
+
+    Parameters:
+    -----------
+    result : ClaimHistory
+        Output of simulate_claim_history
+    colors : sequence of str
+        One colour per cohort (cycled if there are more cohorts)
+
+    Returns:
+    --------
+    fig : matplotlib.figure.Figure
+        The figure object
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    stats = result.stats
+    factors = result.experience_factors
+    by_claims = result.factor_by_claim_count()
+
+    fig = Figure(figsize=(14, 6))
+    ax1 = fig.add_subplot(121)
+    ax2 = fig.add_subplot(122)
+
+    # Plot 1: Distribution of experience-rated prices relative to the cohort rate
+    upper = max(float(np.quantile(factors, 0.995)), 1.5)
+    bins = np.linspace(0, upper, 60)
+    for cohort, name in enumerate(stats['names']):
+        counts, _ = np.histogram(factors[result.cohort_ids == cohort], bins=bins)
+        ax1.stairs(counts / max(counts.sum(), 1), bins, fill=True, alpha=0.5, color=colors[cohort % len(colors)],
+                   label=f"{name} (credibility {stats['credibility'][cohort]:.0%})")
+    ax1.axvline(1.0, color='#2C3E50', linestyle='--', alpha=0.7)
+    ax1.set_xlabel('Experience-Rated Premium / Cohort Premium')
+    ax1.set_ylabel('Share of Drivers')
+    num_drivers = f'{result.num_drivers:,}'
+    if result.sampled:
+        num_drivers = f'a sample of {result.num_drivers:,} of {result.population_drivers:,}'
+    ax1.set_title(f'Prices after {result.num_years} Years of Claim History ({num_drivers} drivers)')
+    ax1.yaxis.set_major_formatter(FuncFormatter(lambda x, _: '{:.0%}'.format(x)))
+    ax1.grid(True, alpha=0.3)
+    ax1.legend(loc='upper right')
+
+    # Plot 2: Average price change by number of claims in the history
+    groups = np.arange(MAX_CLAIM_GROUP + 1)
+    width = 0.8 / result.num_cohorts
+    for cohort, name in enumerate(stats['names']):
+        ax2.bar(groups + (cohort - (result.num_cohorts - 1) / 2) * width, by_claims[cohort] - 1, width,
+                color=colors[cohort % len(colors)], alpha=0.7, label=name)
+    ax2.axhline(0, color='#2C3E50', linewidth=1)
+    ax2.set_xticks(groups)
+    ax2.set_xticklabels([str(g) for g in groups[:-1]] + [f'{MAX_CLAIM_GROUP}+'])
+    ax2.set_xlabel(f'Claims in {result.num_years} Years')
+    ax2.set_ylabel('Average Price Change vs Cohort Premium')
+    ax2.set_title('How Individual Experience Moves the Price')
+    ax2.yaxis.set_major_formatter(FuncFormatter(lambda x, _: '{:+.0%}'.format(x)))
+    ax2.grid(axis='y', alpha=0.3)
+    ax2.legend(loc='upper left')
+
+    fig.subplots_adjust(left=0.08, right=0.95, top=0.9, bottom=0.12, wspace=0.3)
+
+    return fig
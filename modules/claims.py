@@ -0,0 +1,134 @@
+import numpy as np
+from dataclasses import dataclass
+from functools import cached_property
+
+from modules.rng import claims_rng
+
+
+@dataclass(frozen=True)
+class ClaimsSimulation:
+    """
+    One year of simulated claims for every driver, in a CSR (ragged) layout
+
+    Driver i's claims are claim_amounts[offsets[i]:offsets[i + 1]], so a
+    portfolio of 10^7 drivers is three flat arrays rather than a Python
+    object per claim.
+
+    Attributes:
+    -----------
+    cohort_ids : numpy.ndarray
+        Cohort of each driver (from the driver simulation)
+    claim_counts : numpy.ndarray
+        Number of claims of each driver
+    offsets : numpy.ndarray
+        Start of each driver's claims in claim_amounts (length num_drivers + 1)
+    claim_amounts : numpy.ndarray
+        Amount of every claim, grouped by driver
+    num_cohorts : int
+        Number of cohorts in cohort_ids
+    """
+    cohort_ids: np.ndarray
+    claim_counts: np.ndarray
+    offsets: np.ndarray
+    claim_amounts: np.ndarray
+    num_cohorts: int
+
+    @property
+    def num_drivers(self):
+        return len(self.claim_counts)
+
+    @property
+    def num_claims(self):
+        return len(self.claim_amounts)
+
+    def driver_claims(self, index):
+        """Claim amounts of one driver"""
+        return self.claim_amounts[self.offsets[index]:self.offsets[index + 1]]
+
+    @cached_property
+    def driver_totals(self):
+        """Total claims of each driver (np.add.reduceat over the CSR segments)"""
+        totals = np.zeros(self.num_drivers)
+        # reduceat returns the element at the start index for an empty segment, so only sum drivers with claims
+        has_claims = self.claim_counts > 0
+        if self.num_claims:
+            totals[has_claims] = np.add.reduceat(self.claim_amounts, self.offsets[:-1][has_claims])
+        return totals
+
+    @cached_property
+    def stats(self):
+        """Per-cohort claim experience as arrays indexed by cohort id"""
+        drivers = np.bincount(self.cohort_ids, minlength=self.num_cohorts)
+        claims = np.bincount(self.cohort_ids, weights=self.claim_counts, minlength=self.num_cohorts)
+        losses = np.bincount(self.cohort_ids, weights=self.driver_totals, minlength=self.num_cohorts)
+        with_claim = np.bincount(self.cohort_ids, weights=self.claim_counts > 0, minlength=self.num_cohorts)
+        return {
+            'num_drivers': drivers,
+            'num_claims': claims.astype(np.int64),
+            'claim_frequency': claims / np.maximum(drivers, 1),
+            'avg_claim_amount': np.divide(losses, claims, out=np.zeros(self.num_cohorts), where=claims > 0),
+            'total_losses': losses,
+            'loss_per_driver': losses / np.maximum(drivers, 1),
+            'percent_with_claim': with_claim / np.maximum(drivers, 1) * 100
+        }
+
+
+def simulate_claims(frequencies, severities, severity_sigmas, cohort_ids=None, num_cohorts=None, seed=42, rng=None):
+    """
+    Simulates one year of claims: Poisson counts x lognormal claim amounts
+
+    Each driver has Poisson(frequency) claims. All claims are drawn in one
+    lognormal call with mean equal to the driver's own severity, after
+    repeating the driver parameters once per claim with np.repeat.
+
+    Parameters:
+    -----------
+    frequencies : numpy.ndarray
+        Expected number of claims per year of each driver
+    severities : numpy.ndarray
+        Expected claim amount of each driver
+    severity_sigmas : float or numpy.ndarray
+        Lognormal sigma of claim amounts (one value, or one per cohort)
+    cohort_ids : numpy.ndarray
+        Cohort of each driver (defaults to a single cohort)
+    num_cohorts : int
+        Number of cohorts (defaults to max(cohort_ids) + 1)
+    seed : int
+        Random seed for reproducibility
+    rng : numpy.random.Generator
+        Generator for the claims; defaults to the claims stream of seed
+
+    Returns:
+    --------
+    result : ClaimsSimulation
+        Claim counts, offsets and flat claim amounts
+    """
+    # Use a private Generator instead of the global NumPy state
+    if rng is None:
+        rng = claims_rng(seed)
+
+    if cohort_ids is None:
+        cohort_ids = np.zeros(len(frequencies), dtype=np.int32)
+    if num_cohorts is None:
+        num_cohorts = int(cohort_ids.max()) + 1 if len(cohort_ids) else 0
+
+    claim_counts = rng.poisson(frequencies).astype(np.int32)
+    offsets = np.zeros(len(claim_counts) + 1, dtype=np.int64)
+    np.cumsum(claim_counts, out=offsets[1:])
+
+    # One row per claim: the index of the driver who made it
+    claim_drivers = np.repeat(np.arange(len(claim_counts)), claim_counts)
+    sigma = np.asarray(severity_sigmas, dtype=float)
+    if sigma.ndim:
+        # Per-cohort sigmas are looked up through the claim's driver
+        sigma = sigma[cohort_ids[claim_drivers]]
+    mu = np.log(severities[claim_drivers]) - 0.5 * sigma ** 2
+    claim_amounts = rng.lognormal(mu, sigma)
+
+    return ClaimsSimulation(
+        cohort_ids=cohort_ids,
+        claim_counts=claim_counts,
+        offsets=offsets,
+        claim_amounts=claim_amounts,
+        num_cohorts=num_cohorts
+    )
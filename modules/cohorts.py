@@ -0,0 +1,323 @@
+import numpy as np
+from dataclasses import dataclass
+from functools import cached_property
+
+from modules.cache import draws_cache, figure_to_png
+from modules.claims import simulate_claims
+from modules.rng import data_rng
+
+# Standard deviation of driver frequencies within a cohort, as a fraction of the cohort frequency
+FREQUENCY_SD_RATIO = 0.3
+
+# Floor on a simulated driver frequency (0.1%)
+MIN_FREQUENCY = 0.001
+
+# Segments with more cohorts than this are labelled by index only on the charts
+MAX_LABELLED_COHORTS = 12
+
+# Total drivers simulated across all rating segments (the two 1,000,000-driver cohorts of the driver comparison)
+SEGMENT_DRIVER_BUDGET = 2_000_000
+
+
+@dataclass(frozen=True)
+class CohortDefinition:
+    """
+    One rating segment: drivers share an expected frequency and severity
+
+    Attributes:
+    -----------
+    name : str
+        Label shown on charts
+    frequency : float
+        Expected accident frequency (probability per year)
+    severity : float
+        Expected claim amount
+    severity_sigma : float
+        Lognormal sigma of claim amounts (higher = more variable claims)
+    size : int
+        Number of drivers in the cohort
+    frequency_sd_ratio : float
+        Standard deviation of driver frequencies as a fraction of frequency
+    """
+    name: str
+    frequency: float
+    severity: float
+    severity_sigma: float
+    size: int
+    frequency_sd_ratio: float = FREQUENCY_SD_RATIO
+
+
+@dataclass(frozen=True)
+class CohortSimulation:
+    """
+    Simulated drivers of any number of cohorts, stored as one column block
+
+    Every driver is a row of (cohort_ids, frequencies, severities); rows are
+    grouped by cohort in definition order, so cohort k is the slice
+    offsets[k]:offsets[k + 1]. Per-cohort statistics are group reductions
+    over cohort_ids (np.bincount), with no Python loop over cohorts.
+    """
+    cohorts: tuple
+    seed: int
+    cohort_ids: np.ndarray
+    frequencies: np.ndarray
+    severities: np.ndarray
+
+    @property
+    def num_cohorts(self):
+        return len(self.cohorts)
+
+    @property
+    def names(self):
+        return [cohort.name for cohort in self.cohorts]
+
+    @cached_property
+    def sizes(self):
+        return np.bincount(self.cohort_ids, minlength=self.num_cohorts)
+
+    @cached_property
+    def offsets(self):
+        return np.concatenate([[0], np.cumsum(self.sizes)])
+
+    def cohort_slice(self, index):
+        """Rows of cohort index in the column block"""
+        return slice(self.offsets[index], self.offsets[index + 1])
+
+    def head(self, drivers_per_cohort):
+        """The first drivers_per_cohort drivers of every cohort (a random sample, as drivers are independent draws)"""
+        index = np.concatenate([np.arange(self.offsets[k], min(self.offsets[k] + drivers_per_cohort,
+                                                              self.offsets[k + 1]), dtype=np.int64)
+                                for k in range(self.num_cohorts)])
+        return CohortSimulation(
+            cohorts=self.cohorts,
+            seed=self.seed,
+            cohort_ids=self.cohort_ids[index],
+            frequencies=self.frequencies[index],
+            severities=self.severities[index]
+        )
+
+    def group_mean(self, values):
+        """Mean of values (one per driver) within each cohort"""
+        return np.bincount(self.cohort_ids, weights=values, minlength=self.num_cohorts) / np.maximum(self.sizes, 1)
+
+    @cached_property
+    def stats(self):
+        """Per-cohort statistics as arrays indexed by cohort id"""
+        avg_frequency = self.group_mean(self.frequencies)
+        avg_severity = self.group_mean(self.severities)
+        total_losses = avg_frequency * avg_severity * self.sizes
+        loss_per_driver = avg_frequency * avg_severity
+        return {
+            'names': self.names,
+            'sizes': self.sizes,
+            'avg_frequency': avg_frequency,
+            'avg_severity': avg_severity,
+            'total_losses': total_losses,
+            'loss_per_driver': loss_per_driver,
+            # Relative to the first cohort, like loss_multiplier in the driver comparison
+            'loss_relativity': loss_per_driver / loss_per_driver[0],
+            'seed': self.seed
+        }
+
+    @cached_property
+    def claims(self):
+        """One year of simulated claims for these drivers (ClaimsSimulation), drawn on first access"""
+        return simulate_claims(self.frequencies, self.severities,
+                               np.array([cohort.severity_sigma for cohort in self.cohorts]),
+                               cohort_ids=self.cohort_ids, num_cohorts=self.num_cohorts, seed=self.seed)
+
+    @cached_property
+    def figure(self):
+        """The cohort comparison chart, built on first access"""
+        return render_cohorts(self)
+
+    @cached_property
+    def png(self):
+        """The cohort comparison chart encoded as PNG bytes (the Figure itself is not kept)"""
+        return figure_to_png(render_cohorts(self))
+
+
+def standard_normal_draws(num_drivers, seed=42, rng=None):
+    """
+    Standard normal variates behind the frequencies and severities of num_drivers drivers
+
+    rng.normal(loc, scale) is loc + scale * z and rng.lognormal(mu, sigma)
+    is exp(mu + sigma * z), so these draws fully determine a simulation.
+    Without an rng they are drawn once per (seed, num_drivers) and kept in
+    draws_cache as read-only arrays; new cohort parameters then only cost an
+    affine transform (common random numbers).
+
+    Returns:
+    --------
+    z_frequency, z_severity : numpy.ndarray
+        One standard normal per driver for each measure
+    """
+    if rng is not None:
+        return rng.standard_normal(num_drivers), rng.standard_normal(num_drivers)
+
+    def draw():
+        # Same draws, in the same order, as the data stream of seed would give
+        data = data_rng(seed)
+        z_frequency = data.standard_normal(num_drivers)
+        z_severity = data.standard_normal(num_drivers)
+        z_frequency.flags.writeable = False
+        z_severity.flags.writeable = False
+        return z_frequency, z_severity
+
+    return draws_cache.get_or_create((seed, num_drivers), draw)
+
+
+def driver_profiles(z_frequency, z_severity, frequency, severity, severity_sigma,
+                    frequency_sd_ratio=FREQUENCY_SD_RATIO, cohort_ids=None):
+    """
+    Frequencies and severities of drivers from their standard normal draws
+
+    The driver model shared by every simulation: a driver's frequency is
+    normal around the cohort frequency (floored at MIN_FREQUENCY) and their
+    severity is lognormal with the cohort severity as its mean. Cohort
+    parameters are scalars or per-cohort arrays; with cohort_ids they are
+    looked up per driver, otherwise they broadcast against the draws.
+
+    Returns:
+    --------
+    frequencies, severities : numpy.ndarray
+        One value per draw for each measure
+    """
+    # Calculate mu so that the mean of the lognormal is the cohort severity
+    mu = np.log(severity) - 0.5 * np.square(severity_sigma)
+    scale = np.multiply(frequency, frequency_sd_ratio)
+    if cohort_ids is not None:
+        frequency, scale = np.asarray(frequency)[cohort_ids], scale[cohort_ids]
+        mu, severity_sigma = mu[cohort_ids], np.asarray(severity_sigma)[cohort_ids]
+
+    frequencies = np.maximum(frequency + scale * z_frequency, MIN_FREQUENCY)
+    severities = np.exp(mu + severity_sigma * z_severity)
+    return frequencies, severities
+
+
+def simulate_cohorts(cohorts, seed=42, rng=None):
+    """
+    Simulates the drivers of every cohort in one vectorized call
+
+    Cohort parameters are repeated to one row per driver and applied to one
+    block of standard normal draws (see standard_normal_draws), whatever the
+    number of cohorts. For a given seed and cohort sizes the draws are reused,
+    so changing only frequencies or severities moves each driver smoothly
+    instead of drawing a new population. Draws are in cohort order, so the
+    two-cohort case reproduces the driver comparison exactly.
+
+    Parameters:
+    -----------
+    cohorts : sequence of CohortDefinition
+        Rating segments to simulate
+    seed : int
+        Random seed for reproducibility
+    rng : numpy.random.Generator
+        Generator for fresh (uncached) draws; defaults to the cached draws of seed's data stream
+
+    Returns:
+    --------
+    result : CohortSimulation
+        Column block of all simulated drivers
+    """
+    cohorts = tuple(cohorts)
+    sizes = np.array([cohort.size for cohort in cohorts], dtype=np.int64)
+    frequency = np.array([cohort.frequency for cohort in cohorts])
+    severity = np.array([cohort.severity for cohort in cohorts])
+    sigma = np.array([cohort.severity_sigma for cohort in cohorts])
+    sd_ratio = np.array([cohort.frequency_sd_ratio for cohort in cohorts])
+
+    cohort_ids = np.repeat(np.arange(len(cohorts), dtype=np.int32), sizes)
+    z_frequency, z_severity = standard_normal_draws(len(cohort_ids), seed=seed, rng=rng)
+    frequencies, severities = driver_profiles(z_frequency, z_severity, frequency, severity, sigma,
+                                              frequency_sd_ratio=sd_ratio, cohort_ids=cohort_ids)
+
+    return CohortSimulation(
+        cohorts=cohorts,
+        seed=seed,
+        cohort_ids=cohort_ids,
+        frequencies=frequencies,
+        severities=severities
+    )
+
+
+def segment_size(num_segments, size):
+    """Drivers per segment: size, capped so num_segments segments stay within SEGMENT_DRIVER_BUDGET"""
+    return max(1, min(size, SEGMENT_DRIVER_BUDGET // max(num_segments, 1)))
+
+
+def rating_segments(num_segments, low_frequency=0.03, high_frequency=0.15, low_severity=5000, high_severity=10000,
+                    low_sigma=0.4, high_sigma=0.6, size=200):
+    """
+    Evenly spaced rating segments from the lowest to the highest risk
+
+    Frequencies and severities are spaced geometrically (like multiplicative
+    rating factors), severity sigmas linearly. Each segment gets size drivers,
+    capped so that all segments together stay within SEGMENT_DRIVER_BUDGET.
+    """
+    size = segment_size(num_segments, size)
+    frequencies = np.geomspace(low_frequency, high_frequency, num_segments)
+    severities = np.geomspace(low_severity, high_severity, num_segments)
+    sigmas = np.linspace(low_sigma, high_sigma, num_segments)
+    return [
+        CohortDefinition(f"Segment {i + 1}", float(frequency), float(severity), float(sigma), size)
+        for i, (frequency, severity, sigma) in enumerate(zip(frequencies, severities, sigmas))
+    ]
+
+
+def render_cohorts(result):
+    """
+    Draws every cohort's average risk profile and its expected loss per driver
+
+    Parameters:
+    -----------
+    result : CohortSimulation
+        Output of simulate_cohorts
+
+    Returns:
+    --------
+    fig : matplotlib.figure.Figure
+        The figure object
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    stats = result.stats
+    positions = np.arange(result.num_cohorts)
+    labelled = result.num_cohorts <= MAX_LABELLED_COHORTS
+
+    fig = Figure(figsize=(14, 6))
+    ax1 = fig.add_subplot(121)
+    ax2 = fig.add_subplot(122)
+
+    # Plot 1: Cohort averages, coloured by expected loss per driver
+    points = ax1.scatter(stats['avg_frequency'], stats['avg_severity'], c=stats['loss_per_driver'], cmap='RdYlGn_r',
+                         s=80, edgecolors='black', linewidths=0.5)
+    if labelled:
+        for name, x, y in zip(stats['names'], stats['avg_frequency'], stats['avg_severity']):
+            ax1.annotate(name, (x, y), textcoords='offset points', xytext=(6, 6), fontsize=9)
+        ax1.margins(0.15)
+    colorbar = fig.colorbar(points, ax=ax1)
+    colorbar.set_label('Expected Loss per Driver ($)')
+    ax1.set_xlabel('Avg Accident Frequency')
+    ax1.set_ylabel('Avg Claim Amount ($)')
+    ax1.set_title(f'Risk Profiles of {result.num_cohorts} Cohorts ({int(stats["sizes"].sum()):,} drivers)')
+    ax1.xaxis.set_major_formatter(FuncFormatter(lambda x, _: '{:.0%}'.format(x)))
+    ax1.yaxis.set_major_formatter(FuncFormatter(lambda x, _: '${:,.0f}'.format(x)))
+    ax1.grid(True, alpha=0.3)
+
+    # Plot 2: Expected loss per driver by cohort
+    ax2.bar(positions, stats['loss_per_driver'], color='#3498DB', alpha=0.8)
+    ax2.set_xticks(positions if labelled else positions[::max(result.num_cohorts // 10, 1)])
+    if labelled:
+        ax2.set_xticklabels(stats['names'], rotation=45, ha='right')
+    else:
+        ax2.set_xlabel('Cohort')
+    ax2.set_ylabel('Expected Loss per Driver ($)')
+    ax2.set_title(f'Highest Cohort Costs {stats["loss_relativity"].max():.1f}x the First')
+    ax2.yaxis.set_major_formatter(FuncFormatter(lambda x, _: '${:,.0f}'.format(x)))
+    ax2.grid(axis='y', alpha=0.3)
+
+    fig.subplots_adjust(left=0.08, right=0.97, top=0.9, bottom=0.18, wspace=0.3)
+
+    return fig
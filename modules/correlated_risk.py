@@ -0,0 +1,236 @@
+import numpy as np
+from dataclasses import dataclass
+from functools import cached_property
+
+from modules.cache import figure_to_png
+from modules.rng import data_rng
+
+# Dependence structures between policyholders
+DEPENDENCE_MODELS = ('gaussian', 't')
+
+# Pool sizes used for the "does pooling still help?" curve
+CURVE_POOL_SIZES = np.unique(np.geomspace(10, 10 ** 7, 40).astype(np.int64))
+
+
+def conditional_accident_probabilities(accident_probability, correlation, size, rng, dependence='gaussian',
+                                       degrees_of_freedom=4):
+    """
+    Accident probability of every policyholder given a common shock, one per scenario
+
+    One-factor copula: policyholder i has an accident when
+    sqrt(rho) * Z + sqrt(1 - rho) * e_i falls below the threshold for
+    accident_probability, with Z shared by the whole pool (a hail or flood
+    year). Given Z, policyholders are independent with the returned
+    probability, so the pool needs no n x n correlation matrix - claim counts
+    are Binomial(n, p(Z)). The 't' model also scales the threshold by a shared
+    chi-square draw, which makes extreme years more frequent. At correlation 0
+    both models are independent policyholders: the shared chi-square draw
+    alone would still move every threshold together, so it is not applied.
+
+    Parameters:
+    -----------
+    accident_probability : float
+        Unconditional probability of an accident
+    correlation : float
+        Correlation of the latent variables between any two policyholders (0 to <1)
+    size : int
+        Number of scenarios
+    rng : numpy.random.Generator
+        Generator for the common shocks
+    dependence : str
+        'gaussian' or 't'
+    degrees_of_freedom : float
+        Degrees of freedom of the t copula (lower = heavier joint tail)
+
+    Returns:
+    --------
+    probabilities : numpy.ndarray
+        Conditional accident probability for each scenario
+    """
+    if dependence not in DEPENDENCE_MODELS:
+        raise ValueError(f"Unknown dependence model: {dependence} (expected one of {', '.join(DEPENDENCE_MODELS)})")
+
+    if correlation == 0:
+        # No common shock and no shared mixing variable: every policyholder keeps the same probability
+        return np.full(size, float(accident_probability))
+
+    # Imported on first use so independent pools never load scipy
+    from scipy.special import ndtr, ndtri, stdtrit
+
+    shock = rng.standard_normal(size)
+    if dependence == 'gaussian':
+        threshold = ndtri(accident_probability)
+    else:
+        # t copula: the threshold moves with a common chi-square mixing variable
+        mixing = np.sqrt(rng.chisquare(degrees_of_freedom, size) / degrees_of_freedom)
+        threshold = stdtrit(degrees_of_freedom, accident_probability) * mixing
+
+    return ndtr((threshold - np.sqrt(correlation) * shock) / np.sqrt(1 - correlation))
+
+
+@dataclass(frozen=True)
+class CorrelatedPoolResult:
+    """
+    Actual/Expected ratios of many pool scenarios with and without correlation
+
+    ratios_* hold one Actual/Expected ratio per scenario at num_policyholders;
+    curve_std_* hold the standard deviation of the ratio at each CURVE_POOL_SIZES.
+    """
+    accident_probability: float
+    num_policyholders: int
+    correlation: float
+    dependence: str
+    num_scenarios: int
+    seed: int
+    ratios_independent: np.ndarray
+    ratios_correlated: np.ndarray
+    curve_std_independent: np.ndarray
+    curve_std_correlated: np.ndarray
+
+    @cached_property
+    def stats(self):
+        """Key statistics comparing the independent and correlated pools"""
+        independent = self.ratios_independent
+        correlated = self.ratios_correlated
+        return {
+            'std_independent': float(np.std(independent)),
+            'std_correlated': float(np.std(correlated)),
+            'quantile_995_independent': float(np.quantile(independent, 0.995)),
+            'quantile_995_correlated': float(np.quantile(correlated, 0.995)),
+            'prob_deficit_over_20pct_independent': float(np.mean(independent > 1.2)),
+            'prob_deficit_over_20pct_correlated': float(np.mean(correlated > 1.2)),
+            'std_floor_correlated': float(self.curve_std_correlated[-1]),
+            'correlation': self.correlation,
+            'dependence': self.dependence,
+            'seed': self.seed
+        }
+
+    @cached_property
+    def figure(self):
+        """The correlated pooling chart, built on first access"""
+        return render_correlated_pool(self)
+
+    @cached_property
+    def png(self):
+        """The correlated pooling chart encoded as PNG bytes (the Figure itself is not kept)"""
+        return figure_to_png(render_correlated_pool(self))
+
+
+def simulate_correlated_pool(accident_probability=0.05, num_policyholders=1000, correlation=0.05,
+                             dependence='gaussian', num_scenarios=20000, degrees_of_freedom=4, seed=42, rng=None):
+    """
+    Simulates pool outcomes when policyholders share a common shock
+
+    Every scenario draws one common shock and then a Binomial(n, p(shock)) claim
+    count, so memory is O(num_scenarios) whatever the pool size. The same
+    scenarios are also run with independent policyholders for comparison.
+
+    Parameters:
+    -----------
+    accident_probability : float
+        The probability of an accident
+    num_policyholders : int
+        The number of policyholders
+    correlation : float
+        Latent correlation between policyholders (0 = independent)
+    dependence : str
+        'gaussian' or 't' copula
+    num_scenarios : int
+        Number of simulated years
+    degrees_of_freedom : float
+        Degrees of freedom of the t copula
+    seed : int
+        Random seed for reproducibility
+    rng : numpy.random.Generator
+        Generator for the simulation; defaults to the data stream of seed
+
+    Returns:
+    --------
+    result : CorrelatedPoolResult
+        Scenario ratios at num_policyholders and the volatility curve over pool sizes
+    """
+    # Use a private Generator instead of the global NumPy state
+    if rng is None:
+        rng = data_rng(seed)
+
+    def ratios(pool_sizes, probabilities):
+        # Claim counts for every (pool size, scenario) pair, conditional on each scenario's shock
+        counts = rng.binomial(np.asarray(pool_sizes)[:, None], probabilities[None, :])
+        return counts / (np.asarray(pool_sizes)[:, None] * accident_probability)
+
+    shocked = conditional_accident_probabilities(accident_probability, correlation, num_scenarios, rng,
+                                                 dependence=dependence, degrees_of_freedom=degrees_of_freedom)
+    flat = np.full(num_scenarios, accident_probability)
+
+    # The volatility curve uses fewer scenarios per pool size; its std is stable well before that
+    curve_scenarios = min(num_scenarios, 4000)
+
+    return CorrelatedPoolResult(
+        accident_probability=accident_probability,
+        num_policyholders=num_policyholders,
+        correlation=correlation,
+        dependence=dependence,
+        num_scenarios=num_scenarios,
+        seed=seed,
+        ratios_independent=ratios([num_policyholders], flat)[0],
+        ratios_correlated=ratios([num_policyholders], shocked)[0],
+        curve_std_independent=ratios(CURVE_POOL_SIZES, flat[:curve_scenarios]).std(axis=1),
+        curve_std_correlated=ratios(CURVE_POOL_SIZES, shocked[:curve_scenarios]).std(axis=1)
+    )
+
+
+def render_correlated_pool(result):
+    """
+    Draws the Actual/Expected distributions and the volatility-vs-pool-size curve
+
+    Parameters:
+    -----------
+    result : CorrelatedPoolResult
+        Output of simulate_correlated_pool
+
+    Returns:
+    --------
+    fig : matplotlib.figure.Figure
+        The figure object
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    fig = Figure(figsize=(14, 6))
+    ax1 = fig.add_subplot(121)
+    ax2 = fig.add_subplot(122)
+
+    model_label = f"{'Gaussian' if result.dependence == 'gaussian' else 't'} copula, ρ={result.correlation:.2f}"
+
+    # Plot 1: Distribution of Actual/Expected at the current pool size
+    upper = max(np.quantile(result.ratios_correlated, 0.999), np.quantile(result.ratios_independent, 0.999), 1.5)
+    bins = np.linspace(0, upper, 60)
+    ax1.hist(result.ratios_independent, bins=bins, density=True, color='#3498DB', alpha=0.5,
+             label='Independent policyholders')
+    ax1.hist(result.ratios_correlated, bins=bins, density=True, color='#E74C3C', alpha=0.5,
+             label=f'Correlated ({model_label})')
+    ax1.axvline(1.0, color='#2C3E50', linestyle='--', alpha=0.7)
+    ax1.set_xlabel('Actual / Expected Losses')
+    ax1.set_ylabel('Density')
+    ax1.set_title(f'One-Year Outcomes, {result.num_policyholders:,} Policyholders ({result.num_scenarios:,} years)')
+    ax1.grid(True, alpha=0.3)
+    ax1.legend(loc='upper right')
+
+    # Plot 2: Does a bigger pool still reduce volatility?
+    ax2.plot(CURVE_POOL_SIZES, result.curve_std_independent, color='#3498DB', linewidth=2,
+             label='Independent: keeps shrinking')
+    ax2.plot(CURVE_POOL_SIZES, result.curve_std_correlated, color='#E74C3C', linewidth=2,
+             label='Correlated: levels off')
+    ax2.axvline(result.num_policyholders, color='gray', linestyle=':', alpha=0.8)
+    ax2.set_xscale('log')
+    ax2.set_yscale('log')
+    ax2.set_xlabel('Number of Policyholders (log scale)')
+    ax2.set_ylabel('Std. Dev. of Actual/Expected (log scale)')
+    ax2.set_title('Diversification Breaks Down under Common Shocks')
+    ax2.xaxis.set_major_formatter(FuncFormatter(lambda x, _: '{:,.0f}'.format(x)))
+    ax2.grid(True, which='both', alpha=0.3)
+    ax2.legend(loc='lower left')
+
+    fig.subplots_adjust(left=0.08, right=0.95, top=0.9, bottom=0.12, wspace=0.3)
+
+    return fig
@@ -1,15 +1,108 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
-from matplotlib.figure import Figure
-from scipy.stats import lognorm
+from dataclasses import dataclass
+from functools import cached_property
 
+from modules.cache import figure_to_png
+from modules.cohorts import CohortDefinition, CohortSimulation, simulate_cohorts
+from modules.rng import jitter_rng
 
-def demonstrate_driver_comparison(base_frequency=0.05, base_severity=8000, bad_driver_freq_multiplier=3.0,
-                                  bad_driver_severity_multiplier=2.0, seed=42, return_fig=False,
-                                  good_driver_image="drake.jpeg"):
+# Number of drivers simulated in each cohort
+COHORT_SIZE = 200
+
+# Above this many drivers per cohort the scatter is replaced by a density raster
+SCATTER_MAX_DRIVERS = 5000
+
+# Resolution of the density raster (bins along each axis)
+DENSITY_BINS = 200
+
+# Drivers used to place the raster extent (percentiles of a prefix instead of the whole cohort)
+DENSITY_SAMPLE = 100_000
+
+# Lognormal sigma of claim amounts for each cohort
+FIRST_COHORT_SIGMA = 0.4  # Smaller sigma for first cohort (less variance)
+SECOND_COHORT_SIGMA = 0.6  # Larger sigma for second cohort (more variance)
+
+
+@dataclass(frozen=True)
+class DriverComparisonResult:
     """
-    Demonstrates the difference in outcomes between driver cohorts
+    Simulated risk profiles for the two driver cohorts (no plotting involved)
+
+    The figure is only built the first time ``figure`` is accessed, so text
+    outputs that only need ``stats`` never pay for a chart.
+    """
+    base_frequency: float
+    base_severity: float
+    second_cohort_frequency: float
+    second_cohort_severity: float
+    seed: int
+    good_driver_image: str
+    good_driver_name: str
+    bad_driver_name: str
+    first_cohort_frequencies: np.ndarray
+    second_cohort_frequencies: np.ndarray
+    first_cohort_severities: np.ndarray
+    second_cohort_severities: np.ndarray
+    drivers: CohortSimulation
+
+    @property
+    def first_cohort_name(self):
+        return f"{self.good_driver_name} Cohort"
+
+    @property
+    def second_cohort_name(self):
+        return f"{self.bad_driver_name} Cohort"
+
+    @cached_property
+    def stats(self):
+        """Key statistics as the dictionary returned by demonstrate_driver_comparison"""
+        first_avg_frequency = np.mean(self.first_cohort_frequencies)
+        second_avg_frequency = np.mean(self.second_cohort_frequencies)
+
+        first_avg_severity = np.mean(self.first_cohort_severities)
+        second_avg_severity = np.mean(self.second_cohort_severities)
+
+        first_total_losses = first_avg_frequency * first_avg_severity * len(self.first_cohort_frequencies)
+        second_total_losses = second_avg_frequency * second_avg_severity * len(self.second_cohort_frequencies)
+
+        return {
+            'good_avg_frequency': first_avg_frequency,
+            'bad_avg_frequency': second_avg_frequency,
+            'good_avg_severity': first_avg_severity,
+            'bad_avg_severity': second_avg_severity,
+            'good_total_losses': first_total_losses,
+            'bad_total_losses': second_total_losses,
+            'loss_multiplier': second_total_losses / first_total_losses,
+            'freq_multiplier': second_avg_frequency / first_avg_frequency,
+            'severity_multiplier': second_avg_severity / first_avg_severity,
+            'good_driver_image': self.good_driver_image,
+            'good_driver_name': self.good_driver_name,
+            'bad_driver_name': self.bad_driver_name,
+            'first_cohort_name': self.first_cohort_name,
+            'second_cohort_name': self.second_cohort_name
+        }
+
+    @property
+    def claims(self):
+        """One year of simulated claims for both cohorts (cohort 0 = first, 1 = second)"""
+        return self.drivers.claims
+
+    @cached_property
+    def figure(self):
+        """The risk profile chart, built on first access"""
+        return render_driver_comparison(self)
+
+    @cached_property
+    def png(self):
+        """The risk profile chart encoded as PNG bytes (the Figure itself is not kept)"""
+        return figure_to_png(render_driver_comparison(self))
+
+
+def simulate_driver_comparison(base_frequency=0.05, base_severity=8000, bad_driver_freq_multiplier=3.0,
+                               bad_driver_severity_multiplier=2.0, seed=42, good_driver_image="drake.jpeg",
+                               rng=None, cohort_size=COHORT_SIZE):
+    """
+    Simulates the risk profiles of both driver cohorts without building any figure
 
     Parameters:
     -----------
@@ -23,84 +116,152 @@ def demonstrate_driver_comparison(base_frequency=0.05, base_severity=8000, bad_d
         How much more severe second cohort's accidents are
     seed : int
         Random seed for reproducibility
-    return_fig : bool
-        If True, returns the figure and stats for Shiny integration
     good_driver_image : str
         Image filename to use for the first cohort (either "drake.jpeg" or "kendrick.jpeg")
+    rng : numpy.random.Generator
+        Generator for fresh (uncached) draws; defaults to the cached draws of seed's data stream,
+        so changing only the parameters moves the same drivers (common random numbers)
+    cohort_size : int
+        Number of drivers in each cohort (millions are fine - the chart switches
+        to a density raster above SCATTER_MAX_DRIVERS)
 
     Returns:
     --------
-    fig : matplotlib.figure.Figure
-        The figure object (if return_fig is True)
-    stats : dict
-        Key statistics (if return_fig is True)
+    result : DriverComparisonResult
+        The simulated driver frequencies and severities
     """
-    # Set random seed for reproducibility
-    np.random.seed(seed)
-
     # Extract driver names from image filename
     good_driver_name = good_driver_image.split('.')[0].capitalize()
     bad_driver_name = "Kendrick" if good_driver_name == "Drake" else "Drake"
 
-    # Use specific cohort names
-    first_cohort_name = f"{good_driver_name} Cohort"
-    second_cohort_name = f"{bad_driver_name} Cohort"
-
     # Define parameters for each driver type
     second_cohort_frequency = base_frequency * bad_driver_freq_multiplier
     second_cohort_severity = base_severity * bad_driver_severity_multiplier
 
-    # Number of drivers to simulate
-    num_first_cohort = 200
-    num_second_cohort = 200
-
-    # Parameters for lognormal distribution
-    first_sigma = 0.4  # Smaller sigma for first cohort (less variance)
-    second_sigma = 0.6  # Larger sigma for second cohort (more variance)
-
-    # Calculate mu so that the median of the lognormal is our target severity
-    first_mu = np.log(base_severity) - 0.5 * first_sigma ** 2
-    second_mu = np.log(second_cohort_severity) - 0.5 * second_sigma ** 2
-
-    # Generate individual driver frequencies
-    first_cohort_frequencies = np.random.normal(base_frequency, base_frequency * 0.3, num_first_cohort)
-    first_cohort_frequencies = np.maximum(first_cohort_frequencies, 0.001)  # Minimum 0.1% frequency
-
-    second_cohort_frequencies = np.random.normal(second_cohort_frequency, second_cohort_frequency * 0.3,
-                                                 num_second_cohort)
-    second_cohort_frequencies = np.maximum(second_cohort_frequencies, 0.001)  # Minimum 0.1% frequency
-
-    # Generate individual driver severities (using lognormal)
-    first_cohort_severities = lognorm.rvs(first_sigma, scale=np.exp(first_mu), size=num_first_cohort)
-    second_cohort_severities = lognorm.rvs(second_sigma, scale=np.exp(second_mu), size=num_second_cohort)
-
-    # Calculate statistics
-    first_avg_frequency = np.mean(first_cohort_frequencies)
-    second_avg_frequency = np.mean(second_cohort_frequencies)
-
-    first_avg_severity = np.mean(first_cohort_severities)
-    second_avg_severity = np.mean(second_cohort_severities)
+    # Both cohorts are simulated in one vectorized call; each cohort is a contiguous slice of the block
+    drivers = simulate_cohorts([
+        CohortDefinition(f"{good_driver_name} Cohort", base_frequency, base_severity, FIRST_COHORT_SIGMA,
+                         cohort_size),
+        CohortDefinition(f"{bad_driver_name} Cohort", second_cohort_frequency, second_cohort_severity,
+                         SECOND_COHORT_SIGMA, cohort_size)
+    ], seed=seed, rng=rng)
+    first, second = drivers.cohort_slice(0), drivers.cohort_slice(1)
+
+    return DriverComparisonResult(
+        base_frequency=base_frequency,
+        base_severity=base_severity,
+        second_cohort_frequency=second_cohort_frequency,
+        second_cohort_severity=second_cohort_severity,
+        seed=seed,
+        good_driver_image=good_driver_image,
+        good_driver_name=good_driver_name,
+        bad_driver_name=bad_driver_name,
+        first_cohort_frequencies=drivers.frequencies[first],
+        second_cohort_frequencies=drivers.frequencies[second],
+        first_cohort_severities=drivers.severities[first],
+        second_cohort_severities=drivers.severities[second],
+        drivers=drivers
+    )
+
+
+def _draw_density_raster(ax, result):
+    """
+    Draws both cohorts as one RGBA image of 2D histograms (green and red channels)
 
-    first_total_losses = first_avg_frequency * first_avg_severity * num_first_cohort
-    second_total_losses = second_avg_frequency * second_avg_severity * num_second_cohort
+    Each cohort is binned on a shared DENSITY_BINS x DENSITY_BINS grid;
+    opacity follows log density so sparse tails stay visible.
+    """
+    frequencies = (result.first_cohort_frequencies, result.second_cohort_frequencies)
+    severities = (result.first_cohort_severities, result.second_cohort_severities)
+
+    # Clip the extent at the 99.9th percentile so a few extreme claims do not squash the picture
+    # (drivers are i.i.d., so the first DENSITY_SAMPLE of each cohort is enough to place it)
+    x_max = max(np.quantile(f[:DENSITY_SAMPLE], 0.999) for f in frequencies) * 1.05
+    y_max = max(np.quantile(s[:DENSITY_SAMPLE], 0.999) for s in severities) * 1.05
+
+    image = np.zeros((DENSITY_BINS, DENSITY_BINS, 4))
+    for f, s, rgb in zip(frequencies, severities, ((0.0, 0.5, 0.0), (0.8, 0.0, 0.0))):
+        # 2D histogram via flat bin indices and bincount (much faster than np.histogram2d on millions of points)
+        column = (f * (DENSITY_BINS / x_max)).astype(np.int64)
+        row = (s * (DENSITY_BINS / y_max)).astype(np.int64)
+        inside = (column < DENSITY_BINS) & (row < DENSITY_BINS)
+        counts = np.bincount(row[inside] * DENSITY_BINS + column[inside],
+                             minlength=DENSITY_BINS * DENSITY_BINS).reshape(DENSITY_BINS, DENSITY_BINS)
+        density = np.log1p(counts) / np.log1p(counts.max())
+        # Layer the cohort over what is already drawn ("over" compositing)
+        alpha = 0.85 * density[..., None]
+        image[..., :3] = image[..., :3] * (1 - alpha) + np.array(rgb) * alpha
+        image[..., 3:] = image[..., 3:] + alpha * (1 - image[..., 3:])
+
+    # Un-premultiply so imshow blends the colours against the white background correctly
+    image[..., :3] = np.divide(image[..., :3], image[..., 3:], out=np.zeros_like(image[..., :3]),
+                               where=image[..., 3:] > 0)
+    ax.imshow(image, origin='lower', extent=(0, x_max, 0, y_max), aspect='auto', interpolation='nearest')
+
+
+def render_driver_comparison(result):
+    """
+    Draws the driver risk profile scatterplot for a simulation result
 
-    # For Shiny integration
-    if return_fig:
-        # Create figure - NARROWED BY 25%
-        fig = Figure(figsize=(10.5, 10))  # Changed from 14 to 10.5 width (25% reduction)
+    Cohorts larger than SCATTER_MAX_DRIVERS are drawn as a 2D-histogram
+    raster instead of one marker per driver, so render time and PNG size stay
+    flat at millions of drivers.
 
-        # Create subplots - just use one main plot and one for statistics
-        ax1 = fig.add_subplot(111)  # Main scatterplot
+    Parameters:
+    -----------
+    result : DriverComparisonResult
+        Output of simulate_driver_comparison
 
+    Returns:
+    --------
+    fig : matplotlib.figure.Figure
+        The figure object
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+    from matplotlib.patches import Patch
+
+    stats = result.stats
+    first_cohort_name = result.first_cohort_name
+    second_cohort_name = result.second_cohort_name
+    base_frequency = result.base_frequency
+    base_severity = result.base_severity
+    second_cohort_frequency = result.second_cohort_frequency
+    second_cohort_severity = result.second_cohort_severity
+
+    first_avg_frequency = stats['good_avg_frequency']
+    second_avg_frequency = stats['bad_avg_frequency']
+    first_avg_severity = stats['good_avg_severity']
+    second_avg_severity = stats['bad_avg_severity']
+    first_total_losses = stats['good_total_losses']
+    second_total_losses = stats['bad_total_losses']
+
+    # Create figure - NARROWED BY 25%
+    fig = Figure(figsize=(10.5, 10))  # Changed from 14 to 10.5 width (25% reduction)
+
+    # Create subplots - just use one main plot and one for statistics
+    ax1 = fig.add_subplot(111)  # Main scatterplot
+
+    num_drivers = max(len(result.first_cohort_frequencies), len(result.second_cohort_frequencies))
+    if num_drivers > SCATTER_MAX_DRIVERS:
+        # Density raster: one fixed-size image whatever the cohort size
+        _draw_density_raster(ax1, result)
+        # Proxy handles so the legend still names both cohorts
+        ax1.add_artist(ax1.legend(handles=[
+            Patch(facecolor='green', alpha=0.7, label=f'{first_cohort_name} ({num_drivers:,} drivers)'),
+            Patch(facecolor='red', alpha=0.7, label=f'{second_cohort_name} ({num_drivers:,} drivers)')
+        ], loc='upper left', fontsize=12))
+    else:
         # Plot: Scatter plot of driver risk profiles
-        # Add small jitter to separate overlapping points
-        jitter_x_first = np.random.normal(0, 0.001, num_first_cohort)
-        jitter_x_second = np.random.normal(0, 0.001, num_second_cohort)
+        # Add small jitter to separate overlapping points (separate stream so it never shifts the data)
+        jitter = jitter_rng(result.seed)
+        jitter_x_first = jitter.normal(0, 0.001, len(result.first_cohort_frequencies))
+        jitter_x_second = jitter.normal(0, 0.001, len(result.second_cohort_frequencies))
 
         # Scatter plot for first cohort
         ax1.scatter(
-            first_cohort_frequencies + jitter_x_first,
-            first_cohort_severities,
+            result.first_cohort_frequencies + jitter_x_first,
+            result.first_cohort_severities,
             color='green',
             alpha=0.7,
             s=70,
@@ -110,8 +271,8 @@ def demonstrate_driver_comparison(base_frequency=0.05, base_severity=8000, bad_d
 
         # Scatter plot for second cohort
         ax1.scatter(
-            second_cohort_frequencies + jitter_x_second,
-            second_cohort_severities,
+            result.second_cohort_frequencies + jitter_x_second,
+            result.second_cohort_severities,
             color='red',
             alpha=0.7,
             s=70,
@@ -119,110 +280,130 @@ def demonstrate_driver_comparison(base_frequency=0.05, base_severity=8000, bad_d
             edgecolors='darkred'
         )
 
-        # Add center points for each cluster
-        ax1.scatter(
-            first_avg_frequency,
-            first_avg_severity,
-            color='darkgreen',
-            s=150,
-            marker='*',
-            label=f'{first_cohort_name} Average'
-        )
+    # Add center points for each cluster
+    ax1.scatter(
+        first_avg_frequency,
+        first_avg_severity,
+        color='darkgreen',
+        s=150,
+        marker='*',
+        label=f'{first_cohort_name} Average'
+    )
+
+    ax1.scatter(
+        second_avg_frequency,
+        second_avg_severity,
+        color='darkred',
+        s=150,
+        marker='*',
+        label=f'{second_cohort_name} Average'
+    )
+
+    # Add frequency and severity lines for reference
+    ax1.axvline(x=base_frequency, color='lightgreen', linestyle='--', alpha=0.5)
+    ax1.axvline(x=second_cohort_frequency, color='lightcoral', linestyle='--', alpha=0.5)
+
+    ax1.axhline(y=base_severity, color='lightgreen', linestyle='--', alpha=0.5)
+    ax1.axhline(y=second_cohort_severity, color='lightcoral', linestyle='--', alpha=0.5)
+
+    # Annotations for the lines
+    ax1.text(base_frequency, ax1.get_ylim()[0] * 1.05, f"{first_cohort_name} Frequency: {base_frequency:.1%}",
+             color='darkgreen', ha='center', va='bottom', rotation=90)
+    ax1.text(second_cohort_frequency, ax1.get_ylim()[0] * 1.05,
+             f"{second_cohort_name} Frequency: {second_cohort_frequency:.1%}",
+             color='darkred', ha='center', va='bottom', rotation=90)
+
+    # Format axes with updated terminology
+    ax1.set_xlabel('Est. Accident Frequency (probability per year)', fontsize=12)
+    ax1.set_ylabel('Est. Average Claim Amount ($)', fontsize=12)
+    ax1.set_title('Driver Risk Profiles: Frequency vs Claim Amount', fontsize=14)
+    ax1.legend(fontsize=12)
+    ax1.grid(True, alpha=0.3)
+
+    # Set x-axis as percentage
+    ax1.xaxis.set_major_formatter(FuncFormatter(lambda x, _: '{:.0%}'.format(x)))
+
+    # Set y-axis format to display dollar amounts
+    ax1.yaxis.set_major_formatter(FuncFormatter(lambda x, _: '${:,.0f}'.format(x)))
+
+    # Add summary statistics in a box - MOVED TO NOT OVERLAP WITH CHART
+    summary_text = (
+        f"Risk Profile Comparison\n\n"
+        f"{first_cohort_name}:\n"
+        f"• Avg Frequency: {first_avg_frequency:.1%}\n"
+        f"• Avg Claim Amount: ${first_avg_severity:,.0f}\n"
+        f"• Total Expected Loss: ${first_total_losses:,.0f}\n\n"
+        f"{second_cohort_name}:\n"
+        f"• Avg Frequency: {second_avg_frequency:.1%} ({second_avg_frequency / first_avg_frequency:.1f}x higher)\n"
+        f"• Avg Claim Amount: ${second_avg_severity:,.0f} ({second_avg_severity / first_avg_severity:.1f}x higher)\n"
+        f"• Total Expected Loss: ${second_total_losses:,.0f} ({second_total_losses / first_total_losses:.1f}x higher)"
+    )
+
+    # Place text box on the right side (LEFT JUSTIFIED)
+    props = dict(boxstyle='round', facecolor='wheat', alpha=0.7)
+    ax1.text(1.05, 0.5, summary_text, fontsize=12,
+             verticalalignment='center', horizontalalignment='left',
+             bbox=props, transform=ax1.transAxes)
+
+    # Adjust layout to make space for the text box
+    fig.tight_layout()
+    fig.subplots_adjust(right=0.75)  # Make room for the summary box on the right
+
+    return fig
 
-        ax1.scatter(
-            second_avg_frequency,
-            second_avg_severity,
-            color='darkred',
-            s=150,
-            marker='*',
-            label=f'{second_cohort_name} Average'
-        )
-
-        # Add frequency and severity lines for reference
-        ax1.axvline(x=base_frequency, color='lightgreen', linestyle='--', alpha=0.5)
-        ax1.axvline(x=second_cohort_frequency, color='lightcoral', linestyle='--', alpha=0.5)
-
-        ax1.axhline(y=base_severity, color='lightgreen', linestyle='--', alpha=0.5)
-        ax1.axhline(y=second_cohort_severity, color='lightcoral', linestyle='--', alpha=0.5)
-
-        # Annotations for the lines
-        ax1.text(base_frequency, ax1.get_ylim()[0] * 1.05, f"{first_cohort_name} Frequency: {base_frequency:.1%}",
-                 color='darkgreen', ha='center', va='bottom', rotation=90)
-        ax1.text(second_cohort_frequency, ax1.get_ylim()[0] * 1.05,
-                 f"{second_cohort_name} Frequency: {second_cohort_frequency:.1%}",
-                 color='darkred', ha='center', va='bottom', rotation=90)
-
-        # Format axes with updated terminology
-        ax1.set_xlabel('Est. Accident Frequency (probability per year)', fontsize=12)
-        ax1.set_ylabel('Est. Average Claim Amount ($)', fontsize=12)
-        ax1.set_title('Driver Risk Profiles: Frequency vs Claim Amount', fontsize=14)
-        ax1.legend(fontsize=12)
-        ax1.grid(True, alpha=0.3)
-
-        # Set x-axis as percentage
-        ax1.xaxis.set_major_formatter(plt.FuncFormatter(lambda x, _: '{:.0%}'.format(x)))
-
-        # Set y-axis format to display dollar amounts
-        ax1.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, _: '${:,.0f}'.format(x)))
-
-        # Add summary statistics in a box - MOVED TO NOT OVERLAP WITH CHART
-        summary_text = (
-            f"Risk Profile Comparison\n\n"
-            f"{first_cohort_name}:\n"
-            f"• Avg Frequency: {first_avg_frequency:.1%}\n"
-            f"• Avg Claim Amount: ${first_avg_severity:,.0f}\n"
-            f"• Total Expected Loss: ${first_total_losses:,.0f}\n\n"
-            f"{second_cohort_name}:\n"
-            f"• Avg Frequency: {second_avg_frequency:.1%} ({second_avg_frequency / first_avg_frequency:.1f}x higher)\n"
-            f"• Avg Claim Amount: ${second_avg_severity:,.0f} ({second_avg_severity / first_avg_severity:.1f}x higher)\n"
-            f"• Total Expected Loss: ${second_total_losses:,.0f} ({second_total_losses / first_total_losses:.1f}x higher)"
-        )
 
-        # Place text box on the right side (LEFT JUSTIFIED)
-        props = dict(boxstyle='round', facecolor='wheat', alpha=0.7)
-        ax1.text(1.05, 0.5, summary_text, fontsize=12,
-                 verticalalignment='center', horizontalalignment='left',
-                 bbox=props, transform=ax1.transAxes)
+def demonstrate_driver_comparison(base_frequency=0.05, base_severity=8000, bad_driver_freq_multiplier=3.0,
+                                  bad_driver_severity_multiplier=2.0, seed=42, return_fig=False,
+                                  good_driver_image="drake.jpeg", cohort_size=COHORT_SIZE):
+    """
+    Demonstrates the difference in outcomes between driver cohorts
 
-        # Adjust layout to make space for the text box
-        fig.tight_layout()
-        fig.subplots_adjust(right=0.75)  # Make room for the summary box on the right
+    Parameters:
+    -----------
+    base_frequency : float
+        Base accident frequency for first cohort
+    base_severity : float
+        Base accident severity for first cohort
+    bad_driver_freq_multiplier : float
+        How much more frequently second cohort has accidents
+    bad_driver_severity_multiplier : float
+        How much more severe second cohort's accidents are
+    seed : int
+        Random seed for reproducibility
+    return_fig : bool
+        If True, returns the figure and stats for Shiny integration
+    good_driver_image : str
+        Image filename to use for the first cohort (either "drake.jpeg" or "kendrick.jpeg")
+    cohort_size : int
+        Number of drivers in each cohort
 
-        # Stats to return
-        stats = {
-            'good_avg_frequency': first_avg_frequency,
-            'bad_avg_frequency': second_avg_frequency,
-            'good_avg_severity': first_avg_severity,
-            'bad_avg_severity': second_avg_severity,
-            'good_total_losses': first_total_losses,
-            'bad_total_losses': second_total_losses,
-            'loss_multiplier': second_total_losses / first_total_losses,
-            'freq_multiplier': second_avg_frequency / first_avg_frequency,
-            'severity_multiplier': second_avg_severity / first_avg_severity,
-            'good_driver_image': good_driver_image,
-            'good_driver_name': good_driver_name,
-            'bad_driver_name': bad_driver_name,
-            'first_cohort_name': first_cohort_name,
-            'second_cohort_name': second_cohort_name
-        }
+    Returns:
+    --------
+    fig : matplotlib.figure.Figure
+        The figure object (if return_fig is True)
+    stats : dict
+        Key statistics (if return_fig is True)
+    """
+    result = simulate_driver_comparison(base_frequency, base_severity, bad_driver_freq_multiplier,
+                                        bad_driver_severity_multiplier, seed=seed,
+                                        good_driver_image=good_driver_image, cohort_size=cohort_size)
 
-        return fig, stats
+    # For Shiny integration
+    if return_fig:
+        return result.figure, result.stats
 
     # Original function for compatibility
     else:
-        # Create figure
-        fig = plt.figure(figsize=(14, 10))
-
-        # Rest of the implementation would be similar to the return_fig=True case
-        # This is just a placeholder for compatibility
-        plt.show()
+        stats = result.stats
+        first_cohort_name = result.first_cohort_name
+        second_cohort_name = result.second_cohort_name
 
         # Print statistics
         print("\nDriver Comparison Interpretation:")
         print(
-            f"• {first_cohort_name}: {first_avg_frequency:.1%} accident rate, ${first_avg_severity:,.2f} avg severity")
+            f"• {first_cohort_name}: {stats['good_avg_frequency']:.1%} accident rate, ${stats['good_avg_severity']:,.2f} avg severity")
         print(
-            f"• {second_cohort_name}: {second_avg_frequency:.1%} accident rate, ${second_avg_severity:,.2f} avg severity")
-        print(f"• {first_cohort_name} total loss: ${first_total_losses:,.0f}")
+            f"• {second_cohort_name}: {stats['bad_avg_frequency']:.1%} accident rate, ${stats['bad_avg_severity']:,.2f} avg severity")
+        print(f"• {first_cohort_name} total loss: ${stats['good_total_losses']:,.0f}")
         print(
-            f"• {second_cohort_name} total loss: ${second_total_losses:,.0f} ({second_total_losses / first_total_losses:.1f}x higher)")
\ No newline at end of file
+            f"• {second_cohort_name} total loss: ${stats['bad_total_losses']:,.0f} ({stats['loss_multiplier']:.1f}x higher)")
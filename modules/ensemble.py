@@ -0,0 +1,228 @@
+import numpy as np
+from dataclasses import dataclass
+from functools import cached_property
+
+from modules.cache import figure_to_png
+from modules.cohorts import driver_profiles
+from modules.driver_comparison import COHORT_SIZE, FIRST_COHORT_SIGMA, SECOND_COHORT_SIGMA
+from modules.rng import data_rng
+
+# Default number of replications of the driver comparison
+ENSEMBLE_REPLICATIONS = 2000
+
+# Values drawn per (replications x drivers) block for each measure; bounds each block to ~16 MB
+ENSEMBLE_CHUNK_ELEMENTS = 2_000_000
+
+# Drivers x replications the app asks for interactively; larger cohorts get fewer replications
+ENSEMBLE_DRIVER_BUDGET = 5_000_000
+MIN_REPLICATIONS = 20
+
+# Two-sided confidence level of the reported intervals
+CONFIDENCE_LEVEL = 0.95
+
+
+def replications_for(cohort_size, target=ENSEMBLE_REPLICATIONS):
+    """Number of replications that keeps cohort_size x replications within ENSEMBLE_DRIVER_BUDGET"""
+    return max(MIN_REPLICATIONS, min(target, ENSEMBLE_DRIVER_BUDGET // max(cohort_size, 1)))
+
+
+@dataclass(frozen=True)
+class EnsembleResult:
+    """
+    Cohort averages of many independent replications of the driver comparison
+
+    Each array holds one value per replication, so the spread of the
+    multipliers is their sampling distribution at this cohort size.
+    """
+    base_frequency: float
+    base_severity: float
+    second_cohort_frequency: float
+    second_cohort_severity: float
+    cohort_size: int
+    seed: int
+    good_avg_frequency: np.ndarray
+    bad_avg_frequency: np.ndarray
+    good_avg_severity: np.ndarray
+    bad_avg_severity: np.ndarray
+
+    @property
+    def num_replications(self):
+        return len(self.good_avg_frequency)
+
+    @property
+    def freq_multipliers(self):
+        return self.bad_avg_frequency / self.good_avg_frequency
+
+    @property
+    def severity_multipliers(self):
+        return self.bad_avg_severity / self.good_avg_severity
+
+    @property
+    def loss_multipliers(self):
+        # Same formula as the driver comparison stats (equal cohort sizes cancel)
+        return self.freq_multipliers * self.severity_multipliers
+
+    @property
+    def true_loss_multiplier(self):
+        return (self.second_cohort_frequency * self.second_cohort_severity
+                / (self.base_frequency * self.base_severity))
+
+    @staticmethod
+    def confidence_interval(values, level=CONFIDENCE_LEVEL):
+        """Percentile interval covering level of the replications"""
+        tail = (1 - level) / 2
+        lower, upper = np.quantile(values, [tail, 1 - tail])
+        return float(lower), float(upper)
+
+    @cached_property
+    def stats(self):
+        """Sampling distribution summaries of the multipliers"""
+        loss = self.loss_multipliers
+        freq = self.freq_multipliers
+        return {
+            'num_replications': self.num_replications,
+            'cohort_size': self.cohort_size,
+            'confidence_level': CONFIDENCE_LEVEL,
+            'loss_multiplier_mean': float(np.mean(loss)),
+            'loss_multiplier_std': float(np.std(loss, ddof=1)),
+            'loss_multiplier_ci': self.confidence_interval(loss),
+            'freq_multiplier_mean': float(np.mean(freq)),
+            'freq_multiplier_std': float(np.std(freq, ddof=1)),
+            'freq_multiplier_ci': self.confidence_interval(freq),
+            'true_loss_multiplier': self.true_loss_multiplier,
+            'true_freq_multiplier': self.second_cohort_frequency / self.base_frequency,
+            'seed': self.seed
+        }
+
+    @cached_property
+    def figure(self):
+        """The sampling distribution chart, built on first access"""
+        return render_ensemble(self)
+
+    @cached_property
+    def png(self):
+        """The sampling distribution chart encoded as PNG bytes (the Figure itself is not kept)"""
+        return figure_to_png(render_ensemble(self))
+
+
+def _cohort_averages(rng, num_replications, cohort_size, frequency, severity, sigma):
+    """Average frequency and severity of num_replications cohorts, drawn in (replications x drivers) blocks"""
+    avg_frequency = np.empty(num_replications)
+    avg_severity = np.empty(num_replications)
+    rows = max(1, ENSEMBLE_CHUNK_ELEMENTS // cohort_size)
+
+    for start in range(0, num_replications, rows):
+        stop = min(start + rows, num_replications)
+        z_frequency = rng.standard_normal((stop - start, cohort_size))
+        z_severity = rng.standard_normal((stop - start, cohort_size))
+        frequencies, severities = driver_profiles(z_frequency, z_severity, frequency, severity, sigma)
+        avg_frequency[start:stop] = frequencies.mean(axis=1)
+        avg_severity[start:stop] = severities.mean(axis=1)
+
+    return avg_frequency, avg_severity
+
+
+def simulate_ensemble(base_frequency=0.05, base_severity=8000, bad_driver_freq_multiplier=3.0,
+                      bad_driver_severity_multiplier=2.0, num_replications=ENSEMBLE_REPLICATIONS,
+                      cohort_size=COHORT_SIZE, seed=42, rng=None):
+    """
+    Simulates many replications of the driver comparison in batched draws
+
+    Every block of replications is one (replications x drivers) normal draw
+    and one lognormal draw per cohort, reduced to cohort averages along the
+    driver axis - no per-replication Python calls.
+
+    Parameters:
+    -----------
+    base_frequency : float
+        Base accident frequency for first cohort
+    base_severity : float
+        Base accident severity for first cohort
+    bad_driver_freq_multiplier : float
+        How much more frequently second cohort has accidents
+    bad_driver_severity_multiplier : float
+        How much more severe second cohort's accidents are
+    num_replications : int
+        Number of independent replications
+    cohort_size : int
+        Number of drivers in each cohort
+    seed : int
+        Random seed for reproducibility
+    rng : numpy.random.Generator
+        Generator for the replications; defaults to the data stream of seed
+
+    Returns:
+    --------
+    result : EnsembleResult
+        Cohort averages of every replication
+    """
+    # Use a private Generator instead of the global NumPy state
+    if rng is None:
+        rng = data_rng(seed)
+
+    second_cohort_frequency = base_frequency * bad_driver_freq_multiplier
+    second_cohort_severity = base_severity * bad_driver_severity_multiplier
+
+    good_avg_frequency, good_avg_severity = _cohort_averages(rng, num_replications, cohort_size, base_frequency,
+                                                             base_severity, FIRST_COHORT_SIGMA)
+    bad_avg_frequency, bad_avg_severity = _cohort_averages(rng, num_replications, cohort_size,
+                                                           second_cohort_frequency, second_cohort_severity,
+                                                           SECOND_COHORT_SIGMA)
+
+    return EnsembleResult(
+        base_frequency=base_frequency,
+        base_severity=base_severity,
+        second_cohort_frequency=second_cohort_frequency,
+        second_cohort_severity=second_cohort_severity,
+        cohort_size=cohort_size,
+        seed=seed,
+        good_avg_frequency=good_avg_frequency,
+        bad_avg_frequency=bad_avg_frequency,
+        good_avg_severity=good_avg_severity,
+        bad_avg_severity=bad_avg_severity
+    )
+
+
+def render_ensemble(result, observed=None):
+    """
+    Draws the sampling distributions of loss_multiplier and freq_multiplier
+
+    Parameters:
+    -----------
+    result : EnsembleResult
+        Output of simulate_ensemble
+    observed : dict
+        Optional driver comparison stats; their multipliers are marked on the charts
+
+    Returns:
+    --------
+    fig : matplotlib.figure.Figure
+        The figure object
+    """
+    from matplotlib.figure import Figure
+
+    stats = result.stats
+    fig = Figure(figsize=(14, 6))
+    panels = [
+        (fig.add_subplot(121), result.loss_multipliers, 'loss_multiplier', 'Loss Multiplier', '#E74C3C'),
+        (fig.add_subplot(122), result.freq_multipliers, 'freq_multiplier', 'Frequency Multiplier', '#3498DB')
+    ]
+
+    for ax, values, key, label, color in panels:
+        lower, upper = stats[f'{key}_ci']
+        ax.hist(values, bins=60, color=color, alpha=0.6)
+        ax.axvspan(lower, upper, color=color, alpha=0.1,
+                   label=f"{stats['confidence_level']:.0%} interval: {lower:.2f} - {upper:.2f}")
+        ax.axvline(stats[f'true_{key}'], color='#2C3E50', linestyle='--', label=f"True value: {stats[f'true_{key}']:.2f}")
+        if observed is not None:
+            ax.axvline(observed[key], color='black', linewidth=2, label=f"This simulation: {observed[key]:.2f}")
+        ax.set_xlabel(label)
+        ax.set_ylabel('Replications')
+        ax.set_title(f'Sampling Distribution of the {label}')
+        ax.grid(True, alpha=0.3)
+        ax.legend(loc='upper right')
+
+    fig.suptitle(f"{stats['num_replications']:,} replications of {stats['cohort_size']:,} drivers per cohort")
+    fig.subplots_adjust(left=0.08, right=0.95, top=0.86, bottom=0.12, wspace=0.3)
+
+    return fig
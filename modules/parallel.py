@@ -0,0 +1,239 @@
+import math
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from modules.ensemble import simulate_ensemble
+from modules.rng import replication_streams
+
+# Relative accuracy of the quantile sketch (1% of the true quantile value)
+SKETCH_RELATIVE_ACCURACY = 0.01
+
+# Replications simulated per batch (one child seed and one summary per batch)
+DEFAULT_BATCH_SIZE = 10000
+
+
+@dataclass
+class QuantileSketch:
+    """
+    Mergeable log-bucket quantile sketch with bounded relative error
+
+    Each value x is counted in bucket ceil(log(|x|) / log(gamma)), kept
+    separately for positive and negative values, so quantiles are within
+    SKETCH_RELATIVE_ACCURACY of the exact value. Sketches from different
+    batches merge by adding bucket counts - no raw values are kept.
+    """
+    relative_accuracy: float = SKETCH_RELATIVE_ACCURACY
+    positive: dict = field(default_factory=dict)
+    negative: dict = field(default_factory=dict)
+    zero_count: int = 0
+
+    @property
+    def gamma(self):
+        return (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+
+    @property
+    def count(self):
+        return self.zero_count + sum(self.positive.values()) + sum(self.negative.values())
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        log_gamma = math.log(self.gamma)
+        for sign, buckets in ((1, self.positive), (-1, self.negative)):
+            magnitudes = values[values * sign > 0] * sign
+            if not magnitudes.size:
+                continue
+            # Bucket keys span a few hundred values, so bincount beats sorting millions of values
+            keys = np.ceil(np.log(magnitudes) / log_gamma).astype(np.int64)
+            lowest = int(keys.min())
+            counts = np.bincount(keys - lowest)
+            for offset in np.flatnonzero(counts).tolist():
+                buckets[lowest + offset] = buckets.get(lowest + offset, 0) + int(counts[offset])
+        self.zero_count += int(np.count_nonzero(values == 0))
+        return self
+
+    def merge(self, other):
+        for buckets, other_buckets in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_buckets.items():
+                buckets[key] = buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        return self
+
+    def quantile(self, q):
+        """Approximate q-quantile (0 <= q <= 1)"""
+        total = self.count
+        if total == 0:
+            return float('nan')
+        rank = q * (total - 1)
+        gamma = self.gamma
+
+        # Walk buckets from the most negative value up to the most positive value
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -2 * gamma ** key / (gamma + 1)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return 2 * gamma ** key / (gamma + 1)
+        return 2 * gamma ** max(self.positive) / (gamma + 1)
+
+
+@dataclass
+class RunningStatistic:
+    """
+    Online mean, variance, extremes and quantile sketch of a stream of values
+
+    Each chunk is folded in with the parallel form of Welford's algorithm
+    (Chan et al.): the chunk's own mean and sum of squared deviations are
+    combined with the running ones, so memory is constant and the variance
+    does not suffer from the cancellation of a plain sum of squares. The same
+    combination merges statistics computed in different processes.
+    """
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    minimum: float = math.inf
+    maximum: float = -math.inf
+    sketch: QuantileSketch = field(default_factory=QuantileSketch)
+
+    @classmethod
+    def from_values(cls, values):
+        values = np.asarray(values, dtype=float).ravel()
+        statistic = cls()
+        if values.size:
+            statistic.count = int(values.size)
+            statistic.mean = float(np.mean(values))
+            statistic.m2 = float(np.sum((values - statistic.mean) ** 2))
+            statistic.minimum = float(np.min(values))
+            statistic.maximum = float(np.max(values))
+            statistic.sketch.add(values)
+        return statistic
+
+    def update(self, values):
+        return self.merge(RunningStatistic.from_values(values))
+
+    def merge(self, other):
+        if other.count:
+            total = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / total
+            self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+            self.count = total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.sketch.merge(other.sketch)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def quantile(self, q):
+        """Approximate q-quantile from the sketch"""
+        return self.sketch.quantile(q)
+
+
+@dataclass
+class ReplicationSummary(RunningStatistic):
+    """
+    Partial statistics of a batch of replications that merge exactly
+
+    A RunningStatistic, so worker processes send back the count, mean, sum of
+    squared deviations, extremes and a quantile sketch - a few hundred
+    numbers instead of raw arrays - and batches merge with Chan's formula.
+    """
+
+    @property
+    def stats(self):
+        """Key statistics of all merged replications"""
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'std': self.std,
+            'standard_error': self.std / math.sqrt(self.count) if self.count else float('nan'),
+            'min': self.minimum,
+            'max': self.maximum,
+            'quantile_5': self.sketch.quantile(0.05),
+            'median': self.sketch.quantile(0.5),
+            'quantile_95': self.sketch.quantile(0.95),
+            'quantile_99': self.sketch.quantile(0.99),
+            'quantile_995': self.sketch.quantile(0.995)
+        }
+
+
+def pool_performance_replications(size, rng, accident_probability=0.05, num_policyholders=100):
+    """Actual/Expected ratio of size independent risk pools (binomial claim counts)"""
+    claims = rng.binomial(num_policyholders, accident_probability, size)
+    return claims / (num_policyholders * accident_probability)
+
+
+def loss_multiplier_replications(size, rng, base_frequency=0.05, base_severity=8000, bad_driver_freq_multiplier=3.0,
+                                 bad_driver_severity_multiplier=2.0):
+    """loss_multiplier of size independent driver comparison simulations (one batched ensemble draw)"""
+    return simulate_ensemble(base_frequency, base_severity, bad_driver_freq_multiplier,
+                             bad_driver_severity_multiplier, num_replications=size, rng=rng).loss_multipliers
+
+
+def _run_batch(replicate, params, seed_sequence, size):
+    # Runs in a worker process: simulate one batch and return only its summary
+    values = replicate(size, np.random.default_rng(seed_sequence), **params)
+    return ReplicationSummary.from_values(values)
+
+
+def run_replications(replicate, num_replications, seed=42, batch_size=DEFAULT_BATCH_SIZE, max_workers=None,
+                     parallel=True, **params):
+    """
+    Runs many Monte Carlo replications in batches, optionally across processes
+
+    Each batch gets its own child SeedSequence (spawned from the seed's data
+    stream) and batch summaries are merged in batch order, so the parallel
+    result is bit-for-bit identical to the serial one.
+
+    Parameters:
+    -----------
+    replicate : callable
+        Module-level function replicate(size, rng, **params) returning one value
+        per replication (e.g. pool_performance_replications)
+    num_replications : int
+        Total number of replications
+    seed : int
+        Random seed for reproducibility
+    batch_size : int
+        Replications per batch
+    max_workers : int
+        Number of worker processes (defaults to the number of CPUs)
+    parallel : bool
+        If False, runs every batch in this process (same result, one core)
+    **params :
+        Model parameters passed through to replicate
+
+    Returns:
+    --------
+    summary : ReplicationSummary
+        Merged statistics of all replications
+    """
+    num_batches = math.ceil(num_replications / batch_size)
+    seeds = replication_streams(seed, num_batches)
+    sizes = [min(batch_size, num_replications - i * batch_size) for i in range(num_batches)]
+    batch_args = ([replicate] * num_batches, [params] * num_batches, seeds, sizes)
+
+    if parallel and num_batches > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # map() yields results in submission order, so merging is deterministic
+            summaries = list(executor.map(_run_batch, *batch_args))
+    else:
+        summaries = list(map(_run_batch, *batch_args))
+
+    merged = ReplicationSummary()
+    for summary in summaries:
+        merged.merge(summary)
+    return merged
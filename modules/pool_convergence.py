@@ -0,0 +1,171 @@
+import numpy as np
+from dataclasses import dataclass
+from functools import cached_property
+
+from modules.cache import figure_to_png
+from modules.risk_pooling import SIMULATION_CHUNK_SIZE, claims_99_interval, policyholder_accidents
+
+# Number of log-spaced pool sizes kept for plotting, independent of the largest pool size
+NUM_PLOT_POINTS = 400
+
+
+@dataclass(frozen=True)
+class PoolConvergenceResult:
+    """
+    Actual/Expected ratio as the pool grows from min_n to max_n policyholders
+
+    Every pool size is a prefix of one stream of policyholders, so the curve
+    shows a single pool growing rather than independent simulations.
+    cumulative_claims[n - 1] is the claim count of the first n policyholders.
+    """
+    accident_probability: float
+    min_n: int
+    max_n: int
+    seed: int
+    cumulative_claims: np.ndarray
+    prefix_sizes: np.ndarray
+    ratios: np.ndarray
+    band_lower: np.ndarray
+    band_upper: np.ndarray
+
+    @cached_property
+    def stats(self):
+        """Key statistics of the convergence curve"""
+        outside = (self.ratios < self.band_lower) | (self.ratios > self.band_upper)
+        return {
+            'min_n': self.min_n,
+            'max_n': self.max_n,
+            'first_ratio': float(self.ratios[0]),
+            'final_ratio': float(self.ratios[-1]),
+            'max_deviation': float(np.max(np.abs(self.ratios - 1))),
+            'final_band_half_width': float(self.band_upper[-1] - 1),
+            'percent_outside_band': float(np.mean(outside) * 100),
+            'seed': self.seed
+        }
+
+    def ratio_at(self, n):
+        """Actual/Expected ratio of the first n policyholders (1 <= n <= max_n)"""
+        if not 1 <= n <= self.max_n:
+            raise ValueError(f"Pool size must be between 1 and {self.max_n:,}")
+        return float(self.cumulative_claims[n - 1] / (n * self.accident_probability))
+
+    @cached_property
+    def figure(self):
+        """The convergence chart, built on first access"""
+        return render_pool_convergence(self)
+
+    @cached_property
+    def png(self):
+        """The convergence chart encoded as PNG bytes (the Figure itself is not kept)"""
+        return figure_to_png(render_pool_convergence(self))
+
+
+def simulate_pool_convergence(accident_probability=0.05, min_n=10, max_n=1_000_000, seed=42, rng=None):
+    """
+    Computes the Actual/Expected ratio for every pool size from one stream of policyholders
+
+    The claim count of each prefix is a cumulative sum over a single stream of
+    accident draws, so all pool sizes cost one O(max_n) pass instead of one
+    simulation per size. Only NUM_PLOT_POINTS log-spaced sizes are plotted.
+    By default the stream is the seed's prefix-stable policyholder stream
+    (see policyholder_accidents), so at every pool size the curve agrees
+    with the risk pooling simulation of the same seed.
+
+    Parameters:
+    -----------
+    accident_probability : float
+        The probability of an accident
+    min_n : int
+        Smallest pool size shown
+    max_n : int
+        Largest pool size shown
+    seed : int
+        Random seed for reproducibility
+    rng : numpy.random.Generator
+        Generator for the simulated accidents; defaults to the prefix-stable
+        policyholder stream of seed
+
+    Returns:
+    --------
+    result : PoolConvergenceResult
+        The ratio curve and the analytic 99% band
+    """
+    # Counts never exceed max_n, so the smallest unsigned type that holds it is enough
+    count_type = np.min_scalar_type(max_n)
+
+    # Cumulative claim count for every prefix of the stream
+    if rng is None:
+        cumulative_claims = np.cumsum(policyholder_accidents(max_n, accident_probability, seed), dtype=count_type)
+    else:
+        # Built chunk by chunk so only one chunk of uniforms is held at a time
+        cumulative_claims = np.empty(max_n, dtype=count_type)
+        running_total = 0
+        for start in range(0, max_n, SIMULATION_CHUNK_SIZE):
+            stop = min(start + SIMULATION_CHUNK_SIZE, max_n)
+            chunk_claims = np.cumsum(rng.random(stop - start) < accident_probability, dtype=count_type)
+            cumulative_claims[start:stop] = chunk_claims + running_total
+            running_total += int(chunk_claims[-1])
+    cumulative_claims.flags.writeable = False
+
+    # Keep log-spaced pool sizes only (claim amount cancels out of Actual/Expected)
+    prefix_sizes = np.unique(np.geomspace(min_n, max_n, NUM_PLOT_POINTS).astype(np.int64))
+    expected_claims = prefix_sizes * accident_probability
+    ratios = cumulative_claims[prefix_sizes - 1] / expected_claims
+
+    # Analytic 99% band - the same interval that sets the insurer's perspective y-axis
+    lower_claims, upper_claims = claims_99_interval(prefix_sizes, accident_probability)
+
+    return PoolConvergenceResult(
+        accident_probability=accident_probability,
+        min_n=min_n,
+        max_n=max_n,
+        seed=seed,
+        cumulative_claims=cumulative_claims,
+        prefix_sizes=prefix_sizes,
+        ratios=ratios,
+        band_lower=np.maximum(lower_claims, 0) / expected_claims,
+        band_upper=upper_claims / expected_claims
+    )
+
+
+def render_pool_convergence(result):
+    """
+    Draws the Actual/Expected ratio against pool size with the 99% band
+
+    Parameters:
+    -----------
+    result : PoolConvergenceResult
+        Output of simulate_pool_convergence
+
+    Returns:
+    --------
+    fig : matplotlib.figure.Figure
+        The figure object
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    fig = Figure(figsize=(14, 6))
+    ax = fig.add_subplot(111)
+
+    ax.fill_between(result.prefix_sizes, result.band_lower, result.band_upper,
+                    color='#2ECC71', alpha=0.2, label='99% band (analytic)')
+    ax.plot(result.prefix_sizes, result.ratios, color='#3498DB', linewidth=1.5,
+            label='Actual/Expected as the pool grows')
+    ax.axhline(1.0, color='#2C3E50', linestyle='--', alpha=0.7, label='Expected (1.0)')
+
+    ax.set_xscale('log')
+    ax.set_xlim(result.min_n, result.max_n)
+    # Keep the y-axis readable when tiny pools produce huge ratios
+    y_limit = min(max(np.max(result.band_upper), np.max(result.ratios)) * 1.05, 5.0)
+    ax.set_ylim(0, y_limit)
+    ax.set_xlabel('Number of Policyholders (log scale)')
+    ax.set_ylabel('Actual / Expected Losses')
+    ax.set_title(f'Law of Large Numbers: Actual/Expected Ratio (Accident Probability {result.accident_probability:.0%})')
+    ax.xaxis.set_major_formatter(FuncFormatter(lambda x, _: '{:,.0f}'.format(x)))
+    ax.grid(True, which='both', alpha=0.3)
+    ax.legend(loc='upper right')
+
+    fig.subplots_adjust(left=0.08, right=0.95, top=0.9, bottom=0.12)
+
+    return fig
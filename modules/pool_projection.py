@@ -0,0 +1,217 @@
+import numpy as np
+from dataclasses import dataclass
+from functools import cached_property
+
+from modules.cache import figure_to_png
+from modules.risk_pooling import CLAIM_AMOUNT
+from modules.rng import data_rng, jitter_rng
+
+# Number of individual scenario paths drawn over the percentile bands
+SAMPLE_PATHS = 20
+
+
+@dataclass(frozen=True)
+class PoolProjectionResult:
+    """
+    Multi-year capital reserve paths of an insurance pool (no plotting involved)
+
+    Attributes:
+    -----------
+    accident_probability : float
+        The probability of an accident
+    num_policyholders : int
+        The number of policyholders
+    num_years : int
+        Number of simulated years
+    num_scenarios : int
+        Number of simulated scenarios
+    seed : int
+        Random seed used for the simulation
+    annual_premium : float
+        Premiums collected by the pool each year
+    initial_capital : float
+        Capital reserve at the start of year 1
+    capital : numpy.ndarray
+        Capital reserve at the end of each year, shape (num_years, num_scenarios)
+    time_to_ruin : numpy.ndarray
+        First year the reserve fell below zero for each scenario (0 = never ruined)
+    """
+    accident_probability: float
+    num_policyholders: int
+    num_years: int
+    num_scenarios: int
+    seed: int
+    annual_premium: float
+    initial_capital: float
+    capital: np.ndarray
+    time_to_ruin: np.ndarray
+
+    @property
+    def ruined(self):
+        return self.time_to_ruin > 0
+
+    @property
+    def ruin_probability(self):
+        return float(np.mean(self.ruined))
+
+    @property
+    def ruin_probability_by_year(self):
+        """Cumulative probability of ruin by the end of each year"""
+        first_ruin_counts = np.bincount(self.time_to_ruin, minlength=self.num_years + 1)[1:]
+        return np.cumsum(first_ruin_counts) / self.num_scenarios
+
+    @cached_property
+    def stats(self):
+        """Key statistics of the projection"""
+        ruined = self.ruined
+        final_capital = self.capital[-1]
+        return {
+            'num_years': self.num_years,
+            'num_scenarios': self.num_scenarios,
+            'annual_premium': self.annual_premium,
+            'initial_capital': self.initial_capital,
+            'ruin_probability': self.ruin_probability,
+            'mean_time_to_ruin': float(np.mean(self.time_to_ruin[ruined])) if ruined.any() else None,
+            'median_time_to_ruin': float(np.median(self.time_to_ruin[ruined])) if ruined.any() else None,
+            'median_final_capital': float(np.median(final_capital)),
+            'final_capital_p5': float(np.percentile(final_capital, 5)),
+            'final_capital_p95': float(np.percentile(final_capital, 95)),
+            'seed': self.seed
+        }
+
+    @cached_property
+    def figure(self):
+        """The capital projection chart, built on first access"""
+        return render_pool_projection(self)
+
+    @cached_property
+    def png(self):
+        """The capital projection chart encoded as PNG bytes (the Figure itself is not kept)"""
+        return figure_to_png(render_pool_projection(self))
+
+
+def simulate_pool_projection(accident_probability=0.05, num_policyholders=1000, num_years=50, num_scenarios=10000,
+                             initial_capital_ratio=0.1, premium_loading=0.05, seed=42, rng=None):
+    """
+    Simulates the pool's capital reserve over many years and scenarios in one vectorized pass
+
+    Parameters:
+    -----------
+    accident_probability : float
+        The probability of an accident
+    num_policyholders : int
+        The number of policyholders
+    num_years : int
+        Number of years to project
+    num_scenarios : int
+        Number of independent scenarios
+    initial_capital_ratio : float
+        Capital reserve at the start as a share of one year's premiums (0.1 = 10%)
+    premium_loading : float
+        Margin added to the fair premium (0.05 charges 5% above expected losses)
+    seed : int
+        Random seed for reproducibility
+    rng : numpy.random.Generator
+        Generator for the simulated claims; defaults to the data stream of seed
+
+    Returns:
+    --------
+    result : PoolProjectionResult
+        The capital paths and time to ruin of every scenario
+    """
+    # Use a private Generator instead of the global NumPy state
+    if rng is None:
+        rng = data_rng(seed)
+
+    annual_premium = accident_probability * CLAIM_AMOUNT * (1 + premium_loading) * num_policyholders
+    initial_capital = initial_capital_ratio * annual_premium
+
+    # Claim counts for every (year, scenario) cell - Binomial(n, p) each, no per-person arrays
+    claim_counts = rng.binomial(num_policyholders, accident_probability, size=(num_years, num_scenarios))
+
+    # Accumulate the yearly surplus/deficit into a capital reserve path
+    annual_result = annual_premium - claim_counts * float(CLAIM_AMOUNT)
+    capital = initial_capital + np.cumsum(annual_result, axis=0)
+
+    # Ruin is the first year the reserve falls below zero (0 = never ruined)
+    below_zero = capital < 0
+    time_to_ruin = np.where(below_zero.any(axis=0), below_zero.argmax(axis=0) + 1, 0)
+
+    return PoolProjectionResult(
+        accident_probability=accident_probability,
+        num_policyholders=num_policyholders,
+        num_years=num_years,
+        num_scenarios=num_scenarios,
+        seed=seed,
+        annual_premium=annual_premium,
+        initial_capital=initial_capital,
+        capital=capital,
+        time_to_ruin=time_to_ruin
+    )
+
+
+def render_pool_projection(result):
+    """
+    Draws the capital reserve fan chart and the cumulative ruin probability
+
+    Parameters:
+    -----------
+    result : PoolProjectionResult
+        Output of simulate_pool_projection
+
+    Returns:
+    --------
+    fig : matplotlib.figure.Figure
+        The figure object
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    years = np.arange(0, result.num_years + 1)
+    # Prepend the starting capital so every path begins at year 0
+    capital = np.vstack([np.full(result.num_scenarios, result.initial_capital), result.capital])
+
+    fig = Figure(figsize=(14, 6))
+    ax1 = fig.add_subplot(121)
+    ax2 = fig.add_subplot(122)
+
+    # Plot 1: Percentile bands of the capital reserve
+    p5, p25, p50, p75, p95 = np.percentile(capital, [5, 25, 50, 75, 95], axis=1)
+    ax1.fill_between(years, p5, p95, color='#3498DB', alpha=0.2, label='5th-95th percentile')
+    ax1.fill_between(years, p25, p75, color='#3498DB', alpha=0.4, label='25th-75th percentile')
+    ax1.plot(years, p50, color='#2C3E50', linewidth=2, label='Median')
+
+    # A few individual scenarios for texture (choice drawn from the jitter stream)
+    sample = jitter_rng(result.seed).choice(result.num_scenarios, size=min(SAMPLE_PATHS, result.num_scenarios),
+                                            replace=False)
+    ax1.plot(years, capital[:, sample], color='gray', alpha=0.3, linewidth=0.8)
+
+    ax1.axhline(0, color='red', linestyle='--', alpha=0.7, label='Ruin (capital < 0)')
+    ax1.set_xlabel('Year')
+    ax1.set_ylabel('Capital Reserve ($)')
+    ax1.set_title(f'Capital Reserve over {result.num_years} Years ({result.num_scenarios:,} scenarios)')
+    ax1.yaxis.set_major_formatter(FuncFormatter(lambda x, _: '${:,.0f}'.format(x)))
+    ax1.grid(True, alpha=0.3)
+    ax1.legend(loc='upper left')
+
+    # Plot 2: Cumulative probability of ruin
+    ruin_by_year = result.ruin_probability_by_year
+    ax2.plot(years[1:], ruin_by_year, color='#E74C3C', linewidth=2)
+    ax2.fill_between(years[1:], 0, ruin_by_year, color='#E74C3C', alpha=0.2)
+    ax2.set_xlabel('Year')
+    ax2.set_ylabel('Probability of Ruin')
+    ax2.set_title('Cumulative Probability of Ruin')
+    ax2.set_ylim(0, max(0.05, ruin_by_year[-1] * 1.2))
+    ax2.yaxis.set_major_formatter(FuncFormatter(lambda x, _: '{:.0%}'.format(x)))
+    ax2.grid(True, alpha=0.3)
+
+    stats = result.stats
+    ruin_text = f"Probability of ruin: {stats['ruin_probability']:.1%}"
+    if stats['mean_time_to_ruin'] is not None:
+        ruin_text += f"\nAverage time to ruin: {stats['mean_time_to_ruin']:.1f} years"
+    ax2.text(0.05, 0.95, ruin_text, transform=ax2.transAxes, ha='left', va='top',
+             bbox=dict(boxstyle="round,pad=0.5", facecolor="wheat", alpha=0.8))
+
+    fig.subplots_adjust(left=0.1, right=0.95, top=0.9, bottom=0.1, wspace=0.3)
+
+    return fig
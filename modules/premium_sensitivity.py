@@ -0,0 +1,185 @@
+import numpy as np
+from dataclasses import dataclass
+from functools import cached_property
+
+from modules.cache import figure_to_png
+from modules.premium_calculation import EXPENSE_RATIO, RISK_MARGIN_RATIO, premium_columns
+
+# Points along each axis of a sensitivity surface
+SURFACE_POINTS = 1000
+
+# Axis ranges of the surfaces
+EXPENSE_RATIO_RANGE = (0.0, 0.50)
+RISK_MARGIN_RANGE = (0.0, 0.20)
+FREQUENCY_RANGE = (0.01, 0.30)
+SEVERITY_RANGE = (2000, 30000)
+
+# Contour lines drawn on each heatmap, traced on at most this many points per axis (the surfaces are smooth)
+NUM_CONTOURS = 8
+CONTOUR_POINTS = 100
+
+
+@dataclass(frozen=True)
+class PremiumSensitivityResult:
+    """
+    Two slices through the premium surface around one pricing point
+
+    loading_surface varies the loadings at the point's frequency and
+    severity (rows = risk margin, columns = expense ratio); loss_surface
+    varies frequency and severity at the point's loadings (rows = severity,
+    columns = frequency).
+    """
+    frequency: float
+    severity: float
+    expense_ratio: float
+    risk_margin_ratio: float
+    expense_ratios: np.ndarray
+    risk_margin_ratios: np.ndarray
+    frequencies: np.ndarray
+    severities: np.ndarray
+    loading_surface: np.ndarray
+    loss_surface: np.ndarray
+
+    @cached_property
+    def premium(self):
+        return float(premium_columns(self.frequency, self.severity, self.expense_ratio,
+                                     self.risk_margin_ratio).premium)
+
+    @cached_property
+    def stats(self):
+        """Premium at the pricing point and how fast it moves with each input"""
+        expected_loss = self.frequency * self.severity
+        retained = 1 - self.expense_ratio - self.risk_margin_ratio
+        return {
+            'premium': self.premium,
+            'expected_loss': expected_loss,
+            'loading_factor': 1 / retained,
+            # Premium = E / (1 - e - m), so one more point of either loading adds E / (1 - e - m)^2 per point
+            'premium_per_loading_point': expected_loss / retained ** 2 * 0.01,
+            'premium_per_frequency_point': self.severity / retained * 0.01,
+            'premium_per_1000_severity': self.frequency / retained * 1000,
+            'loading_surface_range': (float(self.loading_surface.min()), float(self.loading_surface.max())),
+            'loss_surface_range': (float(self.loss_surface.min()), float(self.loss_surface.max())),
+            'num_points': self.loading_surface.size + self.loss_surface.size
+        }
+
+    @cached_property
+    def figure(self):
+        """The sensitivity heatmaps, built on first access"""
+        return render_premium_sensitivity(self)
+
+    @cached_property
+    def png(self):
+        """The sensitivity heatmaps encoded as PNG bytes (the Figure itself is not kept)"""
+        return figure_to_png(render_premium_sensitivity(self))
+
+
+def premium_sensitivity(frequency=0.05, severity=8000, expense_ratio=EXPENSE_RATIO,
+                        risk_margin_ratio=RISK_MARGIN_RATIO, num_points=SURFACE_POINTS):
+    """
+    Evaluates the premium over dense grids of the loadings and of the expected loss
+
+    Both surfaces are single broadcasted calls to premium_columns: an
+    (n x 1) column against a (1 x n) row gives all n x n premiums at once,
+    so a 1000 x 1000 surface takes a few milliseconds.
+
+    Parameters:
+    -----------
+    frequency : float
+        Accident frequency of the pricing point
+    severity : float
+        Average claim amount of the pricing point
+    expense_ratio : float
+        Expense ratio of the pricing point
+    risk_margin_ratio : float
+        Risk margin ratio of the pricing point
+    num_points : int
+        Grid points along each axis
+
+    Returns:
+    --------
+    result : PremiumSensitivityResult
+        Both premium surfaces and their axes
+    """
+    expense_ratios = np.linspace(*EXPENSE_RATIO_RANGE, num_points)
+    risk_margin_ratios = np.linspace(*RISK_MARGIN_RANGE, num_points)
+    frequencies = np.linspace(*FREQUENCY_RANGE, num_points)
+    severities = np.linspace(*SEVERITY_RANGE, num_points)
+
+    loading_surface = premium_columns(frequency, severity, expense_ratios[None, :],
+                                      risk_margin_ratios[:, None]).premium
+    loss_surface = premium_columns(frequencies[None, :], severities[:, None], expense_ratio,
+                                   risk_margin_ratio).premium
+
+    return PremiumSensitivityResult(
+        frequency=frequency,
+        severity=severity,
+        expense_ratio=expense_ratio,
+        risk_margin_ratio=risk_margin_ratio,
+        expense_ratios=expense_ratios,
+        risk_margin_ratios=risk_margin_ratios,
+        frequencies=frequencies,
+        severities=severities,
+        loading_surface=loading_surface,
+        loss_surface=loss_surface
+    )
+
+
+def render_premium_sensitivity(result):
+    """
+    Draws both premium surfaces as heatmaps with contour lines
+
+    Parameters:
+    -----------
+    result : PremiumSensitivityResult
+        Output of premium_sensitivity
+
+    Returns:
+    --------
+    fig : matplotlib.figure.Figure
+        The figure object
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    fig = Figure(figsize=(14, 6))
+    ax1 = fig.add_subplot(121)
+    ax2 = fig.add_subplot(122)
+    dollars = FuncFormatter(lambda x, _: '${:,.0f}'.format(x))
+    percent = FuncFormatter(lambda x, _: '{:.0%}'.format(x))
+    # Risk margin ticks fall on half points (2.5%, 7.5%, ...)
+    fine_percent = FuncFormatter(lambda x, _: '{:g}%'.format(round(x * 100, 1)))
+
+    panels = [
+        (ax1, result.expense_ratios, result.risk_margin_ratios, result.loading_surface,
+         (result.expense_ratio, result.risk_margin_ratio), 'Expense Ratio', 'Risk Margin',
+         f'Premium by Loadings (Frequency {result.frequency:.1%}, Severity ${result.severity:,.0f})', percent,
+         fine_percent),
+        (ax2, result.frequencies, result.severities, result.loss_surface,
+         (result.frequency, result.severity), 'Accident Frequency', 'Claim Severity ($)',
+         f'Premium by Expected Loss (Expenses {result.expense_ratio:.0%}, Margin {result.risk_margin_ratio:.0%})',
+         percent, dollars)
+    ]
+
+    for ax, x, y, surface, point, x_label, y_label, title, x_format, y_format in panels:
+        image = ax.imshow(surface, origin='lower', aspect='auto', cmap='viridis',
+                          extent=(x[0], x[-1], y[0], y[-1]))
+        step = max(len(x) // CONTOUR_POINTS, 1)
+        contours = ax.contour(x[::step], y[::step], surface[::step, ::step], levels=NUM_CONTOURS, colors='white',
+                              linewidths=0.8, alpha=0.8)
+        ax.clabel(contours, fmt=lambda level: f'${level:,.0f}', fontsize=8)
+        ax.plot(*point, marker='o', linestyle='none', color='#E74C3C', markeredgecolor='white', markersize=10,
+                label=f'Current premium: ${result.premium:,.2f}')
+        colorbar = fig.colorbar(image, ax=ax)
+        colorbar.set_label('Premium ($)')
+        colorbar.ax.yaxis.set_major_formatter(dollars)
+        ax.set_xlabel(x_label)
+        ax.set_ylabel(y_label)
+        ax.set_title(title, fontsize=11)
+        ax.xaxis.set_major_formatter(x_format)
+        ax.yaxis.set_major_formatter(y_format)
+        ax.legend(loc='upper left')
+
+    fig.subplots_adjust(left=0.07, right=0.97, top=0.9, bottom=0.12, wspace=0.25)
+
+    return fig
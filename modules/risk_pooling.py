@@ -1,216 +1,363 @@
+import threading
 import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
-from matplotlib.figure import Figure
+from dataclasses import dataclass, field
+from typing import Optional
+from functools import cached_property
 
+from modules.cache import LRUCache, figure_to_png
+from modules.correlated_risk import conditional_accident_probabilities
+from modules.rng import data_rng, jitter_rng, prefix_stable_uniforms
 
-def demonstrate_risk_pooling(accident_probability=0.05, num_policyholders=100, seed=42, return_fig=False):
-    """
-    Demonstrates the concept of risk pooling in insurance
+# Fixed claim amount at $20,000
+CLAIM_AMOUNT = 20000
 
-    Parameters:
-    -----------
-    accident_probability : float
-        The probability of an accident
-    num_policyholders : int
-        The number of policyholders
-    seed : int
-        Random seed for reproducibility
-    return_fig : bool
-        If True, returns the figure and stats for Shiny integration
+# Above this many policyholders the individual outcomes are drawn as counts instead of one point per person
+SCATTER_MAX_POINTS = 2000
 
-    Returns:
-    --------
-    fig : matplotlib.figure.Figure
-        The figure object (if return_fig is True)
-    stats : dict
-        Key statistics (if return_fig is True)
-    """
-    # Fixed claim amount at $20,000
-    CLAIM_AMOUNT = 20000
+# Uniforms are drawn in blocks of this size so large pools never hold a full float64 array
+SIMULATION_CHUNK_SIZE = 1_000_000
 
-    # Set random seed for consistent results
-    np.random.seed(seed)
+# Pools up to this size take their outcomes from the prefix-stable policyholder stream (1 byte per person);
+# larger pools (up to the app's 10^9) draw their claim count from a binomial and change with the pool size
+PREFIX_STABLE_MAX_POLICYHOLDERS = 10_000_000
 
-    # Run the simulation - generate random accidents
-    accidents = np.random.random(num_policyholders) < accident_probability
 
-    # Calculate results
-    individual_costs = np.where(accidents, CLAIM_AMOUNT, 0)
-    total_losses = np.sum(individual_costs)
-    fair_premium = accident_probability * CLAIM_AMOUNT
-    pool_premium_total = fair_premium * num_policyholders
+@dataclass
+class AccidentPrefix:
+    """
+    Per-person accidents of the first policyholders of one seed's pool
 
-    # Calculate stats
-    num_with_loss = np.sum(accidents)
-    percent_with_loss = np.mean(accidents) * 100
-    pool_performance = total_losses / pool_premium_total
+    Only buffer[:length] is filled; the buffer doubles when it runs out, so
+    growing the pool one policyholder at a time is amortized O(1) each.
+    Filled entries never change, so views handed out stay valid. Sessions
+    share prefixes through accident_prefixes, so lock must be held while
+    growing or slicing.
+    """
+    buffer: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=bool))
+    length: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
 
-    # For Shiny integration
-    if return_fig:
-        # Create figure
-        fig = Figure(figsize=(14, 7))
 
-        # Create subplots
-        ax1 = fig.add_subplot(121)
-        ax2 = fig.add_subplot(122)
+# Pools simulated so far, by (seed, year probability); a larger pool only draws the newcomers
+accident_prefixes = LRUCache(maxsize=32, maxbytes=128 * 1024 ** 2)
 
-        # Plot 1: Individual outcomes with improved visualization
-        # Always show all policyholders for complete consistency with pooled outcomes
-        display_n = num_policyholders
-        outcomes_label = f'Individual outcomes (n={display_n})'
-
-        # Blue bar chart for individual outcomes
-        ax1.bar(
-            ['Without Insurance'],
-            [CLAIM_AMOUNT],
-            color='lightblue',
-            alpha=0.3,
-            width=0.6,
-            label='Potential loss amount'
-        )
 
-        # Overlay scatter plot showing actual outcomes
-        x_positions = np.ones(display_n) * 0  # All points at x=0 ("Without Insurance")
-        y_positions = individual_costs[:display_n]  # Each person's actual outcome
+def policyholder_accidents(num_policyholders, year_probability, seed):
+    """
+    Accidents of the first num_policyholders of a seed's prefix-stable pool
 
-        # Add jitter to x positions for better visualization
-        x_jitter = np.random.uniform(-0.2, 0.2, size=display_n)
-        x_positions += x_jitter
+    Policyholder i always gets the same uniform draw for a seed (see
+    prefix_stable_uniforms), so a pool of n is the pool of k < n plus n - k
+    newcomers: growing the pool costs O(n - k) and shrinking it is a slice.
+    Concurrent sessions asking for the same seed grow the shared prefix one
+    at a time under its lock.
 
-        # Plot the actual outcomes as scatter points
-        ax1.scatter(
-            x_positions,
-            y_positions,
-            color='blue',
-            alpha=0.7,
-            label=outcomes_label
-        )
+    Returns:
+    --------
+    accidents : numpy.ndarray
+        Read-only boolean array, True for each policyholder who had an accident
+    """
+    prefix = accident_prefixes.get_or_create((seed, year_probability), AccidentPrefix)
+    with prefix.lock:
+        if prefix.length < num_policyholders:
+            if len(prefix.buffer) < num_policyholders:
+                capacity = max(num_policyholders, min(2 * len(prefix.buffer), PREFIX_STABLE_MAX_POLICYHOLDERS))
+                buffer = np.empty(capacity, dtype=bool)
+                buffer[:prefix.length] = prefix.buffer[:prefix.length]
+                prefix.buffer = buffer
+            # Drawn in chunks so 10^7 policyholders only need the boolean array
+            for start in range(prefix.length, num_policyholders, SIMULATION_CHUNK_SIZE):
+                stop = min(start + SIMULATION_CHUNK_SIZE, num_policyholders)
+                prefix.buffer[start:stop] = prefix_stable_uniforms(seed, start, stop) < year_probability
+            prefix.length = num_policyholders
+
+        accidents = prefix.buffer[:num_policyholders]
+    accidents.flags.writeable = False
+    return accidents
+
+
+@dataclass(frozen=True)
+class RiskPoolingResult:
+    """
+    Outcome of a single risk pooling simulation (no plotting involved)
 
-        # Add a bar for premium with insurance
-        ax1.bar(
-            ['With Insurance'],
-            [fair_premium],
-            color='green',
-            alpha=0.7,
-            width=0.6,
-            label='Insurance premium'
-        )
+    The figure is only built the first time ``figure`` is accessed, so text
+    outputs that only need ``stats`` never pay for a chart.
 
-        # Calculate statistics for displayed individuals only
-        displayed_accidents = accidents[:display_n]
-        displayed_with_loss = np.sum(displayed_accidents)
-        
-        # Annotation showing how many people experienced a loss
-        ax1.annotate(
-            f"{displayed_with_loss} out of {display_n} people\nexperienced a ${CLAIM_AMOUNT:,} loss",
-            xy=(0, CLAIM_AMOUNT / 2),
-            xytext=(0, CLAIM_AMOUNT * 0.7),
-            ha='center',
-            bbox=dict(boxstyle="round,pad=0.3", facecolor="lightblue", alpha=0.8)
-        )
+    Attributes:
+    -----------
+    accident_probability : float
+        The probability of an accident
+    num_policyholders : int
+        The number of policyholders
+    seed : int
+        Random seed used for the simulation
+    accidents : numpy.ndarray or None
+        Boolean array, True for each policyholder who had an accident
+        (None when only the claim count was simulated)
+    num_with_loss : int
+        Number of policyholders who had an accident
+    total_losses : float
+        Total claims paid by the pool
+    fair_premium : float
+        Premium charged to each policyholder (expected loss)
+    pool_premium_total : float
+        Total premiums collected by the pool
+    claim_amount : float
+        Fixed claim amount per accident
+    correlation : float
+        Latent correlation between policyholders (0 = independent)
+    year_probability : float
+        Accident probability of this simulated year given the common shock
+        (equals accident_probability when correlation is 0)
+    """
+    accident_probability: float
+    num_policyholders: int
+    seed: int
+    accidents: Optional[np.ndarray]
+    num_with_loss: int
+    total_losses: float
+    fair_premium: float
+    pool_premium_total: float
+    claim_amount: float = CLAIM_AMOUNT
+    correlation: float = 0.0
+    year_probability: Optional[float] = None
+
+    @property
+    def percent_with_loss(self):
+        return self.num_with_loss / self.num_policyholders * 100 if self.num_policyholders > 0 else 0
+
+    @property
+    def pool_performance(self):
+        return self.total_losses / self.pool_premium_total
+
+    @property
+    def individual_costs(self):
+        if self.accidents is None:
+            raise ValueError("Per-person outcomes were not simulated (per_person=False)")
+        return np.where(self.accidents, self.claim_amount, 0)
+
+    @property
+    def stats(self):
+        """Key statistics as the dictionary returned by demonstrate_risk_pooling"""
+        # Always show all policyholders for complete consistency with pooled outcomes
+        return {
+            'num_with_loss': self.num_with_loss,
+            'percent_with_loss': self.percent_with_loss,
+            'displayed_num_with_loss': self.num_with_loss,
+            'displayed_percent_with_loss': self.percent_with_loss,
+            'display_n': self.num_policyholders,
+            'fair_premium': self.fair_premium,
+            'total_losses': self.total_losses,
+            'pool_premium_total': self.pool_premium_total,
+            'pool_performance': self.pool_performance,
+            'correlation': self.correlation,
+            'year_probability': self.year_probability,
+            'seed': self.seed  # Include seed in stats
+        }
 
-        # Annotation explaining insurance premium
-        ax1.annotate(
-            f"Everyone pays\n${fair_premium:,.0f}",
-            xy=(1, fair_premium / 2),
-            xytext=(1, fair_premium * 1.5),
-            ha='center',
-            bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgreen", alpha=0.8)
-        )
+    @cached_property
+    def figure(self):
+        """The risk pooling chart, built on first access"""
+        return render_risk_pooling(self)
 
-        ax1.set_ylabel('Cost ($)')
-        ax1.set_title(f'Individual Risk Outcomes vs Pooled Outcomes')
-        ax1.grid(axis='y', alpha=0.3)
-        ax1.legend(loc='upper center')
+    @cached_property
+    def png(self):
+        """The risk pooling chart encoded as PNG bytes (the Figure itself is not kept)"""
+        return figure_to_png(render_risk_pooling(self))
 
-        # Set y-axis limit to ensure visibility of premium
-        ax1.set_ylim(0, CLAIM_AMOUNT * 1.1)
 
-        # Plot 2: Pooled outcome (insurer perspective)
-        ax2.bar(['Premiums Collected', 'Actual Losses'],
-                [pool_premium_total, total_losses],
-                color=['green', 'blue'], alpha=0.7)
-        ax2.set_ylabel('Amount ($)')
-        ax2.set_title(f'Insurer\'s Perspective')
+def claims_99_interval(num_policyholders, accident_probability):
+    """
+    99% interval for the number of claims in a pool
 
-        # Calculate expected maximum loss at 99% confidence level based on binomial distribution
-        # This helps keep the y-axis consistent across different simulations
-        p = accident_probability
-        n = num_policyholders
-        # Using normal approximation to binomial with continuity correction for 99% CI (2.576 is z-score for 99%)
-        max_expected_claims = n * p + 2.576 * np.sqrt(n * p * (1 - p)) + 0.5
-        max_expected_loss = max_expected_claims * CLAIM_AMOUNT
+    Uses the normal approximation to the binomial with continuity correction
+    (2.576 is the z-score for 99%). Works elementwise on arrays of pool sizes.
 
-        # Set y-axis to use the consistent 99% CI maximum
-        y_max = max(max_expected_loss, total_losses) * 1.1  # Add 10% margin
-        ax2.set_ylim(0, y_max)
+    Returns:
+    --------
+    lower, upper : float or numpy.ndarray
+        Lower and upper bounds on the claim count
+    """
+    n = num_policyholders
+    p = accident_probability
+    half_width = 2.576 * np.sqrt(n * p * (1 - p)) + 0.5
+    return n * p - half_width, n * p + half_width
 
-        ax2.grid(True, alpha=0.3)
 
-        # Add explanatory text
-        performance_text = "Surplus" if pool_performance < 1 else "Deficit"
-        performance_color = "green" if pool_performance < 1 else "red"
+def simulate_risk_pooling(accident_probability=0.05, num_policyholders=100, seed=42, rng=None, per_person=None,
+                          correlation=0.0, dependence='gaussian'):
+    """
+    Runs the risk pooling simulation without building any figure
 
-        ax2.text(0.5, 0.95,
-                 f"Expected losses: ${pool_premium_total:,.0f}\nActual losses: ${total_losses:,.0f}\n{performance_text}: ${abs(pool_premium_total - total_losses):,.0f}",
-                 transform=ax2.transAxes, ha='center', va='top',
-                 bbox=dict(boxstyle="round,pad=0.5", facecolor="wheat", alpha=0.8))
+    Parameters:
+    -----------
+    accident_probability : float
+        The probability of an accident
+    num_policyholders : int
+        The number of policyholders
+    seed : int
+        Random seed for reproducibility
+    rng : numpy.random.Generator
+        Generator for the simulated accidents. By default the common shock comes
+        from the data stream of seed and, for pools of up to
+        PREFIX_STABLE_MAX_POLICYHOLDERS, the outcomes (or just their count) from
+        its prefix-stable policyholder stream, so resizing the pool keeps the
+        same people and only simulates the newcomers. Larger pools draw their
+        claim count from a binomial on the data stream, so they are not
+        prefix-stable.
+    per_person : bool
+        If True, keeps every policyholder's outcome in the result; if False, keeps
+        only the claim count (a binomial draw above PREFIX_STABLE_MAX_POLICYHOLDERS,
+        O(1) time and memory for any pool size). Defaults to per-person outcomes
+        only when they are displayed as a scatter.
+    correlation : float
+        Latent correlation between policyholders. Above 0, one common shock
+        (e.g. a hail year) is drawn first and every policyholder then has an
+        accident with the shocked probability - no n x n matrix is needed.
+    dependence : str
+        'gaussian' or 't' copula for the common shock
 
-        # Add annotation for ratio
-        ax2.text(1, total_losses + 0.05 * max(pool_premium_total, total_losses),
-                 f"Actual/Expected: {pool_performance:.2f}", ha='center', color=performance_color)
+    Returns:
+    --------
+    result : RiskPoolingResult
+        The simulated accidents and pool totals
+    """
+    # Outcomes of the seed's own streams are stable as the pool grows, up to the prefix limit
+    prefix_stable = rng is None and num_policyholders <= PREFIX_STABLE_MAX_POLICYHOLDERS
+
+    # Use a private Generator instead of the global NumPy state
+    if rng is None:
+        rng = data_rng(seed)
+
+    if per_person is None:
+        per_person = num_policyholders <= SCATTER_MAX_POINTS
+
+    # Given the common shock policyholders are independent, so both paths below just use this year's probability
+    year_probability = accident_probability
+    if correlation > 0:
+        year_probability = float(conditional_accident_probabilities(accident_probability, correlation, 1, rng,
+                                                                    dependence=dependence)[0])
+
+    if prefix_stable:
+        accidents = policyholder_accidents(num_policyholders, year_probability, seed)
+        num_with_loss = int(np.count_nonzero(accidents))
+        if not per_person:
+            accidents = None
+    elif per_person:
+        # Run the simulation - generate random accidents
+        # Drawn in chunks so 10^7 policyholders only need the boolean array (same stream as a single draw)
+        accidents = np.empty(num_policyholders, dtype=bool)
+        for start in range(0, num_policyholders, SIMULATION_CHUNK_SIZE):
+            stop = min(start + SIMULATION_CHUNK_SIZE, num_policyholders)
+            accidents[start:stop] = rng.random(stop - start) < year_probability
+        num_with_loss = int(np.sum(accidents))
+    else:
+        # Count-only fast path: the number of accidents in the pool is Binomial(n, p)
+        accidents = None
+        num_with_loss = int(rng.binomial(num_policyholders, year_probability))
 
-        # Remove seed text from figure
-        # fig.text(0.5, 0.01, f"Simulation Seed: {seed}", ha='center',
-        #          fontsize=12, bbox=dict(facecolor='lightgray', alpha=0.5))
+    # Calculate results
+    total_losses = num_with_loss * CLAIM_AMOUNT
+    fair_premium = accident_probability * CLAIM_AMOUNT
+    pool_premium_total = fair_premium * num_policyholders
 
-        # Use subplots_adjust for more reliable layout
-        fig.subplots_adjust(left=0.1, right=0.95, top=0.9, bottom=0.1, wspace=0.3)
+    return RiskPoolingResult(
+        accident_probability=accident_probability,
+        num_policyholders=num_policyholders,
+        seed=seed,
+        accidents=accidents,
+        num_with_loss=num_with_loss,
+        total_losses=total_losses,
+        fair_premium=fair_premium,
+        pool_premium_total=pool_premium_total,
+        correlation=correlation,
+        year_probability=year_probability
+    )
+
+
+def render_risk_pooling(result, fig=None, show_seed=False):
+    """
+    Draws the risk pooling charts for a simulation result
 
-        # Return the figure and key statistics
-        displayed_percent_with_loss = (displayed_with_loss / display_n) * 100 if display_n > 0 else 0
-        stats = {
-            'num_with_loss': num_with_loss,
-            'percent_with_loss': percent_with_loss,
-            'displayed_num_with_loss': displayed_with_loss,
-            'displayed_percent_with_loss': displayed_percent_with_loss,
-            'display_n': display_n,
-            'fair_premium': fair_premium,
-            'total_losses': total_losses,
-            'pool_premium_total': pool_premium_total,
-            'pool_performance': pool_performance,
-            'seed': seed  # Include seed in stats
-        }
+    Pools larger than SCATTER_MAX_POINTS (or simulated without per-person
+    outcomes) show the individual outcomes as two count-sized markers
+    (loss / no loss) instead of one scatter point per person, so render time
+    and PNG size stay flat at millions of policyholders.
 
-        return fig, stats
+    Parameters:
+    -----------
+    result : RiskPoolingResult
+        Output of simulate_risk_pooling
+    fig : matplotlib.figure.Figure
+        Figure to draw on; a new 14x7 Figure is created if None
+    show_seed : bool
+        If True, the seed is shown in the titles and below the charts
 
-    # Original function for compatibility
-    else:
-        # Create figure
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 7))
+    Returns:
+    --------
+    fig : matplotlib.figure.Figure
+        The figure object
+    """
+    # matplotlib is imported on first render, so importing the module (and the app) stays cheap
+    from matplotlib.figure import Figure
+
+    claim_amount = result.claim_amount
+    fair_premium = result.fair_premium
+    pool_premium_total = result.pool_premium_total
+    total_losses = result.total_losses
+    pool_performance = result.pool_performance
+    seed_suffix = f" (Seed: {result.seed})" if show_seed else ""
+
+    # Create figure
+    if fig is None:
+        fig = Figure(figsize=(14, 7))
 
-        # Plot 1: Individual outcomes with improved visualization
-        # Always show all policyholders for complete consistency with pooled outcomes
-        display_n = num_policyholders
-        outcomes_label = f'Individual outcomes (n={display_n})'
-
-        # Blue bar chart for individual outcomes
-        ax1.bar(
-            ['Without Insurance'],
-            [CLAIM_AMOUNT],
-            color='lightblue',
-            alpha=0.3,
-            width=0.6,
-            label='Potential loss amount'
+    # Create subplots
+    ax1 = fig.add_subplot(121)
+    ax2 = fig.add_subplot(122)
+
+    # Plot 1: Individual outcomes with improved visualization
+    # Always show all policyholders for complete consistency with pooled outcomes
+    display_n = result.num_policyholders
+    aggregated = result.accidents is None or display_n > SCATTER_MAX_POINTS
+    outcomes_label = f'Individual outcomes (n={display_n:,})'
+
+    # Blue bar chart for individual outcomes
+    ax1.bar(
+        ['Without Insurance'],
+        [claim_amount],
+        color='lightblue',
+        alpha=0.3,
+        width=0.6,
+        label='Potential loss amount'
+    )
+
+    if aggregated:
+        # Binned strip: every outcome is either $0 or the claim amount, so draw one marker per bin
+        # with its area proportional to the share of people in that bin
+        num_without_loss = display_n - result.num_with_loss
+        shares = np.array([num_without_loss, result.num_with_loss]) / display_n
+        ax1.scatter(
+            [0, 0],
+            [0, claim_amount],
+            s=50 + 1500 * shares,
+            color='blue',
+            alpha=0.7,
+            clip_on=False,
+            label=f'Outcome counts (n={display_n:,})'
         )
-
+        ax1.text(0, claim_amount * 0.06, f"{num_without_loss:,} with no loss ({shares[0]:.1%})",
+                 ha='center', va='bottom', color='blue')
+        ax1.text(0, claim_amount * 0.94, f"{result.num_with_loss:,} with a loss ({shares[1]:.1%})",
+                 ha='center', va='top', color='blue')
+    else:
         # Overlay scatter plot showing actual outcomes
         x_positions = np.ones(display_n) * 0  # All points at x=0 ("Without Insurance")
-        y_positions = individual_costs[:display_n]  # Each person's actual outcome
+        y_positions = result.individual_costs[:display_n]  # Each person's actual outcome
 
-        # Add jitter to x positions for better visualization
-        x_jitter = np.random.uniform(-0.2, 0.2, size=display_n)
+        # Add jitter to x positions for better visualization (separate stream so it never shifts the data)
+        x_jitter = jitter_rng(result.seed).uniform(-0.2, 0.2, size=display_n)
         x_positions += x_jitter
 
         # Plot the actual outcomes as scatter points
@@ -222,75 +369,138 @@ def demonstrate_risk_pooling(accident_probability=0.05, num_policyholders=100, s
             label=outcomes_label
         )
 
-        # Add a bar for premium with insurance
-        ax1.bar(
-            ['With Insurance'],
-            [fair_premium],
-            color='green',
-            alpha=0.7,
-            width=0.6,
-            label='Insurance premium'
-        )
-
-        # Calculate statistics for displayed individuals only
-        displayed_accidents = accidents[:display_n]
-        displayed_with_loss = np.sum(displayed_accidents)
-        
-        # Annotation showing how many people experienced a loss
-        ax1.annotate(
-            f"{displayed_with_loss} out of {display_n} people\nexperienced a ${CLAIM_AMOUNT:,} loss",
-            xy=(0, CLAIM_AMOUNT / 2),
-            xytext=(0, CLAIM_AMOUNT * 0.7),
-            ha='center',
-            bbox=dict(boxstyle="round,pad=0.3", facecolor="lightblue", alpha=0.8)
-        )
+    # Add a bar for premium with insurance
+    ax1.bar(
+        ['With Insurance'],
+        [fair_premium],
+        color='green',
+        alpha=0.7,
+        width=0.6,
+        label='Insurance premium'
+    )
+
+    # Annotation showing how many people experienced a loss
+    ax1.annotate(
+        f"{result.num_with_loss:,} out of {display_n:,} people\nexperienced a ${claim_amount:,} loss",
+        xy=(0, claim_amount / 2),
+        xytext=(0, claim_amount * 0.7),
+        ha='center',
+        bbox=dict(boxstyle="round,pad=0.3", facecolor="lightblue", alpha=0.8)
+    )
+
+    # Annotation explaining insurance premium
+    ax1.annotate(
+        f"Everyone pays\n${fair_premium:,.0f}",
+        xy=(1, fair_premium / 2),
+        xytext=(1, fair_premium * 1.5),
+        ha='center',
+        bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgreen", alpha=0.8)
+    )
+
+    ax1.set_ylabel('Cost ($)')
+    ax1.set_title(f'Individual Risk Outcomes vs Pooled Outcomes{seed_suffix}')
+    ax1.grid(axis='y', alpha=0.3)
+    ax1.legend(loc='upper center', markerscale=0.3 if aggregated else 1.0)
+
+    # Set y-axis limit to ensure visibility of premium
+    ax1.set_ylim(0, claim_amount * 1.1)
+
+    # Plot 2: Pooled outcome (insurer perspective)
+    ax2.bar(['Premiums Collected', 'Actual Losses'],
+            [pool_premium_total, total_losses],
+            color=['green', 'blue'], alpha=0.7)
+    ax2.set_ylabel('Amount ($)')
+    ax2.set_title(f'Insurer\'s Perspective{seed_suffix}')
+
+    # Calculate expected maximum loss at 99% confidence level based on binomial distribution
+    # This helps keep the y-axis consistent across different simulations
+    _, max_expected_claims = claims_99_interval(result.num_policyholders, result.accident_probability)
+    max_expected_loss = max_expected_claims * claim_amount
+
+    # Set y-axis to use the consistent 99% CI maximum
+    y_max = max(max_expected_loss, total_losses) * 1.1  # Add 10% margin
+    ax2.set_ylim(0, y_max)
+
+    ax2.grid(True, alpha=0.3)
+
+    # Add explanatory text
+    performance_text = "Surplus" if pool_performance < 1 else "Deficit"
+    performance_color = "green" if pool_performance < 1 else "red"
+
+    ax2.text(0.5, 0.95,
+             f"Expected losses: ${pool_premium_total:,.0f}\nActual losses: ${total_losses:,.0f}\n{performance_text}: ${abs(pool_premium_total - total_losses):,.0f}",
+             transform=ax2.transAxes, ha='center', va='top',
+             bbox=dict(boxstyle="round,pad=0.5", facecolor="wheat", alpha=0.8))
+
+    # Add annotation for ratio
+    ax2.text(1, total_losses + 0.05 * max(pool_premium_total, total_losses),
+             f"Actual/Expected: {pool_performance:.2f}", ha='center', color=performance_color)
+
+    if show_seed:
+        # Add a text annotation with the seed value
+        fig.text(0.5, 0.01, f"Simulation Seed: {result.seed}", ha='center',
+                 fontsize=12, bbox=dict(facecolor='lightgray', alpha=0.5))
 
-        # Annotation explaining insurance premium
-        ax1.annotate(
-            f"Everyone pays\n${fair_premium:,.0f}",
-            xy=(1, fair_premium / 2),
-            xytext=(1, fair_premium * 1.5),
-            ha='center',
-            bbox=dict(boxstyle="round,pad=0.3", facecolor="lightgreen", alpha=0.8)
-        )
+        # Use subplots_adjust for more reliable layout
+        fig.subplots_adjust(left=0.08, right=0.95, top=0.9, bottom=0.15, wspace=0.3)
+    else:
+        # Use subplots_adjust for more reliable layout
+        fig.subplots_adjust(left=0.1, right=0.95, top=0.9, bottom=0.1, wspace=0.3)
 
-        ax1.set_ylabel('Cost ($)')
-        ax1.set_title(f'Individual Risk Outcomes vs Pooled Outcomes (Seed: {seed})')
-        ax1.grid(axis='y', alpha=0.3)
-        ax1.legend(loc='upper center')
+    return fig
 
-        # Set y-axis limit to ensure visibility of premium
-        ax1.set_ylim(0, CLAIM_AMOUNT * 1.1)
 
-        # Plot 2: Pooled outcome (insurer perspective)
-        ax2.bar(['Premiums Collected', 'Actual Losses'],
-                [pool_premium_total, total_losses],
-                color=['green', 'blue'], alpha=0.7)
-        ax2.set_ylabel('Amount ($)')
-        ax2.set_title(f'Insurer\'s Perspective (Seed: {seed})')
-        ax2.grid(True, alpha=0.3)
+def demonstrate_risk_pooling(accident_probability=0.05, num_policyholders=100, seed=42, return_fig=False,
+                             correlation=0.0, dependence='gaussian'):
+    """
+    Demonstrates the concept of risk pooling in insurance
 
-        # Add explanatory text
-        performance_text = "Surplus" if pool_performance < 1 else "Deficit"
-        performance_color = "green" if pool_performance < 1 else "red"
+    Parameters:
+    -----------
+    accident_probability : float
+        The probability of an accident
+    num_policyholders : int
+        The number of policyholders
+    seed : int
+        Random seed for reproducibility
+    return_fig : bool
+        If True, returns the figure and stats for Shiny integration
+    correlation : float
+        Latent correlation between policyholders (0 = independent, the classic demonstration)
+    dependence : str
+        'gaussian' or 't' copula for the common shock
 
-        ax2.text(0.5, 0.95,
-                 f"Expected losses: ${pool_premium_total:,.0f}\nActual losses: ${total_losses:,.0f}\n{performance_text}: ${abs(pool_premium_total - total_losses):,.0f}",
-                 transform=ax2.transAxes, ha='center', va='top',
-                 bbox=dict(boxstyle="round,pad=0.5", facecolor="wheat", alpha=0.8))
+    Returns:
+    --------
+    fig : matplotlib.figure.Figure
+        The figure object (if return_fig is True)
+    stats : dict
+        Key statistics (if return_fig is True)
+    """
+    result = simulate_risk_pooling(accident_probability, num_policyholders, seed=seed, correlation=correlation,
+                                   dependence=dependence)
 
-        # Add annotation for ratio
-        ax2.text(1, total_losses + 0.05 * max(pool_premium_total, total_losses),
-                 f"Actual/Expected: {pool_performance:.2f}", ha='center', color=performance_color)
+    # For Shiny integration
+    if return_fig:
+        # Return the figure and key statistics
+        return result.figure, result.stats
 
-        # Add a text annotation with the seed value
-        fig.text(0.5, 0.01, f"Simulation Seed: {seed}", ha='center',
-                 fontsize=12, bbox=dict(facecolor='lightgray', alpha=0.5))
+    # Original function for compatibility
+    else:
+        # pyplot (and its GUI backend) is only loaded for interactive use, never by the app
+        import matplotlib.pyplot as plt
 
-        # Use subplots_adjust for more reliable layout
-        plt.subplots_adjust(left=0.08, right=0.95, top=0.9, bottom=0.15, wspace=0.3)
+        # Create figure
+        fig = plt.figure(figsize=(16, 7))
+        render_risk_pooling(result, fig=fig, show_seed=True)
         plt.show()
 
+        num_with_loss = result.num_with_loss
+        percent_with_loss = result.percent_with_loss
+        fair_premium = result.fair_premium
+        pool_premium_total = result.pool_premium_total
+        total_losses = result.total_losses
+
         # Display insurance interpretation
         print("\nInsurance Interpretation:")
         print(f"• Simulation Seed: {seed}")
@@ -301,7 +511,7 @@ def demonstrate_risk_pooling(accident_probability=0.05, num_policyholders=100, s
         print(
             f"• Risk Pooling Result: The insurer collected ${pool_premium_total:,.0f} and paid ${total_losses:,.0f} in claims.")
 
-        if pool_performance < 1:
+        if result.pool_performance < 1:
             print(
                 f"• This year the insurance pool had a ${abs(pool_premium_total - total_losses):,.0f} surplus (collected more than paid out).")
             print(f"• The surplus can be held as capital to handle future years when claims exceed premiums.")
@@ -311,4 +521,4 @@ def demonstrate_risk_pooling(accident_probability=0.05, num_policyholders=100, s
             print(f"• The deficit must be covered by the insurer's capital reserves.")
 
         print(f"\n• Key Insight: As the number of policyholders increases, the 'Actual/Expected' ratio approaches 1.0,")
-        print(f"  making the insurance pool's results more predictable and stable.")
\ No newline at end of file
+        print(f"  making the insurance pool's results more predictable and stable.")
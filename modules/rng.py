@@ -0,0 +1,76 @@
+import numpy as np
+
+# Substream indices spawned from each session seed
+DATA_STREAM = 0  # Simulated outcomes (accidents, frequencies, severities)
+JITTER_STREAM = 1  # Visual jitter only, so plotting never shifts the simulated data
+CLAIMS_STREAM = 2  # Claim experience drawn on top of simulated driver profiles
+POLICYHOLDER_STREAM = 3  # Per-person pool outcomes, stable as the pool grows (see prefix_stable_uniforms)
+NUM_STREAMS = 4
+
+# Draws per block of a prefix-stable stream; every block has its own substream so it can be entered directly
+STREAM_BLOCK_SIZE = 65536
+
+
+def spawn_streams(seed):
+    """
+    Splits a session seed into independent SeedSequence substreams
+
+    Parameters:
+    -----------
+    seed : int
+        Session seed (e.g. from risk_seed() or driver_seed() in app.py)
+
+    Returns:
+    --------
+    streams : list of numpy.random.SeedSequence
+        One child sequence per stream index (DATA_STREAM, JITTER_STREAM, CLAIMS_STREAM, POLICYHOLDER_STREAM).
+        Child i only depends on i, so adding streams never changes existing ones.
+    """
+    return np.random.SeedSequence(seed).spawn(NUM_STREAMS)
+
+
+def data_rng(seed):
+    """Fresh Generator for the simulated data of a session seed"""
+    return np.random.default_rng(spawn_streams(seed)[DATA_STREAM])
+
+
+def jitter_rng(seed):
+    """Fresh Generator for the visual jitter of a session seed"""
+    return np.random.default_rng(spawn_streams(seed)[JITTER_STREAM])
+
+
+def claims_rng(seed):
+    """Fresh Generator for the claim experience of a session seed"""
+    return np.random.default_rng(spawn_streams(seed)[CLAIMS_STREAM])
+
+
+def replication_streams(seed, num_batches):
+    """
+    Child SeedSequences for independent batches of replications
+
+    Spawned from the seed's data stream, so batch i always gets the same
+    substream no matter which process (or how many) runs it.
+    """
+    return spawn_streams(seed)[DATA_STREAM].spawn(num_batches)
+
+
+def prefix_stable_uniforms(seed, start, stop, stream=POLICYHOLDER_STREAM):
+    """
+    Uniforms start..stop-1 of a stream whose first n values never depend on n
+
+    The stream is cut into blocks of STREAM_BLOCK_SIZE draws; block b is
+    child b of the stream's SeedSequence, and a block is entered part-way by
+    advancing its PCG64 state past the skipped draws (one state step per
+    double). Value i is therefore fixed for a seed, and drawing values
+    start..stop-1 costs O(stop - start) however large start is.
+    """
+    values = np.empty(stop - start)
+    for block in range(start // STREAM_BLOCK_SIZE, -(-stop // STREAM_BLOCK_SIZE)):
+        block_start = block * STREAM_BLOCK_SIZE
+        lower = max(start, block_start)
+        upper = min(stop, block_start + STREAM_BLOCK_SIZE)
+        # Same sequence as spawn_streams(seed)[stream].spawn(block + 1)[block], without spawning the earlier blocks
+        bit_generator = np.random.PCG64(np.random.SeedSequence(seed, spawn_key=(stream, block)))
+        bit_generator.advance(lower - block_start)
+        values[lower - start:upper - start] = np.random.Generator(bit_generator).random(upper - lower)
+    return values
@@ -0,0 +1,212 @@
+import math
+import numpy as np
+from dataclasses import dataclass
+
+from modules.cohorts import driver_profiles
+from modules.driver_comparison import COHORT_SIZE, FIRST_COHORT_SIGMA, SECOND_COHORT_SIGMA
+from modules.risk_pooling import CLAIM_AMOUNT
+from modules.rng import data_rng
+
+# Sampling strategies: plain pseudo-random, antithetic pairs, and scrambled low-discrepancy sequences
+SAMPLING_METHODS = ('pseudo', 'antithetic', 'sobol', 'halton')
+
+# Independent randomizations used to measure the standard error of every method
+DEFAULT_RANDOMIZATIONS = 16
+
+# Keeps inverse-CDF transforms finite when a sequence hits exactly 0 or 1
+UNIFORM_EPSILON = 1e-12
+
+
+@dataclass(frozen=True)
+class Estimate:
+    """
+    Monte Carlo estimate with its standard error
+
+    The standard error comes from the spread of independent randomizations,
+    so it is comparable across pseudo-random, antithetic and QMC sampling.
+    """
+    value: float
+    standard_error: float
+    num_samples: int
+    method: str
+    control_variate: bool
+
+    @property
+    def stats(self):
+        return {
+            'value': self.value,
+            'standard_error': self.standard_error,
+            'relative_error': self.standard_error / abs(self.value) if self.value else float('nan'),
+            'num_samples': self.num_samples,
+            'method': self.method,
+            'control_variate': self.control_variate
+        }
+
+
+def uniform_samples(method, num_samples, dimension, rng):
+    """
+    (num_samples, dimension) array of uniforms in (0, 1) for a sampling method
+
+    Parameters:
+    -----------
+    method : str
+        One of SAMPLING_METHODS
+    num_samples : int
+        Number of sample points (rounded up to a power of two for 'sobol',
+        and to an even number for 'antithetic')
+    dimension : int
+        Number of uniforms per sample point
+    rng : numpy.random.Generator
+        Source of randomness (also used to scramble the QMC sequences)
+    """
+    if method == 'pseudo':
+        u = rng.random((num_samples, dimension))
+    elif method == 'antithetic':
+        half = rng.random((math.ceil(num_samples / 2), dimension))
+        u = np.concatenate([half, 1.0 - half])
+    elif method in ('sobol', 'halton'):
+        # Optional dependency: only the QMC modes need scipy.stats.qmc
+        from scipy.stats import qmc
+        if method == 'sobol':
+            u = qmc.Sobol(dimension, scramble=True, seed=rng).random_base2(math.ceil(math.log2(num_samples)))
+        else:
+            u = qmc.Halton(dimension, scramble=True, seed=rng).random(num_samples)
+    else:
+        raise ValueError(f"Unknown sampling method: {method} (expected one of {', '.join(SAMPLING_METHODS)})")
+    return np.clip(u, UNIFORM_EPSILON, 1 - UNIFORM_EPSILON)
+
+
+def _estimate(simulate, num_samples, method, control_variate, seed, num_randomizations):
+    # simulate(u) returns (targets, controls, control_means) for a block of uniforms
+    rng = data_rng(seed)
+    per_randomization = max(num_samples // num_randomizations, 2)
+
+    targets, controls, control_means = [], [], None
+    for _ in range(num_randomizations):
+        block_targets, block_controls, control_means = simulate(rng, per_randomization)
+        targets.append(block_targets)
+        controls.append(block_controls)
+
+    if control_variate:
+        # Regression coefficient from all samples pooled: Y - beta (X - E[X]) keeps the mean, cuts the variance
+        all_targets = np.concatenate(targets)
+        all_controls = np.concatenate(controls)
+        centered = all_controls - all_controls.mean(axis=0)
+        beta, *_ = np.linalg.lstsq(centered, all_targets - all_targets.mean(), rcond=None)
+        targets = [t - (c - control_means) @ beta for t, c in zip(targets, controls)]
+
+    estimates = np.array([t.mean() for t in targets])
+    return Estimate(
+        value=float(estimates.mean()),
+        standard_error=float(estimates.std(ddof=1) / math.sqrt(num_randomizations)),
+        num_samples=int(sum(len(t) for t in targets)),
+        method=method,
+        control_variate=control_variate
+    )
+
+
+def estimate_pool_deficit(accident_probability=0.05, num_policyholders=100, num_samples=4096, method='pseudo',
+                          control_variate=False, seed=42, num_randomizations=DEFAULT_RANDOMIZATIONS):
+    """
+    Estimates the expected deficit E[max(losses - premiums, 0)] of the risk pool
+
+    Each sample is one simulated year of the pool (one uniform per policyholder).
+    The control variate is the pool's total losses, whose mean is known exactly:
+    the fair premium times the number of policyholders.
+
+    Parameters:
+    -----------
+    accident_probability : float
+        The probability of an accident
+    num_policyholders : int
+        The number of policyholders
+    num_samples : int
+        Total number of simulated years
+    method : str
+        One of SAMPLING_METHODS
+    control_variate : bool
+        If True, adjusts each sample with the total-losses control variate
+    seed : int
+        Random seed for reproducibility
+    num_randomizations : int
+        Independent randomizations used for the standard error
+
+    Returns:
+    --------
+    estimate : Estimate
+        Expected deficit in dollars with its standard error
+    """
+    fair_premium = accident_probability * CLAIM_AMOUNT
+    pool_premium_total = fair_premium * num_policyholders
+
+    def simulate(rng, size):
+        u = uniform_samples(method, size, num_policyholders, rng)
+        total_losses = np.sum(u < accident_probability, axis=1) * float(CLAIM_AMOUNT)
+        deficit = np.maximum(total_losses - pool_premium_total, 0.0)
+        return deficit, total_losses[:, None], np.array([pool_premium_total])
+
+    return _estimate(simulate, num_samples, method, control_variate, seed, num_randomizations)
+
+
+def estimate_cohort_loss_multiplier(base_frequency=0.05, base_severity=8000, bad_driver_freq_multiplier=3.0,
+                                    bad_driver_severity_multiplier=2.0, num_samples=4096, method='pseudo',
+                                    control_variate=False, seed=42, num_randomizations=DEFAULT_RANDOMIZATIONS):
+    """
+    Estimates the expected loss_multiplier of the driver comparison
+
+    Each sample is one driver comparison (COHORT_SIZE drivers per cohort),
+    built from uniforms by inverse-CDF transforms with the same model as
+    simulate_driver_comparison. The control variates are each cohort's average
+    expected loss per driver, whose means are the known fair premiums
+    (frequency x severity).
+
+    Parameters:
+    -----------
+    base_frequency : float
+        Base accident frequency for first cohort
+    base_severity : float
+        Base accident severity for first cohort
+    bad_driver_freq_multiplier : float
+        How much more frequently second cohort has accidents
+    bad_driver_severity_multiplier : float
+        How much more severe second cohort's accidents are
+    num_samples : int
+        Total number of simulated driver comparisons
+    method : str
+        One of SAMPLING_METHODS
+    control_variate : bool
+        If True, adjusts each sample with the fair-premium control variates
+    seed : int
+        Random seed for reproducibility
+    num_randomizations : int
+        Independent randomizations used for the standard error
+
+    Returns:
+    --------
+    estimate : Estimate
+        Expected loss multiplier with its standard error
+    """
+    # Imported on first use so importing this module never loads scipy
+    from scipy.special import ndtri
+
+    cohorts = [
+        (base_frequency, base_severity, FIRST_COHORT_SIGMA),
+        (base_frequency * bad_driver_freq_multiplier, base_severity * bad_driver_severity_multiplier,
+         SECOND_COHORT_SIGMA)
+    ]
+    fair_premiums = np.array([frequency * severity for frequency, severity, _ in cohorts])
+
+    def simulate(rng, size):
+        u = uniform_samples(method, size, 4 * COHORT_SIZE, rng).reshape(size, 4, COHORT_SIZE)
+        z = ndtri(u)
+        average_losses = []
+        for index, (frequency, severity, sigma) in enumerate(cohorts):
+            frequencies, severities = driver_profiles(z[:, 2 * index], z[:, 2 * index + 1], frequency, severity,
+                                                      sigma)
+            average_losses.append((frequencies.mean(axis=1), severities.mean(axis=1)))
+        (first_frequency, first_severity), (second_frequency, second_severity) = average_losses
+        loss_multiplier = (second_frequency * second_severity) / (first_frequency * first_severity)
+        controls = np.column_stack([first_frequency * first_severity, second_frequency * second_severity])
+        return loss_multiplier, controls, fair_premiums
+
+    return _estimate(simulate, num_samples, method, control_variate, seed, num_randomizations)
@@ -0,0 +1,145 @@
+from dataclasses import dataclass
+
+from modules.cohorts import CohortDefinition, simulate_cohorts
+from modules.driver_comparison import FIRST_COHORT_SIGMA, SECOND_COHORT_SIGMA
+from modules.parallel import RunningStatistic
+from modules.rng import data_rng
+
+# Drivers per cohort generated in each pass (about 40 MB of temporaries for both cohorts)
+STREAM_CHUNK_SIZE = 1_000_000
+
+
+@dataclass(frozen=True)
+class StreamingComparisonResult:
+    """
+    Driver comparison statistics of a cohort too large to hold in memory
+
+    Holds one RunningStatistic per cohort and measure instead of the driver
+    arrays; ``stats`` has the same keys as DriverComparisonResult.stats.
+    """
+    cohort_size: int
+    seed: int
+    good_driver_image: str
+    good_driver_name: str
+    bad_driver_name: str
+    first_frequency: RunningStatistic
+    second_frequency: RunningStatistic
+    first_severity: RunningStatistic
+    second_severity: RunningStatistic
+
+    @property
+    def first_cohort_name(self):
+        return f"{self.good_driver_name} Cohort"
+
+    @property
+    def second_cohort_name(self):
+        return f"{self.bad_driver_name} Cohort"
+
+    @property
+    def stats(self):
+        """Key statistics as the dictionary returned by demonstrate_driver_comparison"""
+        first_avg_frequency = self.first_frequency.mean
+        second_avg_frequency = self.second_frequency.mean
+        first_avg_severity = self.first_severity.mean
+        second_avg_severity = self.second_severity.mean
+
+        first_total_losses = first_avg_frequency * first_avg_severity * self.first_frequency.count
+        second_total_losses = second_avg_frequency * second_avg_severity * self.second_frequency.count
+
+        return {
+            'good_avg_frequency': first_avg_frequency,
+            'bad_avg_frequency': second_avg_frequency,
+            'good_avg_severity': first_avg_severity,
+            'bad_avg_severity': second_avg_severity,
+            'good_total_losses': first_total_losses,
+            'bad_total_losses': second_total_losses,
+            'loss_multiplier': second_total_losses / first_total_losses,
+            'freq_multiplier': second_avg_frequency / first_avg_frequency,
+            'severity_multiplier': second_avg_severity / first_avg_severity,
+            'good_driver_image': self.good_driver_image,
+            'good_driver_name': self.good_driver_name,
+            'bad_driver_name': self.bad_driver_name,
+            'first_cohort_name': self.first_cohort_name,
+            'second_cohort_name': self.second_cohort_name
+        }
+
+
+def stream_driver_comparison(base_frequency=0.05, base_severity=8000, bad_driver_freq_multiplier=3.0,
+                             bad_driver_severity_multiplier=2.0, cohort_size=1_000_000_000, seed=42,
+                             good_driver_image="drake.jpeg", chunk_size=STREAM_CHUNK_SIZE, progress=None, rng=None):
+    """
+    Runs the driver comparison in fixed-size chunks with constant memory
+
+    Each chunk simulates chunk_size drivers per cohort with the same model as
+    simulate_driver_comparison, folds them into the running statistics and is
+    then discarded, so a billion-driver book needs no more RAM than one chunk.
+
+    Parameters:
+    -----------
+    base_frequency : float
+        Base accident frequency for first cohort
+    base_severity : float
+        Base accident severity for first cohort
+    bad_driver_freq_multiplier : float
+        How much more frequently second cohort has accidents
+    bad_driver_severity_multiplier : float
+        How much more severe second cohort's accidents are
+    cohort_size : int
+        Number of drivers in each cohort
+    seed : int
+        Random seed for reproducibility
+    good_driver_image : str
+        Image filename to use for the first cohort (either "drake.jpeg" or "kendrick.jpeg")
+    chunk_size : int
+        Drivers per cohort generated in each pass
+    progress : callable
+        Called as progress(drivers_done, cohort_size) after every chunk
+    rng : numpy.random.Generator
+        Generator for the simulated drivers; defaults to the data stream of seed
+
+    Returns:
+    --------
+    result : StreamingComparisonResult
+        Running statistics of both cohorts
+    """
+    # Use a private Generator instead of the global NumPy state
+    if rng is None:
+        rng = data_rng(seed)
+
+    # Extract driver names from image filename
+    good_driver_name = good_driver_image.split('.')[0].capitalize()
+    bad_driver_name = "Kendrick" if good_driver_name == "Drake" else "Drake"
+
+    second_cohort_frequency = base_frequency * bad_driver_freq_multiplier
+    second_cohort_severity = base_severity * bad_driver_severity_multiplier
+
+    statistics = [RunningStatistic() for _ in range(4)]
+    first_frequency, second_frequency, first_severity, second_severity = statistics
+
+    for start in range(0, cohort_size, chunk_size):
+        size = min(chunk_size, cohort_size - start)
+        drivers = simulate_cohorts([
+            CohortDefinition(f"{good_driver_name} Cohort", base_frequency, base_severity, FIRST_COHORT_SIGMA, size),
+            CohortDefinition(f"{bad_driver_name} Cohort", second_cohort_frequency, second_cohort_severity,
+                             SECOND_COHORT_SIGMA, size)
+        ], rng=rng)
+        first, second = drivers.cohort_slice(0), drivers.cohort_slice(1)
+        first_frequency.update(drivers.frequencies[first])
+        second_frequency.update(drivers.frequencies[second])
+        first_severity.update(drivers.severities[first])
+        second_severity.update(drivers.severities[second])
+
+        if progress is not None:
+            progress(start + size, cohort_size)
+
+    return StreamingComparisonResult(
+        cohort_size=cohort_size,
+        seed=seed,
+        good_driver_image=good_driver_image,
+        good_driver_name=good_driver_name,
+        bad_driver_name=bad_driver_name,
+        first_frequency=first_frequency,
+        second_frequency=second_frequency,
+        first_severity=first_severity,
+        second_severity=second_severity
+    )
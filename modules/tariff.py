@@ -0,0 +1,357 @@
+import time
+import numpy as np
+from dataclasses import dataclass
+from functools import cached_property, reduce
+
+from modules.cache import figure_to_png
+from modules.premium_calculation import EXPENSE_RATIO, RISK_MARGIN_RATIO, premium_columns
+from modules.rng import data_rng
+
+# Tariffs with at most this many level combinations are compiled into one premium table (8 bytes per cell)
+MAX_COMBINED_CELLS = 1 << 22
+
+# Policies in the synthetic book priced by the app
+BOOK_SIZE = 1_000_000
+
+
+@dataclass(frozen=True)
+class RatingFactor:
+    """
+    One rating variable of a multiplicative tariff
+
+    Attributes:
+    -----------
+    name : str
+        Identifier (matches the ethics tab's "<name>_rating" checkbox)
+    label : str
+        Label shown on charts
+    levels : tuple of str
+        Level labels; a policy's code for this factor is the index of its level
+    relativities : tuple of float
+        Multiplier on the base expected loss for each level (1.0 = base level)
+    mix : tuple of float
+        Share of the book in each level (used to simulate books of policies)
+    """
+    name: str
+    label: str
+    levels: tuple
+    relativities: tuple
+    mix: tuple
+
+    @property
+    def num_levels(self):
+        return len(self.levels)
+
+
+# Rating variables the ethics tab accepts as appropriate, with illustrative relativities
+RATING_FACTORS = (
+    RatingFactor('age', 'Driver Age', ('16-20', '21-24', '25-39', '40-59', '60-74', '75+'),
+                 (2.10, 1.45, 1.00, 0.90, 0.95, 1.25), (0.06, 0.09, 0.30, 0.33, 0.16, 0.06)),
+    RatingFactor('vehicle', 'Vehicle Type', ('Economy', 'Family', 'SUV', 'Luxury', 'Sports'),
+                 (0.90, 1.00, 1.10, 1.35, 1.60), (0.25, 0.35, 0.25, 0.10, 0.05)),
+    RatingFactor('experience', 'Driving Experience', ('0-2 yrs', '3-5 yrs', '6-10 yrs', '10+ yrs'),
+                 (1.40, 1.15, 1.00, 0.90), (0.10, 0.15, 0.20, 0.55)),
+    RatingFactor('multiproduct', 'Multi-Product', ('Auto only', 'Auto + Home'),
+                 (1.00, 0.90), (0.60, 0.40)),
+    RatingFactor('speeding', 'Speeding Convictions', ('None', '1', '2', '3+'),
+                 (1.00, 1.20, 1.45, 1.80), (0.80, 0.13, 0.05, 0.02)),
+    RatingFactor('driving', 'At-Fault Claims (3 yrs)', ('None', '1', '2+'),
+                 (1.00, 1.30, 1.75), (0.85, 0.12, 0.03)),
+)
+
+
+@dataclass(frozen=True)
+class Tariff:
+    """
+    Base rate x per-factor relativities, compiled into dense lookup arrays
+
+    A policy is one integer code per factor. Each factor's relativities are a
+    NumPy array indexed by code; when the tariff has at most MAX_COMBINED_CELLS
+    level combinations, the premium of every combination is also precomputed,
+    so quoting a batch is one mixed-radix index and one fancy-index gather.
+    """
+    factors: tuple
+    base_frequency: float
+    base_severity: float
+    expense_ratio: float = EXPENSE_RATIO
+    risk_margin_ratio: float = RISK_MARGIN_RATIO
+
+    @property
+    def names(self):
+        return [factor.name for factor in self.factors]
+
+    @cached_property
+    def relativity_tables(self):
+        """One read-only relativity array per factor, indexed by level code"""
+        tables = []
+        for factor in self.factors:
+            table = np.array(factor.relativities, dtype=float)
+            table.flags.writeable = False
+            tables.append(table)
+        return tuple(tables)
+
+    @cached_property
+    def strides(self):
+        """Mixed-radix place value of each factor in the combined table (last factor varies fastest)"""
+        sizes = [factor.num_levels for factor in self.factors]
+        # NumPy integers, so compact (int8) code columns are widened when multiplied
+        return tuple(np.intp(np.prod(sizes[i + 1:], dtype=np.intp)) for i in range(len(sizes)))
+
+    @property
+    def num_cells(self):
+        return int(np.prod([factor.num_levels for factor in self.factors], dtype=np.int64))
+
+    @cached_property
+    def premium_table(self):
+        """Premium of every level combination (read-only), or None above MAX_COMBINED_CELLS"""
+        if self.num_cells > MAX_COMBINED_CELLS:
+            return None
+        relativity = reduce(np.multiply.outer, self.relativity_tables, np.ones(())).ravel()
+        table = self._premiums(relativity)
+        table.flags.writeable = False
+        return table
+
+    def compile(self):
+        """Builds the lookup tables now rather than on the first quote; returns the tariff"""
+        self.relativity_tables
+        self.strides
+        self.premium_table
+        return self
+
+    @property
+    def base_premium(self):
+        """Premium of a policy at every factor's 1.0 level"""
+        return float(self._premiums(np.ones(1))[0])
+
+    def _premiums(self, relativity):
+        # Relativities scale the expected loss; loadings follow demonstrate_premium_calculation
+        return premium_columns(self.base_frequency * relativity, self.base_severity, self.expense_ratio,
+                               self.risk_margin_ratio).premium
+
+    def _code_columns(self, codes):
+        """Codes as one integer array per factor, checked against the factor's levels"""
+        if isinstance(codes, np.ndarray):
+            columns = [codes[:, i] for i in range(len(self.factors))]
+        else:
+            columns = [np.asarray(codes[factor.name]) for factor in self.factors]
+        for factor, column in zip(self.factors, columns):
+            if column.size and (column.min() < 0 or column.max() >= factor.num_levels):
+                raise ValueError(f"Codes for '{factor.name}' must be between 0 and {factor.num_levels - 1}")
+        return columns
+
+    def encode(self, name, labels):
+        """Level codes (int8) of a factor from its level labels"""
+        factor = self.factors[self.names.index(name)]
+        lookup = {level: code for code, level in enumerate(factor.levels)}
+        return np.fromiter((lookup[label] for label in labels), dtype=np.int8, count=len(labels))
+
+    def cell_index(self, codes):
+        """Position of each policy in premium_table"""
+        columns = self._code_columns(codes)
+        index = np.zeros(len(columns[0]) if columns else 0, dtype=np.intp)
+        for column, stride in zip(columns, self.strides):
+            index += column * stride
+        return index
+
+    def relativities(self, codes):
+        """Combined relativity of each policy (product of one table lookup per factor)"""
+        columns = self._code_columns(codes)
+        relativity = np.ones(len(columns[0]) if columns else 0)
+        for column, table in zip(columns, self.relativity_tables):
+            relativity *= table[column]
+        return relativity
+
+    def quote(self, codes):
+        """
+        Premiums for a batch of policies
+
+        Parameters:
+        -----------
+        codes : numpy.ndarray or mapping
+            (num_policies x num_factors) integer array in factor order, or a
+            mapping of factor name to an integer array (a columnar table)
+
+        Returns:
+        --------
+        premiums : numpy.ndarray
+            One premium per policy
+        """
+        if self.premium_table is not None:
+            return self.premium_table[self.cell_index(codes)]
+        return self._premiums(self.relativities(codes))
+
+
+def build_tariff(names, base_frequency=0.05, base_severity=8000, expense_ratio=EXPENSE_RATIO,
+                 risk_margin_ratio=RISK_MARGIN_RATIO):
+    """Tariff over the RATING_FACTORS whose names are given (in RATING_FACTORS order)"""
+    return Tariff(
+        factors=tuple(factor for factor in RATING_FACTORS if factor.name in names),
+        base_frequency=base_frequency,
+        base_severity=base_severity,
+        expense_ratio=expense_ratio,
+        risk_margin_ratio=risk_margin_ratio
+    )
+
+
+@dataclass(frozen=True)
+class TariffBookResult:
+    """
+    A simulated book of policies quoted with one tariff
+    """
+    tariff: Tariff
+    seed: int
+    codes: dict
+    premiums: np.ndarray
+
+    @property
+    def num_policies(self):
+        return len(self.premiums)
+
+    @cached_property
+    def stats(self):
+        """Premium distribution of the book"""
+        p5, median, p95 = np.quantile(self.premiums, [0.05, 0.5, 0.95])
+        return {
+            'factors': [factor.label for factor in self.tariff.factors],
+            'num_policies': self.num_policies,
+            'num_cells': self.tariff.num_cells,
+            'base_premium': self.tariff.base_premium,
+            'mean_premium': float(np.mean(self.premiums)),
+            'median_premium': float(median),
+            'premium_p5': float(p5),
+            'premium_p95': float(p95),
+            'min_premium': float(np.min(self.premiums)),
+            'max_premium': float(np.max(self.premiums)),
+            'seed': self.seed
+        }
+
+    def quotes_per_second(self):
+        """
+        Times a fresh batch quote of the whole book
+
+        Measured on every call (never cached with the result), so a result
+        served from the simulation cache still reports the current throughput.
+        """
+        self.tariff.compile()
+        started = time.perf_counter()
+        if self.tariff.factors:
+            self.tariff.quote(self.codes)
+        else:
+            np.full(self.num_policies, self.tariff.base_premium)
+        return self.num_policies / max(time.perf_counter() - started, 1e-9)
+
+    @cached_property
+    def figure(self):
+        """The tariff chart, built on first access"""
+        return render_tariff_book(self)
+
+    @cached_property
+    def png(self):
+        """The tariff chart encoded as PNG bytes (the Figure itself is not kept)"""
+        return figure_to_png(render_tariff_book(self))
+
+
+def quote_book(tariff, num_policies=BOOK_SIZE, seed=42, rng=None):
+    """
+    Simulates a book of policies from each factor's level mix and quotes it in one batch
+
+    Parameters:
+    -----------
+    tariff : Tariff
+        The tariff to quote with
+    num_policies : int
+        Number of policies in the book
+    seed : int
+        Random seed for reproducibility
+    rng : numpy.random.Generator
+        Generator for the policy levels; defaults to the data stream of seed
+
+    Returns:
+    --------
+    result : TariffBookResult
+        Level codes and premiums of the book
+    """
+    # Use a private Generator instead of the global NumPy state
+    if rng is None:
+        rng = data_rng(seed)
+
+    codes = {
+        factor.name: rng.choice(factor.num_levels, size=num_policies, p=factor.mix).astype(np.int8)
+        for factor in tariff.factors
+    }
+
+    premiums = tariff.compile().quote(codes) if codes else np.full(num_policies, tariff.base_premium)
+
+    return TariffBookResult(
+        tariff=tariff,
+        seed=seed,
+        codes=codes,
+        premiums=premiums
+    )
+
+
+def render_tariff_book(result):
+    """
+    Draws the tariff's relativities and the premium distribution of the book
+
+    Parameters:
+    -----------
+    result : TariffBookResult
+        Output of quote_book
+
+    Returns:
+    --------
+    fig : matplotlib.figure.Figure
+        The figure object
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.ticker import FuncFormatter
+
+    stats = result.stats
+    fig = Figure(figsize=(14, 6))
+    ax1 = fig.add_subplot(121)
+    ax2 = fig.add_subplot(122)
+
+    # Plot 1: Relativities, one group of bars per factor
+    position = 0
+    ticks, tick_labels = [], []
+    colors = ['#3498DB', '#2ECC71', '#9B59B6', '#E67E22', '#E74C3C', '#1ABC9C']
+    for i, (factor, table) in enumerate(zip(result.tariff.factors, result.tariff.relativity_tables)):
+        positions = position + np.arange(factor.num_levels)
+        ax1.bar(positions, table, color=colors[i % len(colors)], alpha=0.8, label=factor.label)
+        ticks.extend(positions)
+        tick_labels.extend(factor.levels)
+        position += factor.num_levels + 1
+    ax1.axhline(1.0, color='black', linewidth=1, linestyle='--')
+    ax1.set_xticks(ticks)
+    ax1.set_xticklabels(tick_labels, rotation=60, ha='right', fontsize=8)
+    ax1.set_ylabel('Relativity (x base rate)')
+    ax1.set_title('Rating Factor Relativities')
+    ax1.grid(axis='y', alpha=0.3)
+    if result.tariff.factors:
+        # Headroom above the tallest bar for the legend
+        ax1.set_ylim(0, max(table.max() for table in result.tariff.relativity_tables) * 1.45)
+        ax1.legend(loc='upper right', fontsize=8, ncol=2)
+    else:
+        ax1.text(0.5, 0.5, 'No rating variables selected:\neveryone pays the base premium',
+                 ha='center', va='center', transform=ax1.transAxes)
+
+    # Plot 2: Premium distribution of the book
+    # The few most expensive combinations would squash the histogram, so it stops at the 99.9th percentile
+    ax2.hist(result.premiums, bins=80, range=(stats['min_premium'], np.quantile(result.premiums, 0.999)),
+             color='#3498DB', alpha=0.7)
+    ax2.axvline(stats['base_premium'], color='#2C3E50', linestyle='--',
+                label=f"Base premium: ${stats['base_premium']:,.0f}")
+    ax2.axvline(stats['mean_premium'], color='#E74C3C', linewidth=2,
+                label=f"Average premium: ${stats['mean_premium']:,.0f}")
+    ax2.set_xlabel('Premium ($)')
+    ax2.set_ylabel('Policies')
+    ax2.set_title(f"{stats['num_policies']:,} Policies Quoted")
+    ax2.xaxis.set_major_formatter(FuncFormatter(lambda x, _: '${:,.0f}'.format(x)))
+    ax2.yaxis.set_major_formatter(FuncFormatter(lambda x, _: '{:,.0f}'.format(x)))
+    ax2.grid(True, alpha=0.3)
+    ax2.legend(loc='upper right')
+
+    fig.subplots_adjust(left=0.07, right=0.97, top=0.9, bottom=0.22, wspace=0.25)
+
+    return fig
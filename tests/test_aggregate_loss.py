@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+import pytest
+
+from modules.aggregate_loss import (binomial_count, compound_loss_distribution, poisson_count,
+                                    pool_loss_distribution)
+
+# E[max(losses - premiums, 0)] of the default pool: 100 policyholders, 5% accident probability, $20,000 claims
+POOL_EXPECTED_DEFICIT = 17101.69
+
+
+def brute_force_compound(count_pmf, severity_pmf, num_points):
+    """Aggregate pmf as sum over k of P(N = k) times the k-fold convolution of the severity pmf"""
+    pmf = np.zeros(num_points)
+    convolution = np.zeros(num_points)
+    convolution[0] = 1.0
+    for probability in count_pmf:
+        pmf += probability * convolution
+        convolution = np.convolve(convolution, severity_pmf)[:num_points]
+    return pmf
+
+
+@pytest.mark.parametrize("method", ['fft', 'panjer'])
+def test_pool_distribution_matches_convolved_bernoulli_policyholders(method):
+    num_policyholders, probability = 100, 0.05
+    expected = np.array([1.0])
+    for _ in range(num_policyholders):
+        expected = np.convolve(expected, [1 - probability, probability])
+
+    # The grid stops 12 standard deviations above the mean, where the remaining tail is negligible
+    distribution = pool_loss_distribution(probability, num_policyholders, method=method)
+    num_points = len(distribution.pmf)
+    np.testing.assert_allclose(distribution.pmf, expected[:num_points], atol=1e-12)
+    assert expected[num_points:].sum() < 1e-12
+
+
+@pytest.mark.parametrize("method", ['fft', 'panjer'])
+def test_compound_poisson_matches_brute_force_convolution(method):
+    mean_count, num_points = 2.5, 120
+    severity_pmf = np.array([0.0, 0.5, 0.3, 0.2])
+    count_pmf = [math.exp(-mean_count) * mean_count ** k / math.factorial(k) for k in range(60)]
+
+    distribution = compound_loss_distribution(poisson_count(mean_count), severity_pmf, 100.0, num_points,
+                                              method=method)
+    np.testing.assert_allclose(distribution.pmf, brute_force_compound(count_pmf, severity_pmf, num_points),
+                               atol=1e-12)
+    assert distribution.mean == pytest.approx(mean_count * 1.7 * 100.0)
+
+
+def test_compound_binomial_fft_and_panjer_agree():
+    severity_pmf = np.array([0.1, 0.4, 0.3, 0.2])
+    fft = compound_loss_distribution(binomial_count(40, 0.1), severity_pmf, 1.0, 200, method='fft')
+    panjer = compound_loss_distribution(binomial_count(40, 0.1), severity_pmf, 1.0, 200, method='panjer')
+    np.testing.assert_allclose(fft.pmf, panjer.pmf, atol=1e-12)
+
+
+def test_pool_distribution_oracles():
+    distribution = pool_loss_distribution(0.05, 100)
+    premiums = 0.05 * 20000 * 100
+
+    # 11 claims is the 99th percentile of Binomial(100, 5%): Actual/Expected of 2.2
+    assert distribution.stats['quantile_99'] / premiums == pytest.approx(2.2)
+    deficit = np.dot(np.maximum(distribution.losses - premiums, 0.0), distribution.pmf)
+    assert deficit == pytest.approx(POOL_EXPECTED_DEFICIT, abs=0.01)
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        compound_loss_distribution(poisson_count(1.0), np.array([0.0, 1.0]), 1.0, 16, method='exact')
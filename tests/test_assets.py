@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from modules import assets
+from modules.assets import ASSET_DIR, PORTRAIT_DPI, PORTRAIT_ZOOM, PORTRAITS, portrait
+
+
+@pytest.mark.parametrize("filename", PORTRAITS)
+def test_portraits_are_decoded_once_at_chart_size(filename):
+    image = portrait(filename)
+    assert portrait(filename) is image
+    assert image.dtype == np.uint8 and image.shape[2] == 3
+    assert not image.flags.writeable
+
+    # OffsetImage would have scaled the original by zoom x dpi / 72
+    scale = PORTRAIT_ZOOM * PORTRAIT_DPI / 72
+    with Image.open(os.path.join(ASSET_DIR, filename)) as original:
+        assert image.shape[:2] == (round(original.height * scale), round(original.width * scale))
+
+
+def test_portraits_do_not_depend_on_the_working_directory(monkeypatch, tmp_path):
+    monkeypatch.setattr(assets, '_portraits', {})
+    monkeypatch.chdir(tmp_path)
+    assert portrait(PORTRAITS[0]).size > 0
+
+
+def test_missing_portraits_raise():
+    with pytest.raises(FileNotFoundError):
+        portrait("missing.jpeg")
@@ -0,0 +1,92 @@
+import threading
+
+import numpy as np
+
+from modules.cache import LRUCache, cached_call, estimate_nbytes, simulation_cache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(maxsize=2)
+    cache.get_or_create('a', lambda: 1)
+    cache.get_or_create('b', lambda: 2)
+    cache.get_or_create('a', lambda: 0)  # hit: 'a' becomes the most recent
+    cache.get_or_create('c', lambda: 3)
+
+    assert cache.get_or_create('a', lambda: 'new') == 1
+    assert cache.get_or_create('b', lambda: 'new') == 'new'
+    info = cache.info()
+    assert info['size'] == 2
+    assert (info['hits'], info['misses']) == (2, 4)
+
+
+def test_entries_are_evicted_to_fit_maxbytes():
+    cache = LRUCache(maxsize=100, maxbytes=3 * 8000)
+    for key in range(5):
+        cache.get_or_create(key, lambda: np.zeros(1000))
+
+    info = cache.info()
+    assert info['size'] == 3
+    assert info['nbytes'] <= info['maxbytes']
+    assert cache.get_or_create(4, lambda: None) is not None
+
+
+def test_views_of_one_array_are_counted_once():
+    values = np.zeros(1000)
+    assert estimate_nbytes((values, values[:10], {'tail': values[500:]})) == values.nbytes
+    assert estimate_nbytes(b'abc') == 3
+    assert estimate_nbytes(object()) == 0
+
+
+def test_concurrent_misses_return_one_stored_value():
+    cache = LRUCache(maxsize=8)
+    barrier = threading.Barrier(16)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(cache.get_or_create('key', object))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stored = cache.get_or_create('key', object)
+    info = cache.info()
+    # Sessions that missed together may each build a value, but all of them get the one stored first
+    assert all(result is stored for result in results)
+    assert info['size'] == 1
+    assert info['hits'] + info['misses'] == 17
+
+
+def test_concurrent_writers_keep_the_cache_bounded():
+    cache = LRUCache(maxsize=10)
+
+    def worker(offset):
+        for key in range(200):
+            assert cache.get_or_create((offset + key) % 50, lambda k=key: k) is not None
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    info = cache.info()
+    assert info['size'] <= 10
+    assert info['hits'] + info['misses'] == 8 * 200
+
+
+def test_cached_call_reuses_results_for_equal_arguments():
+    calls = []
+
+    def simulate(x, seed=0):
+        calls.append((x, seed))
+        return x * 2
+
+    simulation_cache.clear()
+    assert cached_call(simulate, 3, seed=1) == 6
+    assert cached_call(simulate, 3, seed=1) == 6
+    assert cached_call(simulate, 3, seed=2) == 6
+    assert calls == [(3, 1), (3, 2)]
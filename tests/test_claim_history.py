@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from modules import claim_history
+from modules.claim_history import cohort_claim_history, simulate_claim_history
+from modules.cohorts import CohortDefinition, simulate_cohorts
+from modules.driver_comparison import simulate_driver_comparison
+
+NUM_YEARS = 8
+
+
+def cohort_drivers(size, seed=5):
+    return simulate_cohorts([CohortDefinition("Low", 0.3, 5000, 0.4, size),
+                             CohortDefinition("High", 0.9, 9000, 0.6, size)], seed=seed)
+
+
+def annual_losses(history):
+    """Loss of every driver-year, rebuilt from the ragged claims one driver at a time"""
+    losses = np.zeros(history.claim_counts.shape)
+    for index in range(history.num_drivers):
+        counts, amounts = history.driver_history(index)
+        losses[index] = [chunk.sum() for chunk in np.split(amounts.astype(float), np.cumsum(counts)[:-1])]
+    return losses
+
+
+def test_credibility_matches_per_cohort_variance_components():
+    history = simulate_claim_history(cohort_drivers(2000), num_years=NUM_YEARS, seed=1)
+    losses = annual_losses(history)
+    # Claim amounts are stored as float32, the per-driver sums in float64
+    np.testing.assert_allclose(history.driver_losses, losses.sum(axis=1), rtol=1e-6)
+
+    credibility = history.credibility
+    for k in range(2):
+        cohort = losses[history.cohort_ids == k]
+        process_variance = cohort.var(axis=1, ddof=1).mean()
+        spread = cohort.mean(axis=1).var(ddof=1)
+        hypothetical_variance = max(spread - process_variance / NUM_YEARS, 0.0)
+        assert credibility['mean'][k] == pytest.approx(cohort.mean(), rel=1e-6)
+        assert credibility['process_variance'][k] == pytest.approx(process_variance, rel=1e-5)
+        assert credibility['hypothetical_variance'][k] == pytest.approx(hypothetical_variance, abs=1e-5 * spread)
+        assert credibility['weight'][k] == pytest.approx(
+            NUM_YEARS * hypothetical_variance / (NUM_YEARS * hypothetical_variance + process_variance), rel=1e-4)
+
+
+def test_claim_free_drivers_earn_a_discount():
+    history = simulate_claim_history(cohort_drivers(5000), num_years=NUM_YEARS, seed=2)
+    assert np.all(history.credibility['weight'] > 0)
+    factors = history.factor_by_claim_count()
+    # Average factor rises with the number of claims in the history, from a discount for claim-free drivers
+    assert np.all(factors[:, 0] < 1)
+    assert np.all(np.diff(factors[:, :2], axis=1) > 0)
+
+
+def test_portfolios_over_the_budget_are_sampled_evenly(monkeypatch):
+    budget = 2 ** 20
+    monkeypatch.setattr(claim_history, 'HISTORY_MEMORY_BUDGET', budget)
+    drivers = cohort_drivers(50_000)
+    history = simulate_claim_history(drivers, seed=3)
+
+    assert history.sampled
+    assert history.population_drivers == 100_000
+    assert history.nbytes <= 1.01 * budget
+    sizes = np.bincount(history.cohort_ids)
+    assert sizes[0] == sizes[1]
+    np.testing.assert_array_equal(history.cohort_ids, drivers.head(sizes[0]).cohort_ids)
+
+
+def test_cohort_claim_history_matches_the_driver_comparison():
+    comparison = simulate_driver_comparison(seed=9)
+    direct = simulate_claim_history(comparison.drivers, seed=9)
+    rebuilt = cohort_claim_history(comparison.drivers.cohorts, seed=9)
+    np.testing.assert_array_equal(rebuilt.claim_counts, direct.claim_counts)
+    np.testing.assert_array_equal(rebuilt.claim_amounts, direct.claim_amounts)
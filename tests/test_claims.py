@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from modules.claims import simulate_claims
+
+
+def test_driver_totals_match_a_scatter_add():
+    rng = np.random.default_rng(0)
+    # Frequencies up to 2 give many claim-free drivers as well as drivers with several claims
+    claims = simulate_claims(rng.uniform(0.01, 2.0, 20_000), rng.uniform(1000, 9000, 20_000), 0.5, seed=1)
+
+    expected = np.zeros(claims.num_drivers)
+    np.add.at(expected, np.repeat(np.arange(claims.num_drivers), claims.claim_counts), claims.claim_amounts)
+    np.testing.assert_allclose(claims.driver_totals, expected, rtol=1e-12)
+    assert claims.offsets[-1] == claims.num_claims
+    for index in (0, 1, 17, claims.num_drivers - 1):
+        assert claims.driver_claims(index).sum() == pytest.approx(claims.driver_totals[index])
+
+
+def test_cohort_stats_match_per_cohort_loops():
+    cohort_ids = np.repeat(np.arange(3, dtype=np.int32), [1000, 2000, 500])
+    rng = np.random.default_rng(2)
+    frequencies, severities = rng.uniform(0.05, 1.0, len(cohort_ids)), rng.uniform(2000, 8000, len(cohort_ids))
+    # A fourth cohort with no drivers reports zeros instead of dividing by zero
+    claims = simulate_claims(frequencies, severities, np.array([0.4, 0.5, 0.6, 0.7]), cohort_ids=cohort_ids,
+                             num_cohorts=4, seed=2)
+    stats = claims.stats
+
+    for k in range(3):
+        members = cohort_ids == k
+        assert stats['num_claims'][k] == claims.claim_counts[members].sum()
+        assert stats['total_losses'][k] == pytest.approx(claims.driver_totals[members].sum())
+        assert stats['percent_with_claim'][k] == pytest.approx(np.mean(claims.claim_counts[members] > 0) * 100)
+    assert (stats['num_drivers'][3], stats['avg_claim_amount'][3], stats['loss_per_driver'][3]) == (0, 0, 0)
+
+
+def test_claim_amounts_average_the_driver_severity():
+    claims = simulate_claims(np.full(200_000, 0.5), np.full(200_000, 5000.0), 0.6, seed=3)
+    assert claims.stats['claim_frequency'][0] == pytest.approx(0.5, rel=0.01)
+    assert claims.claim_amounts.mean() == pytest.approx(5000, rel=0.01)
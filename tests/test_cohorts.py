@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from modules.cache import draws_cache
+from modules.cohorts import (SEGMENT_DRIVER_BUDGET, CohortDefinition, rating_segments, simulate_cohorts,
+                             standard_normal_draws)
+from modules.driver_comparison import COHORT_SIZE, simulate_driver_comparison
+from modules.rng import data_rng
+
+
+def test_group_statistics_match_per_cohort_means():
+    drivers = simulate_cohorts(rating_segments(7, size=500), seed=4)
+    stats = drivers.stats
+
+    assert stats['sizes'].tolist() == [500] * 7
+    for k in range(7):
+        rows = drivers.cohort_slice(k)
+        assert np.all(drivers.cohort_ids[rows] == k)
+        assert stats['avg_frequency'][k] == pytest.approx(np.mean(drivers.frequencies[rows]), rel=1e-12)
+        assert stats['avg_severity'][k] == pytest.approx(np.mean(drivers.severities[rows]), rel=1e-12)
+    assert stats['loss_relativity'][0] == 1.0
+
+
+def test_cohorts_of_different_sizes_keep_their_parameters():
+    drivers = simulate_cohorts([CohortDefinition("Small", 0.02, 3000, 0.3, 20_000),
+                                CohortDefinition("Large", 0.2, 12000, 0.5, 60_000)], seed=1)
+    assert drivers.sizes.tolist() == [20_000, 60_000]
+    np.testing.assert_allclose(drivers.stats['avg_frequency'], [0.02, 0.2], rtol=0.02)
+    np.testing.assert_allclose(drivers.stats['avg_severity'], [3000, 12000], rtol=0.02)
+
+
+def test_parameter_changes_reuse_the_cached_draws():
+    draws_cache.clear()
+    first = simulate_driver_comparison(base_severity=8000, seed=12)
+    second = simulate_driver_comparison(base_severity=12000, seed=12)
+
+    assert draws_cache.info()['misses'] == 1
+    z_frequency, z_severity = standard_normal_draws(2 * COHORT_SIZE, seed=12)
+    assert standard_normal_draws(2 * COHORT_SIZE, seed=12)[0] is z_frequency
+    assert not z_frequency.flags.writeable and not z_severity.flags.writeable
+
+    # The same drivers move: severities scale with the cohort severity, frequencies stay put
+    np.testing.assert_array_equal(second.first_cohort_frequencies, first.first_cohort_frequencies)
+    np.testing.assert_allclose(second.first_cohort_severities, 1.5 * first.first_cohort_severities, rtol=1e-12)
+
+
+def test_cached_draws_reproduce_the_data_stream():
+    cached = simulate_driver_comparison(seed=21)
+    fresh = simulate_driver_comparison(seed=21, rng=data_rng(21))
+    np.testing.assert_array_equal(cached.drivers.frequencies, fresh.drivers.frequencies)
+    np.testing.assert_allclose(cached.drivers.severities, fresh.drivers.severities, rtol=1e-15)
+
+
+def test_rating_segments_stay_within_the_driver_budget():
+    segments = rating_segments(100, size=1_000_000)
+    assert sum(segment.size for segment in segments) <= SEGMENT_DRIVER_BUDGET
+    assert [segment.size for segment in rating_segments(2, size=200)] == [200, 200]
+    assert (segments[0].frequency, segments[-1].frequency) == pytest.approx((0.03, 0.15))
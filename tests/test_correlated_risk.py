@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from modules.correlated_risk import (DEPENDENCE_MODELS, conditional_accident_probabilities,
+                                     simulate_correlated_pool)
+
+
+@pytest.mark.parametrize("dependence", DEPENDENCE_MODELS)
+def test_conditional_probabilities_average_to_the_accident_probability(dependence):
+    probabilities = conditional_accident_probabilities(0.05, 0.2, 400_000, np.random.default_rng(0),
+                                                       dependence=dependence)
+    assert np.all((probabilities >= 0) & (probabilities <= 1))
+    assert probabilities.mean() == pytest.approx(0.05, rel=0.02)
+
+
+@pytest.mark.parametrize("dependence", DEPENDENCE_MODELS)
+def test_pool_without_correlation_is_independent(dependence):
+    # The t model's shared chi-square draw must not tie the policyholders together at correlation 0
+    probabilities = conditional_accident_probabilities(0.05, 0.0, 1000, np.random.default_rng(1),
+                                                       dependence=dependence)
+    np.testing.assert_array_equal(probabilities, np.full(1000, 0.05))
+
+
+def test_correlation_keeps_a_volatility_floor_as_the_pool_grows():
+    result = simulate_correlated_pool(0.05, 1000, correlation=0.05, num_scenarios=4000, seed=2)
+    # Independent pools shrink like 1 / sqrt(n); the common shock does not diversify away
+    assert result.curve_std_independent[-1] < 0.01
+    assert result.curve_std_correlated[-1] > 10 * result.curve_std_independent[-1]
+    assert result.stats['std_correlated'] > result.stats['std_independent']
+
+
+def test_unknown_dependence_model_is_rejected():
+    with pytest.raises(ValueError):
+        conditional_accident_probabilities(0.05, 0.1, 10, np.random.default_rng(0), dependence='clayton')
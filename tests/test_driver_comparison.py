@@ -0,0 +1,21 @@
+from modules.driver_comparison import (DENSITY_BINS, SCATTER_MAX_DRIVERS, render_driver_comparison,
+                                       simulate_driver_comparison)
+
+
+def test_large_cohorts_are_drawn_as_one_density_raster():
+    result = simulate_driver_comparison(cohort_size=SCATTER_MAX_DRIVERS + 1, seed=2)
+    ax = render_driver_comparison(result).axes[0]
+
+    assert len(ax.images) == 1
+    image = ax.images[0].get_array()
+    assert image.shape == (DENSITY_BINS, DENSITY_BINS, 4)
+    assert 0 < image[..., 3].max() <= 1
+    assert all(len(collection.get_offsets()) < SCATTER_MAX_DRIVERS for collection in ax.collections)
+
+
+def test_small_cohorts_keep_one_marker_per_driver():
+    result = simulate_driver_comparison(cohort_size=300, seed=2)
+    ax = render_driver_comparison(result).axes[0]
+
+    assert not ax.images
+    assert sorted(len(collection.get_offsets()) for collection in ax.collections)[-2:] == [300, 300]
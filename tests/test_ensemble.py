@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from modules.cohorts import FREQUENCY_SD_RATIO, MIN_FREQUENCY
+from modules.driver_comparison import FIRST_COHORT_SIGMA
+from modules.ensemble import (ENSEMBLE_DRIVER_BUDGET, ENSEMBLE_REPLICATIONS, MIN_REPLICATIONS, replications_for,
+                              simulate_ensemble)
+
+
+def test_replications_consume_the_generator_like_normal_and_lognormal():
+    result = simulate_ensemble(num_replications=3, cohort_size=50, rng=np.random.default_rng(4))
+
+    rng = np.random.default_rng(4)
+    frequencies = np.maximum(rng.normal(0.05, 0.05 * FREQUENCY_SD_RATIO, (3, 50)), MIN_FREQUENCY)
+    severities = rng.lognormal(np.log(8000) - 0.5 * FIRST_COHORT_SIGMA ** 2, FIRST_COHORT_SIGMA, (3, 50))
+    np.testing.assert_allclose(result.good_avg_frequency, frequencies.mean(axis=1), rtol=1e-12)
+    np.testing.assert_allclose(result.good_avg_severity, severities.mean(axis=1), rtol=1e-12)
+
+
+def test_the_interval_covers_the_true_multipliers():
+    result = simulate_ensemble(num_replications=500, cohort_size=200, seed=2)
+    stats = result.stats
+
+    assert result.loss_multipliers.shape == (500,)
+    lower, upper = stats['loss_multiplier_ci']
+    assert lower < stats['true_loss_multiplier'] < upper
+    assert stats['freq_multiplier_mean'] == pytest.approx(stats['true_freq_multiplier'], rel=0.02)
+
+
+def test_the_spread_shrinks_with_the_cohort_size():
+    small = simulate_ensemble(num_replications=400, cohort_size=100, seed=1).stats['loss_multiplier_std']
+    large = simulate_ensemble(num_replications=400, cohort_size=1600, seed=1).stats['loss_multiplier_std']
+    assert large == pytest.approx(small / 4, rel=0.25)
+
+
+def test_replications_stay_within_the_driver_budget():
+    assert replications_for(200) == ENSEMBLE_REPLICATIONS
+    assert replications_for(1_000_000) == max(MIN_REPLICATIONS, ENSEMBLE_DRIVER_BUDGET // 1_000_000)
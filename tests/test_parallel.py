@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from modules.parallel import (SKETCH_RELATIVE_ACCURACY, QuantileSketch, ReplicationSummary,
+                              pool_performance_replications, run_replications)
+
+QUANTILES = [0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99]
+
+
+def assert_within_sketch_accuracy(sketch, values):
+    for q in QUANTILES:
+        assert sketch.quantile(q) == pytest.approx(np.quantile(values, q, method='lower'),
+                                                   rel=SKETCH_RELATIVE_ACCURACY)
+
+
+def test_merged_sketches_match_numpy_quantiles():
+    values = np.random.default_rng(0).lognormal(8, 1, 100_000)
+    merged = QuantileSketch()
+    for chunk in np.array_split(values, 7):
+        merged.merge(QuantileSketch().add(chunk))
+
+    assert merged.count == len(values)
+    assert_within_sketch_accuracy(merged, values)
+    whole = QuantileSketch().add(values)
+    assert (merged.positive, merged.negative, merged.zero_count) == (whole.positive, whole.negative,
+                                                                     whole.zero_count)
+
+
+def test_sketch_handles_negative_and_zero_values():
+    values = np.concatenate([np.random.default_rng(1).normal(0, 100, 50_000), np.zeros(1000)])
+    sketch = QuantileSketch().add(values[:25_000]).merge(QuantileSketch().add(values[25_000:]))
+    assert_within_sketch_accuracy(sketch, values)
+
+
+def test_summary_merge_matches_numpy_for_large_offsets():
+    # A plain sum of squares loses every digit of this variance; the Chan merge keeps it
+    values = 1e9 + np.random.default_rng(2).random(100_000)
+    summary = ReplicationSummary()
+    for chunk in np.array_split(values, 10):
+        summary.merge(ReplicationSummary.from_values(chunk))
+
+    assert summary.count == len(values)
+    assert summary.mean == pytest.approx(np.mean(values), rel=1e-15)
+    assert summary.std == pytest.approx(np.std(values, ddof=1), rel=1e-6)
+    assert (summary.minimum, summary.maximum) == (values.min(), values.max())
+
+
+def test_parallel_replications_are_bit_identical_to_serial():
+    parallel = run_replications(pool_performance_replications, 50_000, seed=7, batch_size=10_000, max_workers=2)
+    serial = run_replications(pool_performance_replications, 50_000, seed=7, batch_size=10_000, parallel=False)
+    assert parallel == serial
+    assert parallel.stats == serial.stats
+
+
+def test_binomial_pool_quantile_99_is_2_2():
+    summary = run_replications(pool_performance_replications, 100_000, seed=3, batch_size=20_000, parallel=False)
+    assert summary.stats['quantile_99'] == pytest.approx(2.2, rel=SKETCH_RELATIVE_ACCURACY)
+    assert summary.stats['mean'] == pytest.approx(1.0, abs=4 * summary.stats['standard_error'])
+
+
+def test_empty_summary_reports_nan_instead_of_raising():
+    stats = ReplicationSummary().stats
+    assert stats['count'] == 0
+    assert np.isnan(stats['standard_error']) and np.isnan(stats['median'])
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from modules.pool_convergence import simulate_pool_convergence
+from modules.risk_pooling import simulate_risk_pooling
+
+
+@pytest.fixture(scope='module')
+def curve():
+    return simulate_pool_convergence(0.05, max_n=200_000, seed=8)
+
+
+@pytest.mark.parametrize("n", [1, 10, 999, 2000, 65_537, 200_000])
+def test_ratio_at_matches_the_risk_pooling_chart(curve, n):
+    assert curve.ratio_at(n) == pytest.approx(simulate_risk_pooling(0.05, n, seed=8).pool_performance)
+
+
+def test_plotted_ratios_are_exact_prefix_ratios(curve):
+    np.testing.assert_allclose(curve.ratios, [curve.ratio_at(n) for n in curve.prefix_sizes], rtol=1e-15)
+    assert not curve.cumulative_claims.flags.writeable
+
+
+@pytest.mark.parametrize("n", [0, 200_001])
+def test_ratio_at_rejects_sizes_outside_the_curve(curve, n):
+    with pytest.raises(ValueError):
+        curve.ratio_at(n)
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from modules.pool_projection import simulate_pool_projection
+from modules.risk_pooling import CLAIM_AMOUNT
+from modules.rng import data_rng
+
+
+def test_capital_and_ruin_match_a_year_by_year_loop():
+    years, scenarios = 20, 300
+    result = simulate_pool_projection(0.05, 100, num_years=years, num_scenarios=scenarios, seed=3)
+    counts = data_rng(3).binomial(100, 0.05, size=(years, scenarios))
+
+    for scenario in range(scenarios):
+        capital, ruin = result.initial_capital, 0
+        for year in range(years):
+            capital += result.annual_premium - counts[year, scenario] * CLAIM_AMOUNT
+            assert result.capital[year, scenario] == pytest.approx(capital)
+            if capital < 0 and not ruin:
+                ruin = year + 1
+        assert result.time_to_ruin[scenario] == ruin
+
+
+def test_ruin_probability_by_year_accumulates_to_the_total():
+    result = simulate_pool_projection(0.05, 100, num_years=30, num_scenarios=2000, seed=1)
+    by_year = result.ruin_probability_by_year
+    assert len(by_year) == 30
+    assert np.all(np.diff(by_year) >= 0)
+    assert by_year[-1] == pytest.approx(result.ruin_probability)
+    assert 0 < result.ruin_probability < 1
+
+
+def test_a_higher_loading_never_ruins_more_scenarios():
+    # Same seed, same claims: a larger premium and starting capital can only lift every path
+    low = simulate_pool_projection(0.05, 100, num_years=30, num_scenarios=2000, premium_loading=0.0, seed=5)
+    high = simulate_pool_projection(0.05, 100, num_years=30, num_scenarios=2000, premium_loading=0.2, seed=5)
+    assert not np.any(high.ruined & ~low.ruined)
+    assert high.ruin_probability < low.ruin_probability
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from modules.premium_calculation import (EXPENSE_RATIO, RISK_MARGIN_RATIO, calculate_premium, premium_columns,
+                                         price_portfolio)
+
+
+def test_premium_columns_match_the_premium_formula():
+    frequency = np.array([0.02, 0.05, 0.15])
+    severity = np.array([4000.0, 8000.0, 16000.0])
+    priced = premium_columns(frequency, severity)
+
+    retained = 1 - EXPENSE_RATIO - RISK_MARGIN_RATIO
+    np.testing.assert_allclose(priced.premium, frequency * severity / retained, rtol=1e-15)
+    np.testing.assert_allclose(priced.expected_loss + priced.expenses + priced.risk_margin, priced.premium,
+                               rtol=1e-15)
+    np.testing.assert_allclose(priced.loading_factor, 1 / retained)
+    assert len(priced) == 3
+
+
+def test_per_policy_loadings_are_priced_row_by_row():
+    expense_ratio = np.array([0.1, 0.25, 0.4])
+    risk_margin_ratio = np.array([0.0, 0.05, 0.2])
+    priced = premium_columns(0.05, 8000, expense_ratio, risk_margin_ratio)
+    for row in range(3):
+        single = premium_columns(0.05, 8000, expense_ratio[row], risk_margin_ratio[row])
+        assert priced.premium[row] == single.premium
+        assert priced.expenses[row] == single.expenses
+
+
+@pytest.mark.parametrize("expense_ratio, risk_margin_ratio", [
+    (0.8, 0.2),
+    (np.array([0.25, 0.99]), 0.05),
+])
+def test_loadings_of_the_whole_premium_are_rejected(expense_ratio, risk_margin_ratio):
+    with pytest.raises(ValueError):
+        premium_columns([0.05, 0.05], [8000, 8000], expense_ratio, risk_margin_ratio)
+
+
+def test_price_portfolio_defaults_the_loadings():
+    table = {'frequency': np.array([0.05, 0.1]), 'severity': np.array([8000.0, 5000.0])}
+    np.testing.assert_array_equal(price_portfolio(table).premium,
+                                  premium_columns(table['frequency'], table['severity']).premium)
+    table['expense_ratio'] = np.array([0.1, 0.3])
+    np.testing.assert_array_equal(price_portfolio(table).premium,
+                                  premium_columns(table['frequency'], table['severity'], table['expense_ratio']).premium)
+
+
+def test_calculate_premium_is_unchanged():
+    stats = calculate_premium(0.05, 8000, bad_driver_freq=0.15, bad_driver_severity=16000).stats
+    assert stats['premium'] == pytest.approx(0.05 * 8000 / 0.7)
+    assert stats['premium_bad'] == pytest.approx(0.15 * 16000 / 0.7)
+    assert stats['expenses'] == pytest.approx(0.25 * stats['premium'])
+    assert stats['risk_margin_bad'] == pytest.approx(0.05 * stats['premium_bad'])
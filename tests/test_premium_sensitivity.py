@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from modules.premium_calculation import premium_columns
+from modules.premium_sensitivity import premium_sensitivity
+
+
+@pytest.fixture(scope='module')
+def result():
+    return premium_sensitivity(0.07, 9000, 0.2, 0.1, num_points=101)
+
+
+def test_surfaces_are_premium_columns_over_the_grids(result):
+    for row, column in [(0, 0), (13, 77), (100, 100), (50, 3)]:
+        assert result.loading_surface[row, column] == pytest.approx(premium_columns(
+            0.07, 9000, result.expense_ratios[column], result.risk_margin_ratios[row]).premium, rel=1e-15)
+        assert result.loss_surface[row, column] == pytest.approx(premium_columns(
+            result.frequencies[column], result.severities[row], 0.2, 0.1).premium, rel=1e-15)
+    assert result.premium == pytest.approx(0.07 * 9000 / 0.7)
+
+
+def test_stats_derivatives_match_finite_differences(result):
+    stats = result.stats
+    step = 1e-6
+
+    def premium(frequency=0.07, severity=9000, expense_ratio=0.2, risk_margin_ratio=0.1):
+        return float(premium_columns(frequency, severity, expense_ratio, risk_margin_ratio).premium)
+
+    # Central difference per unit of loading, scaled to one percentage point
+    loading_slope = (premium(expense_ratio=0.2 + step) - premium(expense_ratio=0.2 - step)) / (2 * step)
+    assert stats['premium_per_loading_point'] == pytest.approx(loading_slope * 0.01, rel=1e-6)
+    # The premium is linear in frequency and severity, so a whole step is exact
+    assert stats['premium_per_frequency_point'] == pytest.approx(premium(frequency=0.08) - premium(), rel=1e-9)
+    assert stats['premium_per_1000_severity'] == pytest.approx(premium(severity=10000) - premium(), rel=1e-9)
+
+
+def test_surface_ranges_sit_at_the_grid_corners(result):
+    stats = result.stats
+    assert stats['loading_surface_range'] == pytest.approx((result.loading_surface[0, 0],
+                                                           result.loading_surface[-1, -1]))
+    assert stats['loss_surface_range'] == pytest.approx((result.loss_surface[0, 0], result.loss_surface[-1, -1]))
+    assert stats['num_points'] == 2 * 101 * 101
+    assert np.all(np.diff(result.loading_surface, axis=1) > 0)
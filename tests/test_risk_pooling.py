@@ -0,0 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from modules.risk_pooling import accident_prefixes, policyholder_accidents, simulate_risk_pooling
+
+
+def test_growing_the_pool_keeps_the_same_policyholders():
+    small = simulate_risk_pooling(0.05, 500, seed=9)
+    large = simulate_risk_pooling(0.05, 510, seed=9)
+    np.testing.assert_array_equal(large.accidents[:500], small.accidents)
+
+
+def test_claim_counts_stay_prefix_stable_beyond_the_scatter_limit():
+    counts = [simulate_risk_pooling(0.05, n, seed=4).num_with_loss for n in (2000, 2001, 50_000)]
+    accidents = policyholder_accidents(50_000, 0.05, 4)
+    assert counts == [int(accidents[:n].sum()) for n in (2000, 2001, 50_000)]
+
+
+def test_concurrent_growth_of_a_shared_prefix_is_consistent():
+    accident_prefixes.clear()
+    sizes = np.random.default_rng(0).integers(1, 300_000, 64).tolist()
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(lambda n: policyholder_accidents(n, 0.07, 13), sizes))
+
+    full = policyholder_accidents(300_000, 0.07, 13)
+    for size, accidents in zip(sizes, results):
+        np.testing.assert_array_equal(accidents, full[:size])
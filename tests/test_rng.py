@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from modules.rng import (POLICYHOLDER_STREAM, STREAM_BLOCK_SIZE, data_rng, jitter_rng, prefix_stable_uniforms,
+                         spawn_streams)
+from modules.risk_pooling import simulate_risk_pooling
+
+
+def test_session_streams_are_reproducible_and_distinct():
+    np.testing.assert_array_equal(data_rng(5).random(100), data_rng(5).random(100))
+    assert not np.array_equal(data_rng(5).random(100), jitter_rng(5).random(100))
+    assert not np.array_equal(data_rng(5).random(100), data_rng(6).random(100))
+
+
+def test_interleaved_sessions_do_not_shift_each_other():
+    first, second = data_rng(1), data_rng(2)
+    draws = np.array([(first.random(), second.random()) for _ in range(50)])
+    np.testing.assert_array_equal(draws[:, 0], data_rng(1).random(50))
+    np.testing.assert_array_equal(draws[:, 1], data_rng(2).random(50))
+
+
+def test_simulations_ignore_the_global_numpy_state():
+    np.random.seed(0)
+    before = simulate_risk_pooling(0.05, 1000, seed=3)
+    np.random.seed(1)
+    np.random.random(10)
+    after = simulate_risk_pooling(0.05, 1000, seed=3)
+    np.testing.assert_array_equal(after.accidents, before.accidents)
+
+
+def test_prefix_stable_uniforms_do_not_depend_on_the_length():
+    full = prefix_stable_uniforms(7, 0, 3 * STREAM_BLOCK_SIZE)
+    shorter = prefix_stable_uniforms(7, 0, STREAM_BLOCK_SIZE + 10)
+    np.testing.assert_array_equal(shorter, full[:len(shorter)])
+
+
+@pytest.mark.parametrize("start, stop", [
+    (0, 1),
+    (5, 17),
+    (STREAM_BLOCK_SIZE - 3, STREAM_BLOCK_SIZE + 3),
+    (STREAM_BLOCK_SIZE, 2 * STREAM_BLOCK_SIZE),
+    (STREAM_BLOCK_SIZE // 2, 2 * STREAM_BLOCK_SIZE + 7),
+])
+def test_prefix_stable_uniforms_windows_match_the_full_stream(start, stop):
+    full = prefix_stable_uniforms(11, 0, 3 * STREAM_BLOCK_SIZE)
+    np.testing.assert_array_equal(prefix_stable_uniforms(11, start, stop), full[start:stop])
+
+
+def test_prefix_stable_blocks_are_spawned_children_of_the_stream():
+    block = 2
+    child = spawn_streams(3)[POLICYHOLDER_STREAM].spawn(block + 1)[block]
+    expected = np.random.default_rng(child).random(10)
+    start = block * STREAM_BLOCK_SIZE
+    np.testing.assert_array_equal(prefix_stable_uniforms(3, start, start + 10), expected)
+
+
+def test_prefix_stable_uniforms_differ_between_seeds_and_streams():
+    values = prefix_stable_uniforms(1, 0, 1000)
+    assert np.all((values >= 0) & (values < 1))
+    assert not np.array_equal(values, prefix_stable_uniforms(2, 0, 1000))
+    assert not np.array_equal(values, prefix_stable_uniforms(1, 0, 1000, stream=0))
@@ -0,0 +1,20 @@
+import pytest
+
+from modules.sampling import SAMPLING_METHODS, estimate_cohort_loss_multiplier, estimate_pool_deficit
+
+# E[max(losses - premiums, 0)] of the default pool (see test_aggregate_loss)
+POOL_EXPECTED_DEFICIT = 17101.69
+
+
+@pytest.mark.parametrize("control_variate", [False, True])
+@pytest.mark.parametrize("method", SAMPLING_METHODS)
+def test_pool_deficit_estimates_cover_the_exact_value(method, control_variate):
+    estimate = estimate_pool_deficit(num_samples=8192, method=method, control_variate=control_variate)
+    assert abs(estimate.value - POOL_EXPECTED_DEFICIT) < 4 * estimate.standard_error
+
+
+def test_control_variates_shrink_the_loss_multiplier_error():
+    plain = estimate_cohort_loss_multiplier(num_samples=4096)
+    controlled = estimate_cohort_loss_multiplier(num_samples=4096, control_variate=True)
+    assert controlled.standard_error < plain.standard_error / 5
+    assert abs(controlled.value - plain.value) < 4 * plain.standard_error
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from modules.cohorts import FREQUENCY_SD_RATIO, MIN_FREQUENCY
+from modules.driver_comparison import simulate_driver_comparison
+from modules.streaming import stream_driver_comparison
+
+
+def test_a_single_chunk_matches_simulate_driver_comparison():
+    streamed = stream_driver_comparison(cohort_size=5000, seed=3, chunk_size=5000).stats
+    direct = simulate_driver_comparison(cohort_size=5000, seed=3).stats
+
+    assert streamed.keys() == direct.keys()
+    for key, value in direct.items():
+        if isinstance(value, str):
+            assert streamed[key] == value
+        else:
+            assert streamed[key] == pytest.approx(value, rel=1e-12)
+
+
+def test_chunks_report_progress_and_add_up_to_the_cohort():
+    calls = []
+    result = stream_driver_comparison(cohort_size=25_000, chunk_size=10_000, seed=1,
+                                      progress=lambda done, total: calls.append((done, total)))
+
+    assert calls == [(10_000, 25_000), (20_000, 25_000), (25_000, 25_000)]
+    assert result.first_frequency.count == result.second_severity.count == 25_000
+    assert result.stats['freq_multiplier'] == pytest.approx(3.0, rel=0.05)
+    assert result.stats['severity_multiplier'] == pytest.approx(2.0, rel=0.05)
+
+
+def test_running_statistics_match_the_chunked_values():
+    rng = np.random.default_rng(4)
+    result = stream_driver_comparison(cohort_size=30_000, chunk_size=7_000, seed=4, rng=rng)
+
+    replay = np.random.default_rng(4)
+    frequencies = []
+    for size in (7_000, 7_000, 7_000, 7_000, 2_000):
+        # Each chunk draws the frequencies of both cohorts, then their severities
+        z_frequency = replay.standard_normal(2 * size)
+        replay.standard_normal(2 * size)
+        frequencies.append(np.maximum(0.05 + 0.05 * FREQUENCY_SD_RATIO * z_frequency[:size], MIN_FREQUENCY))
+    frequencies = np.concatenate(frequencies)
+
+    statistic = result.first_frequency
+    assert statistic.mean == pytest.approx(frequencies.mean(), rel=1e-12)
+    assert statistic.std == pytest.approx(frequencies.std(ddof=1), rel=1e-9)
+    assert (statistic.minimum, statistic.maximum) == pytest.approx((frequencies.min(), frequencies.max()))
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from modules.tariff import RATING_FACTORS, build_tariff, quote_book
+
+
+@pytest.fixture
+def tariff():
+    return build_tariff([factor.name for factor in RATING_FACTORS]).compile()
+
+
+def test_cell_index_round_trips_through_unravel_index(tariff):
+    sizes = [factor.num_levels for factor in tariff.factors]
+    codes = np.stack(np.unravel_index(np.arange(tariff.num_cells), sizes), axis=1).astype(np.int8)
+
+    index = tariff.cell_index(codes)
+    np.testing.assert_array_equal(index, np.arange(tariff.num_cells))
+    np.testing.assert_array_equal(np.stack(np.unravel_index(index, sizes), axis=1), codes)
+
+
+def test_table_quotes_match_direct_relativities(tariff):
+    book = quote_book(tariff, num_policies=10_000, seed=5)
+    assert tariff.premium_table is not None
+    np.testing.assert_allclose(book.premiums, tariff._premiums(tariff.relativities(book.codes)), rtol=1e-12)
+    np.testing.assert_array_equal(tariff.quote(book.codes), tariff.quote(np.column_stack(
+        [book.codes[name] for name in tariff.names])))
+
+
+def test_codes_outside_a_factor_are_rejected(tariff):
+    codes = np.zeros((1, len(tariff.factors)), dtype=np.int8)
+    codes[0, 0] = tariff.factors[0].num_levels
+    with pytest.raises(ValueError):
+        tariff.quote(codes)
+
+
+def test_empty_tariff_charges_the_base_premium():
+    book = quote_book(build_tariff([]), num_policies=100, seed=1)
+    np.testing.assert_array_equal(book.premiums, np.full(100, book.tariff.base_premium))